@@ -1,45 +1,25 @@
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, StreamingHttpResponse
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.admin import UserAdmin
-from unfold.admin import TabularInline, ModelAdmin
+from unfold.admin import ModelAdmin
+from unfold.decorators import action
 
 from .models import User, UserAddress, BlacklistedAddress, DailyWorkSummary
 from apps.orders.models import Order
 from .forms import UserCreationForm, UserChangeForm
+from apps.services.payroll_export import stream_payroll_csv
 
 
-class OrderInline(TabularInline):
-    model = Order
-    extra = 0
-    classes = ['collapse']
-    fields = (
-        'restaurant',
-        'delivery',
-        'order_time',
-        'total_amount',
-        'total_bonus_amount',
-        'user',
-        'is_pickup',
-        'payment_method',
-        'change',
-        'order_status',
-        'order_source',
-        'comment',
-    )
-    readonly_fields = (
-            'restaurant',
-            'delivery',
-            'order_time',
-            'total_amount',
-            'total_bonus_amount',
-            'user',
-            'is_pickup',
-            'payment_method',
-            'change',
-            'order_status',
-            'order_source',
-            'comment',
-    )
+# Сколько заказов показывать за один запрос в истории пользователя
+ORDER_HISTORY_PAGE_SIZE = 20
+ORDER_HISTORY_FIELDS = ('id', 'order_time', 'restaurant__name', 'is_pickup', 'payment_method', 'order_status',
+                        'total_amount', 'total_bonus_amount')
 
 
 @admin.register(UserAddress)
@@ -78,6 +58,47 @@ class UserAdmin(ModelAdmin, UserAdmin):
     search_fields = ('phone_number', 'full_name')
     ordering = ('phone_number',)
     filter_horizontal = ('groups', 'user_permissions',)
+    # История заказов подгружается через htmx при раскрытии блока, а не инлайном со всеми заказами
+    change_form_template = 'admin/authentication/user/change_form.html'
+
+    def get_urls(self):
+        return [
+            path('<path:object_id>/orders/', self.admin_site.admin_view(self.order_history_view),
+                 name='authentication_user_orders'),
+        ] + super().get_urls()
+
+    def order_history_view(self, request, object_id):
+        # Пользователя не загружаем: для несуществующего id выборка заказов просто пуста
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        try:
+            user_id = int(object_id)
+        except ValueError:
+            raise Http404
+        try:
+            page = max(int(request.GET.get('page', 1)), 1)
+        except ValueError:
+            page = 1
+
+        # Одна выборка на страницу: лишняя строка сверх размера страницы показывает, есть ли следующая
+        offset = (page - 1) * ORDER_HISTORY_PAGE_SIZE
+        orders = list(Order.objects.filter(user_id=user_id).order_by('-order_time', '-id')
+                      .values(*ORDER_HISTORY_FIELDS)[offset:offset + ORDER_HISTORY_PAGE_SIZE + 1])
+        has_next = len(orders) > ORDER_HISTORY_PAGE_SIZE
+        orders = orders[:ORDER_HISTORY_PAGE_SIZE]
+
+        statuses = dict(Order._meta.get_field('order_status').flatchoices)
+        payment_methods = dict(Order._meta.get_field('payment_method').flatchoices)
+        for order in orders:
+            order['status_display'] = statuses.get(order['order_status'], order['order_status'])
+            order['payment_method_display'] = payment_methods.get(order['payment_method'], order['payment_method'])
+
+        return TemplateResponse(request, 'admin/authentication/user/order_history.html', {
+            'user_id': user_id,
+            'orders': orders,
+            'page': page,
+            'next_page': page + 1 if has_next else None,
+        })
 
 
 @admin.register(BlacklistedAddress)
@@ -96,3 +117,15 @@ class DailyWorkSummaryAdmin(ModelAdmin):
         return f"{total_hours:.2f} часов"
 
     get_total_hours.short_description = "Общее время за день"
+
+    actions_list = ['export_payroll']
+
+    @action(description=_("Выгрузка для зарплаты (CSV)"), url_path='payroll-export', permissions=['view'])
+    def export_payroll(self, request):
+        # Период — ?date_from=&date_to=, по умолчанию текущий месяц
+        today = timezone.localdate()
+        date_from = parse_date(request.GET.get('date_from', '')) or today.replace(day=1)
+        date_to = parse_date(request.GET.get('date_to', '')) or today
+        response = StreamingHttpResponse(stream_payroll_csv(date_from, date_to), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="payroll_{date_from}_{date_to}.csv"'
+        return response
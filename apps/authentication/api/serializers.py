@@ -2,6 +2,7 @@ from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
 from django.contrib.auth import authenticate
+from django.utils import timezone
 
 from apps.authentication.models import (
     User,
@@ -25,6 +26,7 @@ class CustomUserSerializer(serializers.ModelSerializer):
 
 
 class VerifyCodeSerializer(serializers.Serializer):
+    phone_number = serializers.CharField(max_length=13)
     code = serializers.CharField(max_length=4)
     fcm_token = serializers.CharField(max_length=255, required=False, allow_blank=True, allow_null=True)
     receive_notifications = serializers.BooleanField(required=False, allow_null=True)
@@ -141,3 +143,19 @@ class WorkShiftSerializer(serializers.ModelSerializer):
         fields = ['user', 'start_time', 'end_time', 'duration', 'is_open']  # Добавляем поле is_open
         read_only_fields = ['user', 'start_time', 'end_time', 'duration', 'is_open']
 
+
+
+class WorkSummaryQuerySerializer(serializers.Serializer):
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    user = serializers.IntegerField(required=False)
+    role = serializers.ChoiceField(choices=['delivery', 'collector'], required=False)
+
+    def validate(self, data):
+        # По умолчанию — текущий месяц
+        today = timezone.localdate()
+        data.setdefault('date_from', today.replace(day=1))
+        data.setdefault('date_to', today)
+        if data['date_from'] > data['date_to']:
+            raise serializers.ValidationError({'date_to': 'Дата окончания раньше даты начала.'})
+        return data
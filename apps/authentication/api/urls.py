@@ -12,7 +12,8 @@ from apps.authentication.api.views import (
     UserBonusView,
     CourierCollectorLoginView,
     ToggleShiftView,
-    RetrieveTotalTimeTodayView
+    RetrieveTotalTimeTodayView,
+    WorkSummaryReportView
     )
 
 urlpatterns = [
@@ -28,4 +29,5 @@ urlpatterns = [
     path('login/courier_collector/', CourierCollectorLoginView.as_view(), name='courier-collector-login'),
     path('shift/toggle/', ToggleShiftView.as_view(), name='toggle-shift'),
     path('total-time-today/', RetrieveTotalTimeTodayView.as_view(), name='total-time-today'),
+    path('work-summary/', WorkSummaryReportView.as_view(), name='work-summary'),
 ]
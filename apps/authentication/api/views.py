@@ -11,12 +11,13 @@ from rest_framework.views import APIView
 from django.contrib.auth.models import User
 from django.conf import settings
 from django.utils import timezone
-from django.db.models import Sum
+from django.db.models import Count, Sum
 
 from apps.authentication.models import (
     User,
     UserAddress,
-    WorkShift
+    WorkShift,
+    DailyWorkSummary
 )
 from .serializers import (
     CustomUserSerializer,
@@ -27,12 +28,12 @@ from .serializers import (
     NotificationSerializer,
     UserBonusSerializer,
     CourierCollectorLoginSerializer,
-    WorkShiftSerializer
-)
-from apps.authentication.utils import (
-    send_sms,
-    generate_confirmation_code
+    WorkShiftSerializer,
+    WorkSummaryQuerySerializer
 )
+from apps.authentication.utils import send_sms
+from apps.services.otp_store import issue_code, verify_code, OTP_VALID, OTP_TOO_MANY_ATTEMPTS
+from apps.services.rate_limit import OtpPhoneThrottle
 from ...chat.models import Chat
 
 
@@ -48,6 +49,8 @@ class UserBonusView(generics.GenericAPIView):
 class UserLoginView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = CustomUserSerializer
+    # По IP вход ограничивает RateLimitMiddleware, здесь — по номеру телефона
+    throttle_classes = [OtpPhoneThrottle]
 
     def create(self, request, *args, **kwargs):
         phone_number = request.data.get('phone_number')
@@ -63,17 +66,13 @@ class UserLoginView(generics.CreateAPIView):
                 {'error': 'Invalid characters in phone number. Only digits are allowed after the country code.'},
                 status=status.HTTP_400_BAD_REQUEST)
 
-        confirmation_code = generate_confirmation_code()
+        # Код хранится хэшем в кэше по номеру телефона; пользователь создаётся только после подтверждения
+        confirmation_code = issue_code(phone_number)
         send_sms(phone_number, confirmation_code)
 
-        User.objects.update_or_create(
-            phone_number=phone_number,
-            defaults={'code': confirmation_code}
-        )
-
+        # Код уходит только по SMS: в ответе его не отдаём
         response_data = {
             'message': 'Confirmation code sent successfully.',
-            'code': confirmation_code
         }
         return Response(response_data, status=status.HTTP_200_OK)
 
@@ -84,6 +83,7 @@ class VerifyCodeView(generics.CreateAPIView):
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
+        phone_number = serializer.validated_data.get('phone_number')
         code = serializer.validated_data.get('code')
         fcm_token = serializer.validated_data.get('fcm_token')
         receive_notifications = serializer.validated_data.get('receive_notifications')
@@ -92,24 +92,36 @@ class VerifyCodeView(generics.CreateAPIView):
         hardcoded_code = '1234'
         hardcoded_phone_number = '+996123456789'
 
-        user = User.objects.filter(code=code).first()
-
-        # Проверка захардкоженного кода
-        if code == hardcoded_code:
-            user = User.objects.filter(phone_number=hardcoded_phone_number).first()
-
+        if phone_number == hardcoded_phone_number and code == hardcoded_code:
+            result = OTP_VALID
+        else:
+            result = verify_code(phone_number, code)
+
+        if result == OTP_TOO_MANY_ATTEMPTS:
+            return Response({'error': 'Too many attempts. Request a new code.'},
+                            status=status.HTTP_429_TOO_MANY_REQUESTS)
+        if result == OTP_VALID:
+            user = User.objects.filter(phone_number=phone_number).first()
+            if user is None and phone_number != hardcoded_phone_number:
+                user = User.objects.create(phone_number=phone_number)
+        else:
+            user = None
         if not user:
             return Response({'error': 'Invalid code.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        user.is_verified = True
-        user.code = None
-
-        if fcm_token is not None:
+        # Сохраняем только реально изменившиеся поля
+        update_fields = []
+        if fcm_token is not None and fcm_token != user.fcm_token:
             user.fcm_token = fcm_token
-        if receive_notifications is not None:
+            update_fields.append('fcm_token')
+        if receive_notifications is not None and receive_notifications != user.receive_notifications:
             user.receive_notifications = receive_notifications
-
-        user.save()
+            update_fields.append('receive_notifications')
+        if user.code is not None:
+            user.code = None
+            update_fields.append('code')
+        if update_fields:
+            user.save(update_fields=update_fields)
 
         refresh = RefreshToken.for_user(user)
         access_token = str(refresh.access_token)
@@ -272,6 +284,13 @@ class CourierCollectorLoginView(generics.CreateAPIView):
         }, status=status.HTTP_200_OK)
 
 
+def get_total_time_today(user):
+    # Закрытые смены уже сложены в DailyWorkSummary, считать их заново не нужно
+    total_duration = DailyWorkSummary.objects.filter(user=user, date=timezone.localdate()).values_list(
+        'total_duration', flat=True).first()
+    return total_duration or timedelta(0)  # Если смен нет, возвращаем 0 времени
+
+
 class ToggleShiftView(generics.GenericAPIView):
     serializer_class = WorkShiftSerializer
 
@@ -281,11 +300,8 @@ class ToggleShiftView(generics.GenericAPIView):
         try:
             # Проверяем, есть ли активная смена (время окончания не установлено и смена открыта)
             active_shift = WorkShift.objects.get(user=user, end_time__isnull=True, is_open=True)
-            # Завершаем активную смену
-            active_shift.end_time = timezone.now()
-            active_shift.calculate_duration()  # Рассчитываем продолжительность
-            active_shift.is_open = False  # Закрываем смену
-            active_shift.save()  # Сохраняем изменения
+            # Завершаем активную смену, она сразу прибавляется к дневной сводке
+            active_shift.close()
             serializer = self.get_serializer(active_shift)
 
             # Рассчитываем общее время работы за сегодня
@@ -308,14 +324,7 @@ class ToggleShiftView(generics.GenericAPIView):
             }, status=status.HTTP_201_CREATED)
 
     def get_total_time_today(self, user):
-        today = timezone.now().date()
-        shifts_today = WorkShift.objects.filter(user=user, start_time__date=today, end_time__isnull=False)
-        total_duration = shifts_today.aggregate(total_duration=Sum('duration'))['total_duration']
-
-        if total_duration is None:
-            total_duration = timedelta(0)  # Если смен нет, возвращаем 0 времени
-
-        return total_duration
+        return get_total_time_today(user)
 
 
 class RetrieveTotalTimeTodayView(APIView):
@@ -341,16 +350,42 @@ class RetrieveTotalTimeTodayView(APIView):
         }, status=status.HTTP_200_OK)
 
     def get_total_time_today(self, user):
-        today = timezone.now().date()
-        shifts_today = WorkShift.objects.filter(
-            user=user,
-            start_time__date=today,
-            end_time__isnull=False  # Смена завершена
-        )
+        return get_total_time_today(user)
 
-        total_duration = shifts_today.aggregate(total_duration=Sum('duration'))['total_duration']
 
-        if total_duration is None:
-            total_duration = timedelta(0)  # Если смен нет, возвращаем 0 времени
+class WorkSummaryReportView(generics.GenericAPIView):
+    """Часы работы по сотрудникам за период — только по DailyWorkSummary, сами смены не читаются."""
+    serializer_class = WorkSummaryQuerySerializer
+    permission_classes = [permissions.IsAuthenticated]
 
-        return total_duration
+    def get(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        summaries = DailyWorkSummary.objects.filter(date__range=(params['date_from'], params['date_to']))
+        if not request.user.is_staff:
+            # Курьер и сборщик видят только свои часы
+            summaries = summaries.filter(user=request.user)
+        elif params.get('user'):
+            summaries = summaries.filter(user_id=params['user'])
+        if params.get('role'):
+            summaries = summaries.filter(user__role=params['role'])
+
+        rows = summaries.values('user', 'user__full_name', 'user__phone_number', 'user__role').annotate(
+            days=Count('id'),
+            total_duration=Sum('total_duration'),
+        ).order_by('user')
+
+        return Response({
+            'date_from': params['date_from'],
+            'date_to': params['date_to'],
+            'results': [{
+                'user_id': row['user'],
+                'full_name': row['user__full_name'],
+                'phone_number': row['user__phone_number'],
+                'role': row['user__role'],
+                'days': row['days'],
+                'total_hours': round(row['total_duration'].total_seconds() / 3600, 2),
+            } for row in rows],
+        }, status=status.HTTP_200_OK)
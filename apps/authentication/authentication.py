@@ -0,0 +1,55 @@
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+# Поля, которых хватает для проверки прав и большинства списков; остальное догружается при обращении
+AUTH_USER_FIELDS = ('id', 'phone_number', 'full_name', 'role', 'is_staff', 'is_superuser')
+AUTH_USER_CACHE_KEY = 'auth:user:{}'
+AUTH_USER_CACHE_TIMEOUT = 60
+
+
+def reset_auth_user(user_id):
+    cache.delete(AUTH_USER_CACHE_KEY.format(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication, который не читает строку пользователя на каждый запрос.
+
+    Урезанная проекция пользователя хранится в кэше AUTH_USER_CACHE_TIMEOUT секунд
+    и сбрасывается сигналом при сохранении. request.user — обычный экземпляр User
+    с отложенными полями: первое обращение к любому из них догружает их все одним запросом.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        # from_db ждёт значения в порядке полей модели; хэш пароля нужен только для проверки отзыва токена
+        fields = AUTH_USER_FIELDS + ('password',) if api_settings.CHECK_REVOKE_TOKEN else AUTH_USER_FIELDS
+        field_names = [field.attname for field in self.user_model._meta.concrete_fields if field.attname in fields]
+        key = AUTH_USER_CACHE_KEY.format(user_id)
+        values = cache.get(key)
+        if values is None:
+            values = self.user_model.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).values_list(
+                *field_names).first()
+            if values is None:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            cache.set(key, values, AUTH_USER_CACHE_TIMEOUT)
+
+        user = self.user_model.from_db(router.db_for_read(self.user_model), field_names, values)
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
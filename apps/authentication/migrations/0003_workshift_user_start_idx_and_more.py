@@ -0,0 +1,23 @@
+# Generated by Django 5.0.7 on 2026-10-19 18:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_workshift_is_open'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dailyworksummary',
+            index=models.Index(fields=['date'], name='auth_summary_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workshift',
+            index=models.Index(fields=['user', 'start_time'], name='auth_workshift_user_start_idx'),
+        ),
+    ]
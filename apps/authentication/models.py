@@ -1,6 +1,6 @@
-from datetime import timedelta
+from datetime import datetime, time, timedelta
 
-from django.db import models
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.models import (
     AbstractBaseUser,
@@ -8,7 +8,8 @@ from django.contrib.auth.models import (
     PermissionsMixin
 )
 from django.utils import timezone
-from django.db.models import Sum, Min, Max
+from django.db.models import Count, F, Sum, Min, Max, Value
+from django.db.models.functions import Greatest, Least
 
 from apps.chat.models import Chat
 
@@ -66,6 +67,14 @@ class User(AbstractBaseUser, PermissionsMixin):
     def get_admin_url(self):
         return f"/admin/authentication/user/{self.id}/change/"
 
+    def refresh_from_db(self, using=None, fields=None):
+        # Пользователь из CachedJWTAuthentication загружен частично: при первом обращении
+        # к отложенному полю догружаем все отложенные поля одним запросом, а не по одному
+        deferred_fields = self.get_deferred_fields()
+        if fields is not None and deferred_fields and set(fields) <= deferred_fields:
+            fields = deferred_fields
+        super().refresh_from_db(using=using, fields=fields)
+
     def __str__(self):
         return self.phone_number
 
@@ -121,10 +130,55 @@ class DailyWorkSummary(models.Model):
         verbose_name = _("Сводка по сменам за день")
         verbose_name_plural = _("Сводки по сменам за день")
         unique_together = ('user', 'date')
+        indexes = [
+            models.Index(fields=['date'], name='auth_summary_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.full_name or self.user.phone_number} - {self.date}"
 
+    @classmethod
+    def add_shift(cls, shift):
+        """Прибавляет только что закрытую смену к сводке её дня без пересчёта остальных смен."""
+        with transaction.atomic():
+            summary, created = cls.objects.select_for_update().get_or_create(
+                user_id=shift.user_id,
+                date=shift.local_date(),
+                defaults={
+                    'start_time': shift.start_time,
+                    'end_time': shift.end_time,
+                    'total_duration': shift.duration,
+                }
+            )
+            if not created:
+                cls.objects.filter(pk=summary.pk).update(
+                    start_time=Least('start_time', Value(shift.start_time)),
+                    end_time=Greatest('end_time', Value(shift.end_time)),
+                    total_duration=F('total_duration') + Value(shift.duration),
+                )
+
+    @classmethod
+    def rebuild(cls, user_id, date):
+        """Пересчитывает сводку дня одним агрегатом — после правки или удаления уже закрытой смены."""
+        totals = WorkShift.objects.for_day(user_id, date).filter(end_time__isnull=False).aggregate(
+            shifts=Count('id'),
+            start_time=Min('start_time'),
+            end_time=Max('end_time'),
+            total_duration=Sum('duration'),
+        )
+        if not totals.pop('shifts'):
+            cls.objects.filter(user_id=user_id, date=date).delete()
+            return
+        totals['total_duration'] = totals['total_duration'] or timedelta(0)
+        cls.objects.update_or_create(user_id=user_id, date=date, defaults=totals)
+
+
+class WorkShiftQuerySet(models.QuerySet):
+    def for_day(self, user_id, date):
+        # Диапазон вместо start_time__date, чтобы работал индекс (user, start_time)
+        day_start = timezone.make_aware(datetime.combine(date, time.min))
+        return self.filter(user_id=user_id, start_time__gte=day_start, start_time__lt=day_start + timedelta(days=1))
+
 
 class WorkShift(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='work_shifts', verbose_name=_("Пользователь"))
@@ -133,31 +187,37 @@ class WorkShift(models.Model):
     duration = models.DurationField(verbose_name=_("Продолжительность смены"), null=True, blank=True)
     is_open = models.BooleanField(default=False, verbose_name=_("Смена открыта"))  # Новое поле
 
+    objects = WorkShiftQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'start_time'], name='auth_workshift_user_start_idx'),
+        ]
+
     def calculate_duration(self):
         if self.start_time and self.end_time:
             self.duration = self.end_time - self.start_time
 
-    def save(self, *args, **kwargs):
+    def local_date(self):
+        # День смены — по местному времени, как и в отчётах
+        return timezone.localdate(self.start_time)
+
+    def close(self, end_time=None):
+        """Закрывает открытую смену и прибавляет её к дневной сводке."""
+        self.end_time = end_time or timezone.now()
+        self.is_open = False
+        self.calculate_duration()
+        self.save(update_summary=False)
+        DailyWorkSummary.add_shift(self)
+
+    def save(self, *args, update_summary=True, **kwargs):
         # Проверяем, если время окончания установлено, то закрываем смену
         if self.end_time and self.is_open:
             self.is_open = False
             self.calculate_duration()  # Рассчитываем продолжительность перед сохранением
         super().save(*args, **kwargs)  # Здесь вызываем родительский метод save
-        if self.end_time:
+        if self.end_time and update_summary:
             self.update_daily_summary()
 
     def update_daily_summary(self):
-        shift_date = self.start_time.date()
-        shifts = WorkShift.objects.filter(user=self.user, start_time__date=shift_date, end_time__isnull=False)
-        total_duration = shifts.aggregate(total_duration=Sum('duration'))['total_duration'] or timedelta(0)
-        start_time = shifts.aggregate(start_time=Min('start_time'))['start_time']
-        end_time = shifts.aggregate(end_time=Max('end_time'))['end_time']
-        summary, created = DailyWorkSummary.objects.update_or_create(
-            user=self.user,
-            date=shift_date,
-            defaults={
-                'start_time': start_time,
-                'end_time': end_time,
-                'total_duration': total_duration
-            }
-        )
+        DailyWorkSummary.rebuild(self.user_id, self.local_date())
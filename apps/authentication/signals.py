@@ -1,7 +1,8 @@
-from django.db.models.signals import pre_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 
-from .models import UserAddress
+from .authentication import reset_auth_user
+from .models import User, UserAddress, WorkShift
 from apps.orders.models import TelegramBotToken
 from apps.services.get_coordinates import get_coordinates
 
@@ -18,3 +19,16 @@ def set_coordinates(sender, instance, **kwargs):
             instance.latitude = latitude
             instance.longitude = longitude
 
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_auth_user(sender, instance, **kwargs):
+    # Проекция пользователя для JWT-аутентификации перечитается при следующем запросе
+    reset_auth_user(instance.id)
+
+
+@receiver(post_delete, sender=WorkShift)
+def rebuild_work_summary(sender, instance, **kwargs):
+    # Удалённая закрытая смена не должна оставаться в дневной сводке
+    if instance.end_time and instance.start_time:
+        instance.update_daily_summary()
@@ -1,3 +1,239 @@
+import csv
+from datetime import datetime, timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.authentication.authentication import CachedJWTAuthentication
+from apps.authentication.admin import ORDER_HISTORY_PAGE_SIZE
+from apps.authentication.models import DailyWorkSummary, User, WorkShift
+from apps.orders.models import Order, Restaurant
+from apps.services.otp_store import OTP_CACHE_KEY, OTP_MAX_ATTEMPTS
+
+
+@mock.patch('apps.authentication.api.views.send_sms')
+class OtpLoginTest(TestCase):
+    phone_number = '+996700000040'
+
+    def setUp(self):
+        cache.clear()
+
+    def login(self, send_sms):
+        response = self.client.post('/api/v1/users/login/', {'phone_number': self.phone_number})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('code', response.json())
+        # Код доступен только из отправленной SMS
+        return send_sms.call_args.args[1]
+
+    def verify(self, code, phone_number=None):
+        return self.client.post('/api/v1/users/verify-code/', {
+            'phone_number': phone_number or self.phone_number,
+            'code': code,
+        })
+
+    def test_code_is_hashed_per_phone_and_single_use(self, send_sms):
+        code = self.login(send_sms)
+        send_sms.assert_called_once_with(self.phone_number, code)
+        self.assertNotEqual(cache.get(OTP_CACHE_KEY.format(self.phone_number)), code)
+        self.assertFalse(User.objects.filter(phone_number=self.phone_number).exists())
+
+        self.assertEqual(self.verify(code, '+996700000041').status_code, 400)
+        response = self.verify(code)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user_id'], User.objects.get(phone_number=self.phone_number).id)
+        self.assertEqual(self.verify(code).status_code, 400)
+
+    def test_login_is_limited_per_phone_and_ip(self, send_sms):
+        capacity = settings.RATE_LIMITS['otp-phone'][0]
+        for _ in range(capacity):
+            self.login(send_sms)
+        response = self.client.post('/api/v1/users/login/', {'phone_number': self.phone_number})
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(send_sms.call_count, capacity)
+
+        # Другие номера с того же IP упираются в лимит middleware; отклонённый запрос тоже расходует токен IP
+        ip_capacity = settings.RATE_LIMITS['otp-ip'][0]
+        statuses = [self.client.post('/api/v1/users/login/', {'phone_number': f'+99655500{index:04d}'}).status_code
+                    for index in range(ip_capacity - capacity)]
+        self.assertEqual(statuses[-1], 429)
+        self.assertEqual(set(statuses[:-1]), {200})
+
+    def test_ip_limit_ignores_client_supplied_forwarded_for(self, send_sms):
+        ip_capacity = settings.RATE_LIMITS['otp-ip'][0]
+        statuses = [self.client.post('/api/v1/users/login/', {'phone_number': f'+99655501{index:04d}'},
+                                     HTTP_X_FORWARDED_FOR=f'203.0.113.{index}, 198.51.100.7').status_code
+                    for index in range(ip_capacity + 1)]
+        self.assertEqual(statuses[-1], 429)
+
+        # Адрес, добавленный прокси, — это и есть клиент, его корзина отдельная
+        response = self.client.post('/api/v1/users/login/', {'phone_number': '+996555019999'},
+                                    HTTP_X_FORWARDED_FOR='198.51.100.8')
+        self.assertEqual(response.status_code, 200)
+
+    def test_code_burns_after_max_attempts(self, send_sms):
+        code = self.login(send_sms)
+        wrong = '0000' if code != '0000' else '1111'
+        for _ in range(OTP_MAX_ATTEMPTS):
+            self.assertEqual(self.verify(wrong).status_code, 400)
+        self.assertEqual(self.verify(code).status_code, 429)
+        self.assertEqual(self.verify(code).status_code, 400)
+
+
+class CachedJWTAuthenticationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('+996700000050', full_name='Курьер', role='delivery')
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+
+    def authenticate(self):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        return CachedJWTAuthentication().authenticate(request)[0]
+
+    def test_user_projection_is_cached_and_reset_on_save(self):
+        self.authenticate()
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+            self.assertEqual((user.id, user.role, user.full_name), (self.user.id, 'delivery', 'Курьер'))
+
+        # Остальные поля догружаются одним запросом при первом обращении
+        with self.assertNumQueries(1):
+            self.assertIsNone(user.bonus)
+            self.assertIsNone(user.fcm_token)
+
+        self.user.full_name = 'Курьер Б.'
+        self.user.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.authenticate().full_name, 'Курьер Б.')
+
+
+class WorkSummaryTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.courier = User.objects.create_user('+996700000060', full_name='Курьер', role='delivery')
+        self.manager = User.objects.create_superuser('+996700000061', password='admin', full_name='Менеджер')
+        self.client = APIClient()
+        self.day_start = timezone.make_aware(datetime(2026, 10, 5, 9))
+
+    def close_shift(self, start_hour, hours):
+        shift = WorkShift.objects.create(user=self.courier, start_time=self.day_start + timedelta(hours=start_hour),
+                                         is_open=True)
+        shift.close(shift.start_time + timedelta(hours=hours))
+        return shift
+
+    def test_summary_is_accumulated_and_rebuilt(self):
+        self.close_shift(0, 2)
+        shift = self.close_shift(4, 3)
+        summary = DailyWorkSummary.objects.get(user=self.courier)
+        self.assertEqual(summary.total_duration, timedelta(hours=5))
+        self.assertEqual((summary.start_time, summary.end_time),
+                         (self.day_start, self.day_start + timedelta(hours=7)))
+
+        shift.delete()
+        summary.refresh_from_db()
+        self.assertEqual(summary.total_duration, timedelta(hours=2))
+
+    def test_report_reads_hours_per_staff_member(self):
+        self.close_shift(0, 2)
+        self.close_shift(3, 1.5)
+        params = {'date_from': '2026-10-01', 'date_to': '2026-10-31'}
+
+        self.client.force_authenticate(self.manager)
+        with self.assertNumQueries(1):
+            data = self.client.get('/api/v1/users/work-summary/', params).json()
+        self.assertEqual(data['results'], [{
+            'user_id': self.courier.id, 'full_name': 'Курьер', 'phone_number': '+996700000060',
+            'role': 'delivery', 'days': 1, 'total_hours': 3.5,
+        }])
+
+        response = self.client.get('/api/v1/users/work-summary/', {**params, 'date_to': '2026-09-01'})
+        self.assertEqual(response.status_code, 400)
+
+
+class PayrollExportTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.courier = User.objects.create_user('+996700000070', full_name='Курьер', role='delivery')
+        self.admin = User.objects.create_superuser('+996700000071', password='admin', full_name='Админ')
+        # Дни считаются в местном времени: смену и заказы ставим на один и тот же местный день
+        start = timezone.localtime().replace(hour=10, minute=0, second=0, microsecond=0)
+        self.day = start.date()
+        shift = WorkShift.objects.create(user=self.courier, start_time=start, is_open=True)
+        shift.close(start + timedelta(hours=4))
+
+        restaurant = Restaurant.objects.create(name='Склад', address='Бишкек', latitude=42.87, longitude=74.59)
+        for status in ('completed', 'completed', 'cancelled'):
+            order = Order(restaurant=restaurant, user=self.admin, courier=self.courier, total_amount=100,
+                          order_status=status)
+            order.save()
+            Order.objects.filter(pk=order.pk).update(order_time=start + timedelta(hours=1))
+
+    def test_payroll_csv_is_streamed_per_staff_and_day(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('admin:authentication_dailyworksummary_export_payroll'),
+                                   {'date_from': self.day.isoformat(), 'date_to': self.day.isoformat()})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        rows = list(csv.reader(b''.join(response.streaming_content).decode('utf-8-sig').splitlines()))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][:6], [self.day.isoformat(), str(self.courier.id), 'Курьер', '+996700000070',
+                                       'delivery', '1'])
+        # Отменённый заказ в зарплату не попадает
+        self.assertEqual(rows[1][8:], ['4.00', '2'])
+
+    def test_staff_without_view_permission_cannot_export(self):
+        staff = User.objects.create_user('+996700000074', full_name='Менеджер')
+        User.objects.filter(pk=staff.pk).update(is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(reverse('admin:authentication_dailyworksummary_export_payroll'))
+        self.assertEqual(response.status_code, 403)
+
+
+class UserOrderHistoryAdminTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('+996700000072', password='admin', full_name='Админ')
+        self.customer = User.objects.create_user('+996700000073', full_name='Клиент')
+        restaurant = Restaurant.objects.create(name='Склад', address='Бишкек', latitude=42.87, longitude=74.59)
+        for _ in range(ORDER_HISTORY_PAGE_SIZE + 1):
+            Order(restaurant=restaurant, user=self.customer, total_amount=100).save()
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:authentication_user_orders', args=[self.customer.pk])
+
+    def test_change_form_does_not_render_orders(self):
+        response = self.client.get(reverse('admin:authentication_user_change', args=[self.customer.pk]))
+
+        self.assertContains(response, self.url)
+        self.assertNotContains(response, 'Заказ #')
+
+    def test_history_is_paginated_with_one_orders_query_per_page(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        order_queries = [query for query in queries if 'orders_order' in query['sql']]
+
+        self.assertEqual(len(order_queries), 1)
+        # Сессия, request.user и заказы; сам пользователь из адреса не загружается
+        self.assertEqual(len(queries), 3)
+        self.assertEqual(len(response.context['orders']), ORDER_HISTORY_PAGE_SIZE)
+        self.assertEqual(response.context['next_page'], 2)
+        # Кнопка заменяет саму себя, а не наследует цель от блока <details>
+        self.assertContains(response, 'hx-target="this"')
+
+        response = self.client.get(self.url, {'page': 2})
+        self.assertEqual(len(response.context['orders']), 1)
+        self.assertIsNone(response.context['next_page'])
+        self.assertContains(response, 'Сумма: 100')
 
-# Create your tests here.
+    def test_unknown_user_has_empty_history(self):
+        response = self.client.get(reverse('admin:authentication_user_orders', args=[self.customer.pk + 100]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['orders'], [])
+        self.assertEqual(self.client.get('/admin/authentication/user/abc/orders/').status_code, 404)
@@ -1,9 +1,11 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
 from django.template.response import TemplateResponse
 
 from unfold.admin import ModelAdmin
 from .models import Chat, Message
 from apps.authentication.models import User
+from apps.services.chat_dashboard import chat_users_with_unread, CHAT_USERS_PER_PAGE
 
 
 class ChatAdmin(ModelAdmin):
@@ -11,12 +13,19 @@ class ChatAdmin(ModelAdmin):
 
     def changelist_view(self, request, extra_context=None):
         extra_context = extra_context or {}
-        users = User.objects.filter(is_superuser=False)
+        # Поиск и страница относятся к списку пользователей, ChangeList чатов их не должен видеть
+        request.GET = request.GET.copy()
+        search = request.GET.pop('q', [''])[0].strip()
+        page_number = request.GET.pop('page', [None])[0]
+
         admin_user = User.objects.filter(is_superuser=True).first()
-        chats = Chat.objects.filter(admin=admin_user)
+        users = chat_users_with_unread(admin_user, search)
+        page = Paginator(users, CHAT_USERS_PER_PAGE).get_page(page_number)
 
-        extra_context['users'] = users
-        extra_context['chats'] = chats
+        extra_context['users'] = page.object_list
+        extra_context['page_obj'] = page
+        extra_context['search_query'] = search
+        extra_context['user_new_messages_count'] = {user.id: user.unread_count for user in page.object_list}
         extra_context['admin_id'] = admin_user.id if admin_user else None
         return super(ChatAdmin, self).changelist_view(request, extra_context=extra_context)
 
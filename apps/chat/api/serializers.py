@@ -10,8 +10,8 @@ class MessageSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Message
-        fields = ['chat', 'sender', 'sender_name', 'sender_role', 'recipient', 'content', 'image', 'timestamp']
-        read_only_fields = ['sender', 'recipient', 'timestamp', 'sender_name', 'sender_role']
+        fields = ['id', 'chat', 'sender', 'sender_name', 'sender_role', 'recipient', 'content', 'image', 'timestamp']
+        read_only_fields = ['id', 'sender', 'recipient', 'timestamp', 'sender_name', 'sender_role']
         extra_kwargs = {
             'chat': {'required': False}  # Поле chat теперь необязательно
         }
@@ -2,6 +2,7 @@ from django.urls import path
 from .views import (
     ChatListView,
     SendMessageView,
+    ChatMessageHistoryView,
     GetChatIdView,
     CreateChatView,
     mark_messages_as_read
@@ -13,6 +14,7 @@ urlpatterns = [
 
     # URL для отправки сообщения
     path('chats/send/', SendMessageView.as_view(), name='send-message'),
+    path('chats/<int:chat_id>/messages/', ChatMessageHistoryView.as_view(), name='chat-message-history'),
     path('get-chat-id/', GetChatIdView.as_view(), name='get-chat-id'),
 
     path('create-chat/', CreateChatView.as_view(), name='create-chat'),
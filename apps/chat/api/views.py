@@ -1,14 +1,29 @@
+import base64
+from collections import OrderedDict
+
 from rest_framework import generics, permissions, serializers
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.utils.urls import replace_query_param
 
 from apps.chat.models import Chat, Message
 from .serializers import ChatSerializer, MessageSerializer
 from ...authentication.models import User
 
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Q
+from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_datetime
 from django.shortcuts import render
 from django.http import JsonResponse
-from config import settings
+
+from apps.chat.celery import mirror_chat_message
+from apps.services.chat_dashboard import chat_users_with_unread, CHAT_USERS_PER_PAGE
+from apps.services.firestore_mirror import get_chat_admin_id
+from apps.services.rate_limit import ChatMessageThrottle
 
 
 class ChatListView(generics.ListAPIView):
@@ -23,13 +38,14 @@ class ChatListView(generics.ListAPIView):
 class SendMessageView(generics.CreateAPIView):
     serializer_class = MessageSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [ChatMessageThrottle]
 
     def perform_create(self, serializer):
         content = self.request.data.get('content')
         image = self.request.FILES.get('image')
 
         # Get the admin and the current user (either admin or normal user)
-        admin = User.objects.filter(is_superuser=True).first()  # Admin
+        admin_id = get_chat_admin_id()  # Admin
         user = self.request.user  # The current user (sender)
 
         # Get recipient_id from request data
@@ -37,56 +53,103 @@ class SendMessageView(generics.CreateAPIView):
         recipient = User.objects.get(id=recipient_id) if recipient_id else user
 
         # Check if a chat already exists between the user and admin
-        chat = Chat.objects.filter(user=recipient, admin=admin).first()
+        chat = Chat.objects.filter(user=recipient, admin_id=admin_id).first()
 
         # If chat doesn't exist, create a new one
         if not chat:
-            chat = Chat.objects.create(user=recipient, admin=admin)
+            chat = Chat.objects.create(user=recipient, admin_id=admin_id)
 
         # Create and save the message
         message = serializer.save(chat=chat, sender=user, recipient=recipient, content=content, image=image)
 
-        # Send message to Firebase
-        self.send_message_to_firebase(chat, message)
-
-    def send_message_to_firebase(self, chat, message):
-        from firebase_admin import firestore
-        db = firestore.client()
-
-        # Get sender and recipient full names
-        sender_full_name = message.sender.full_name if message.sender.full_name else message.sender.phone_number
-        recipient_full_name = message.recipient.full_name if message.recipient.full_name else message.recipient.phone_number
-
-        # Structure for the message that includes full names
-        message_data = {
-            'sender_full_name': sender_full_name,
-            'recipient_full_name': recipient_full_name,
-            'sender_id': message.sender.id,
-            'recipient_id': message.recipient.id,
-            'content': message.content,
-            'image_url': message.image.url if message.image else None,
-            'timestamp': message.timestamp
-        }
+        # Копия в Firestore пишется воркером после коммита, ответ ждёт только Postgres
+        transaction.on_commit(lambda: mirror_chat_message.delay(message.id))
+
 
-        # Save the message to Firestore
-        db.collection('chats').document(str(chat.id)).collection('messages').add(message_data)
+class MessageKeysetPagination(BasePagination):
+    """
+    Постраничная история от новых к старым по ключу (timestamp, id).
 
-        # Save sender and recipient info in Firestore (if not already saved)
-        self.save_user_to_firestore(message.sender)
-        self.save_user_to_firestore(message.recipient)
+    Курсор — последнее сообщение страницы, следующая страница читается условием
+    «строго раньше курсора», поэтому стоимость не растёт с глубиной прокрутки.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 30
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
 
-    def save_user_to_firestore(self, user):
-        from firebase_admin import firestore
-        db = firestore.client()
+    def encode_cursor(self, message):
+        raw = f'{message.timestamp.isoformat()}|{message.id}'
+        return base64.urlsafe_b64encode(raw.encode()).decode()
 
-        user_data = {
-            'full_name': user.full_name,
-            'phone_number': user.phone_number
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            timestamp, message_id = base64.urlsafe_b64decode(encoded.encode()).decode().split('|')
+            timestamp, message_id = parse_datetime(timestamp), int(message_id)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if timestamp is None:
+            raise NotFound(self.invalid_cursor_message)
+        return timestamp, message_id
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            timestamp, message_id = cursor
+            queryset = queryset.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=message_id))
+
+        page_size = self.get_page_size(request)
+        # Одна лишняя строка показывает, есть ли следующая страница, без COUNT(*)
+        page = list(queryset.order_by('-timestamp', '-id')[:page_size + 1])
+        self.has_next = len(page) > page_size
+        page = page[:page_size]
+        self.next_cursor = self.encode_cursor(page[-1]) if self.has_next else None
+        return page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
         }
 
-        # Add or update user info in Firestore
-        user_ref = db.collection('users').document(str(user.id))
-        user_ref.set(user_data, merge=True)
+
+class ChatMessageHistoryView(generics.ListAPIView):
+    serializer_class = MessageSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = MessageKeysetPagination
+
+    def get_queryset(self):
+        user = self.request.user
+        chats = Chat.objects.all() if user.is_staff else Chat.objects.filter(Q(user=user) | Q(admin=user))
+        chat = get_object_or_404(chats, id=self.kwargs['chat_id'])
+        return Message.objects.filter(chat=chat).select_related('sender')
 
 
 class GetChatIdView(generics.GenericAPIView):
@@ -139,7 +202,7 @@ class CreateChatView(generics.GenericAPIView):
 
 def mark_messages_as_read(request, chat_id):
     if request.method == "POST":
-        # Получаем все непрочитанные сообщения для данного чата
+        # Получаем все непрочитанные сообщения для данного чата (частичный индекс chat_message_unread_idx)
         messages = Message.objects.filter(chat_id=chat_id, is_read=False)
 
         # Помечаем сообщения как прочитанные и считаем количество обновленных сообщений
@@ -150,27 +213,16 @@ def mark_messages_as_read(request, chat_id):
 
 
 def user_list_view(request):
-    # Получаем всех пользователей
-    users = settings.AUTH_USER_MODEL.objects.all()
-
-    # Создаем словарь для хранения количества непрочитанных сообщений
-    user_new_messages_count = {}
-
-    # Перебираем пользователей и подсчитываем непрочитанные сообщения
-    for user in users:
-        # Получаем чаты, в которых пользователь участвует
-        chats = Chat.objects.filter(user=user)
-        unread_count = 0
-
-        # Подсчитываем непрочитанные сообщения в каждом чате
-        for chat in chats:
-            unread_count += Message.objects.filter(chat=chat, is_read=False).count()
-
-        # Сохраняем количество непрочитанных сообщений
-        user_new_messages_count[user.id] = unread_count
+    # Пользователи с количеством непрочитанных сообщений одним запросом, постранично и с поиском
+    search = request.GET.get('q', '').strip()
+    admin = User.objects.filter(is_superuser=True).first()
+    page = Paginator(chat_users_with_unread(admin, search), CHAT_USERS_PER_PAGE).get_page(request.GET.get('page'))
 
     # Передаем пользователей и количество непрочитанных сообщений в шаблон
     return render(request, 'admin/custom_admin.html', {
-        'users': users,
-        'user_new_messages_count': user_new_messages_count,
+        'users': page.object_list,
+        'page_obj': page,
+        'search_query': search,
+        'admin_id': admin.id if admin else None,
+        'user_new_messages_count': {user.id: user.unread_count for user in page.object_list},
     })
@@ -0,0 +1,29 @@
+from celery import shared_task
+from google.api_core.exceptions import GoogleAPIError
+
+from apps.authentication.models import User
+from apps.chat.models import Chat, Message
+from apps.services.firestore_mirror import mirror_message, sync_user
+
+
+@shared_task(bind=True, max_retries=5, ignore_result=True)
+def mirror_chat_message(self, message_id):
+    message = Message.objects.select_related('sender', 'recipient').filter(id=message_id).first()
+    if message is None:
+        return
+    try:
+        mirror_message(message)
+    except GoogleAPIError as e:
+        raise self.retry(exc=e, countdown=5 * (self.request.retries + 1))
+
+
+@shared_task(bind=True, max_retries=5, ignore_result=True)
+def sync_user_to_firestore(self, user_id, chat_id=None):
+    user = User.objects.filter(id=user_id).first()
+    if user is None:
+        return
+    chat = Chat.objects.filter(id=chat_id).first() if chat_id else None
+    try:
+        sync_user(user, chat)
+    except GoogleAPIError as e:
+        raise self.retry(exc=e, countdown=5 * (self.request.retries + 1))
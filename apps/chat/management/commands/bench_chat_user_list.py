@@ -0,0 +1,74 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.authentication.models import User
+from apps.chat.models import Chat, Message
+from apps.services.chat_dashboard import chat_users_with_unread, CHAT_USERS_PER_PAGE
+
+BENCH_PHONE_PREFIX = '+999'
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает старый подсчёт непрочитанных в списке чатов админки с агрегированным запросом'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help='Сколько пользователей с чатами создать')
+        parser.add_argument('--messages', type=int, default=5, help='Сообщений на пользователя')
+        parser.add_argument('--sample', type=int, default=500,
+                            help='На скольких пользователях мерить старый алгоритм (дальше экстраполяция)')
+        parser.add_argument('--cleanup', action='store_true', help='Удалить синтетических пользователей и выйти')
+
+    def handle(self, *args, **options):
+        if options['cleanup']:
+            deleted, _ = User.objects.filter(phone_number__startswith=BENCH_PHONE_PREFIX).delete()
+            self.stdout.write(f"Удалено объектов: {deleted}")
+            return
+        admin = User.objects.filter(is_superuser=True).first()
+        if options['seed']:
+            self.seed(admin, options['seed'], options['messages'])
+
+        total = User.objects.filter(is_superuser=False).count()
+        sample = list(User.objects.filter(is_superuser=False)[:options['sample']])
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for user in sample:
+                unread = 0
+                for chat in Chat.objects.filter(user=user):
+                    unread += Message.objects.filter(chat=chat, is_read=False).count()
+            elapsed = time.perf_counter() - started
+        scale = total / max(len(sample), 1)
+        self.stdout.write(
+            f"Старый алгоритм: {len(sample)} польз. за {elapsed:.2f} c, {len(queries)} запросов; "
+            f"на {total} польз. ≈ {elapsed * scale:.1f} c и ≈ {int(len(queries) * scale)} запросов"
+        )
+
+        for search in ('', '700'):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                page = Paginator(chat_users_with_unread(admin, search), CHAT_USERS_PER_PAGE).get_page(1)
+                counts = {user.id: user.unread_count for user in page.object_list}
+                elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"Новый запрос{f' (поиск {search!r})' if search else ''}: страница из {len(counts)} польз. "
+                f"за {elapsed * 1000:.1f} мс, {len(queries)} запроса(ов), всего {page.paginator.count}"
+            )
+
+    def seed(self, admin, count, messages_per_user, batch_size=5000):
+        # bulk_create не вызывает сигналы, поэтому синтетические пользователи не уходят в Firestore
+        for start in range(0, count, batch_size):
+            users = User.objects.bulk_create([
+                User(phone_number=f'{BENCH_PHONE_PREFIX}{index:09d}', full_name=f'Клиент {index}')
+                for index in range(start, min(start + batch_size, count))
+            ])
+            chats = Chat.objects.bulk_create([Chat(user=user, admin=admin) for user in users])
+            Message.objects.bulk_create([
+                Message(chat=chat, sender=chat.user, recipient=admin or chat.user, content='Здравствуйте',
+                        is_read=random.random() < 0.7)
+                for chat in chats for _ in range(messages_per_user)
+            ])
+            self.stdout.write(f"Создано {start + len(users)} из {count}")
@@ -32,3 +32,9 @@ class Message(models.Model):
     class Meta:
         verbose_name = _('Сообщения')
         verbose_name_plural = _("Сообщении")
+        indexes = [
+            # История чата листается по (timestamp, id) — диапазонное чтение индекса
+            models.Index(fields=['chat', 'timestamp', 'id'], name='chat_message_history_idx'),
+            # Непрочитанных мало, частичный индекс остаётся маленьким
+            models.Index(fields=['chat', 'sender'], condition=models.Q(is_read=False), name='chat_message_unread_idx'),
+        ]
@@ -1,60 +1,57 @@
-from django.db.models.signals import post_save
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
 from django.dispatch import receiver
 from django.conf import settings
-from firebase_admin import firestore
 
-from apps.authentication.models import User
 from apps.chat.models import Chat
+from apps.services.firestore_mirror import (
+    get_chat_admin_id,
+    record_user_sync,
+    reset_chat_admin_id,
+    user_firestore_data,
+    user_sync_fields_changed,
+    USER_SYNC_SKIPPED,
+)
 
+logger = logging.getLogger(__name__)
 
-@receiver(post_save, sender=settings.AUTH_USER_MODEL)
-def create_chat_with_admin(sender, instance, created, **kwargs):
-    # Подключаемся к Firestore
-    db = firestore.client()
 
-    # Данные пользователя для Firestore
-    user_data = {
-        'full_name': instance.full_name,
-        'phone_number': instance.phone_number
-    }
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def invalidate_chat_admin(sender, instance, **kwargs):
+    # Админ чатов кэшируется; сбрасываем, если изменился суперпользователь или сам закэшированный админ
+    if instance.is_superuser or instance.id == get_chat_admin_id():
+        reset_chat_admin_id()
 
-    # Добавляем или обновляем информацию о пользователе в Firestore
-    user_ref = db.collection('users').document(str(instance.id))
-    user_ref.set(user_data, merge=True)
 
-    if created:
-        # Логирование создания пользователя
-        print(f"Новый пользователь создан и добавлен в Firestore: {user_data}")
+@receiver(post_init, sender=settings.AUTH_USER_MODEL)
+def remember_firestore_data(sender, instance, **kwargs):
+    # Снимок полей, которые зеркалируются в Firestore, чтобы в post_save сравнить без запросов.
+    # Отложенные (.only/.defer) поля не читаем — иначе каждый объект сделал бы лишний запрос
+    instance._firestore_data = {field: instance.__dict__.get(field) for field in ('full_name', 'phone_number')}
+
 
-        # Находим администратора (можно выбрать первого суперпользователя)
-        admin = User.objects.filter(is_superuser=True).first()
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def create_chat_with_admin(sender, instance, created, update_fields=None, **kwargs):
+    from apps.chat.celery import sync_user_to_firestore
+
+    chat_id = None
+    if created:
+        # Находим администратора (первого суперпользователя)
+        admin_id = get_chat_admin_id()
 
         # Если админ существует и новый пользователь — это не сам админ
-        if admin and admin.id != instance.id:
-            # Проверяем, существует ли уже чат с этим пользователем и админом
-            existing_chat = Chat.objects.filter(user=instance, admin=admin).exists()
-
-            if not existing_chat:
-                # Создаем новый чат между пользователем и админом
-                new_chat = Chat.objects.create(user=instance, admin=admin)
-
-                # Логируем создание чата
-                print(f"Создан новый чат между пользователем {instance.full_name} и админом {admin.full_name}")
-
-                # Отправляем информацию о новом чате в Firestore
-                chat_data = {
-                    'user_id': instance.id,
-                    'admin_id': admin.id,
-                    'created_at': new_chat.created_at
-                }
-
-                # Добавляем или обновляем информацию о чате в Firestore
-                chat_ref = db.collection('chats').document(str(new_chat.id))
-                chat_ref.set(chat_data, merge=True)
-
-            else:
-                print(f"Чат уже существует между пользователем {instance.full_name} и админом {admin.full_name}")
-
-    else:
-        # Логирование обновления данных пользователя
-        print(f"Данные пользователя обновлены в Firestore: {user_data}")
+        if admin_id and admin_id != instance.id:
+            chat, chat_created = Chat.objects.get_or_create(user=instance, admin_id=admin_id)
+            if chat_created:
+                chat_id = chat.id
+                logger.info(f"Создан чат {chat.id} между пользователем {instance.id} и админом {admin_id}")
+
+    if not user_sync_fields_changed(instance, created, update_fields):
+        record_user_sync(USER_SYNC_SKIPPED)
+        return
+
+    instance._firestore_data = user_firestore_data(instance)
+    # Firestore обновляется воркером после коммита, сохранение пользователя его не ждёт
+    transaction.on_commit(lambda: sync_user_to_firestore.delay(instance.id, chat_id))
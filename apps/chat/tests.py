@@ -1,3 +1,173 @@
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.authentication.models import User
+from apps.chat.celery import mirror_chat_message, sync_user_to_firestore
+from apps.chat.models import Chat, Message
+from apps.services.chat_dashboard import chat_users_with_unread
+from apps.services.firestore_mirror import CHAT_ADMIN_CACHE_KEY, get_chat_admin_id, user_sync_stats
+
+
+def first_chat_id(user, admin):
+    return Chat.objects.filter(user=user, admin=admin).order_by('id').values_list('id', flat=True).first()
+
+
+class ChatUserListTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('+996700000000', password='admin', full_name='Админ')
+        self.first = User.objects.create_user('+996700000001', full_name='Айгуль')
+        self.second = User.objects.create_user('+996555000002', full_name='Бакыт')
+        first_chat = Chat.objects.filter(user=self.first, admin=self.admin).order_by('id').first()
+        for is_read in (False, False, True):
+            Message.objects.create(chat=first_chat, sender=self.first, recipient=self.admin, is_read=is_read)
+        Message.objects.create(chat=first_chat, sender=self.admin, recipient=self.first, is_read=False)
+
+    def test_unread_counts_and_chat_ids_in_one_query(self):
+        with self.assertNumQueries(1):
+            users = {user.id: user for user in chat_users_with_unread(self.admin)}
+
+        self.assertEqual(users[self.first.id].unread_count, 2)
+        self.assertEqual(users[self.second.id].unread_count, 0)
+        self.assertEqual(users[self.first.id].chat_id, first_chat_id(self.first, self.admin))
+        self.assertEqual(list(chat_users_with_unread(self.admin, '555')), [self.second])
+
+    def test_admin_chat_page_is_searchable_and_paginated(self):
+        self.client.force_login(self.admin)
+
+        response = self.client.get('/admin/chat/chat/', {'q': 'Айгуль', 'page': 1})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['users']), [self.first])
+        self.assertEqual(response.context['user_new_messages_count'], {self.first.id: 2})
+
+
+class SendMessageMirrorTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+        self.admin = User.objects.create_superuser('+996700000010', password='admin', full_name='Админ')
+        self.user = User.objects.create_user('+996700000011', full_name='Нурлан')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def send(self, content):
+        with mock.patch('apps.chat.api.views.mirror_chat_message') as task:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post('/api/v2/chat/chats/send/', {'content': content})
+        self.assertEqual(response.status_code, 201)
+        message = Message.objects.latest('id')
+        task.delay.assert_called_once_with(message.id)
+        # Задачу выполняем синхронно, как это сделал бы воркер
+        mirror_chat_message(message.id)
+
+    @mock.patch('apps.services.firestore_mirror.firestore.client')
+    def test_firestore_is_written_in_one_batch_after_commit(self, client):
+        batch = client.return_value.batch.return_value
+
+        # Сообщение пользователя адресовано его же чату: сообщение и один документ пользователя
+        self.send('Привет')
+        self.assertEqual(batch.set.call_count, 2)
+        batch.commit.assert_called_once()
+
+        # Имена не менялись — во второй раз пишется только сообщение
+        batch.reset_mock()
+        self.send('Ещё раз')
+        self.assertEqual(batch.set.call_count, 1)
+        batch.commit.assert_called_once()
+
+        batch.reset_mock()
+        self.user.full_name = 'Нурлан Б.'
+        self.user.save()
+        self.send('Сменил имя')
+        self.assertEqual(batch.set.call_count, 2)
+
+
+class ChatMessageHistoryTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('+996700000020', password='admin', full_name='Админ')
+        self.user = User.objects.create_user('+996700000021', full_name='Жылдыз')
+        self.chat = Chat.objects.filter(user=self.user, admin=self.admin).order_by('id').first()
+        self.messages = [Message.objects.create(chat=self.chat, sender=self.user, recipient=self.admin,
+                                                content=str(index)) for index in range(5)]
+        # Сообщения с одинаковым временем различаются по id
+        Message.objects.filter(id__in=[message.id for message in self.messages[1:4]]).update(
+            timestamp=self.messages[1].timestamp)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_history_pages_by_timestamp_and_id(self):
+        url = f'/api/v2/chat/chats/{self.chat.id}/messages/?page_size=2'
+        contents = []
+        while url:
+            with self.assertNumQueries(2):
+                data = self.client.get(url).json()
+            contents += [message['content'] for message in data['results']]
+            url = data['next']
+
+        self.assertEqual(contents, ['4', '3', '2', '1', '0'])
+
+    def test_foreign_chat_and_bad_cursor_are_not_found(self):
+        stranger = User.objects.create_user('+996700000022', full_name='Чужой')
+        self.client.force_authenticate(stranger)
+        self.assertEqual(self.client.get(f'/api/v2/chat/chats/{self.chat.id}/messages/').status_code, 404)
+
+        self.client.force_authenticate(self.user)
+        response = self.client.get(f'/api/v2/chat/chats/{self.chat.id}/messages/', {'cursor': 'broken'})
+        self.assertEqual(response.status_code, 404)
+
+
+class UserFirestoreSyncTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('+996700000030', password='admin', full_name='Админ')
+        cache.clear()
+
+    def saved_callbacks(self, save):
+        with self.captureOnCommitCallbacks() as callbacks:
+            save()
+        return len(callbacks)
+
+    @mock.patch('apps.services.firestore_mirror.firestore.client')
+    def test_sync_is_queued_only_for_mirrored_fields(self, client):
+        with mock.patch.object(sync_user_to_firestore, 'delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                user = User.objects.create_user('+996700000031', full_name='Эрмек')
+        delay.assert_called_once_with(user.id, first_chat_id(user, self.admin))
+        # Задачу выполняем синхронно, как это сделал бы воркер
+        sync_user_to_firestore(*delay.call_args.args)
+        batch = client.return_value.batch.return_value
+        self.assertEqual(batch.set.call_count, 2)
+        self.assertEqual(user_sync_stats(), {'skipped': 0, 'performed': 1})
+
+        user = User.objects.get(id=user.id)
+        user.bonus = 100
+        self.assertEqual(self.saved_callbacks(user.save), 0)
+        self.assertEqual(self.saved_callbacks(lambda: user.save(update_fields=['bonus'])), 0)
+
+        user.full_name = 'Эрмек А.'
+        self.assertEqual(self.saved_callbacks(user.save), 1)
+        # Следующее сохранение сравнивается уже с новым именем
+        self.assertEqual(self.saved_callbacks(user.save), 0)
+        self.assertEqual(user_sync_stats()['skipped'], 3)
+
+
+class ChatAdminCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('+996700000034', password='admin', full_name='Админ')
+
+    def test_admin_id_is_cached_only_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertEqual(get_chat_admin_id(), self.admin.id)
+        # Транзакция могла откатиться — до коммита в кэше ничего нет
+        self.assertIsNone(cache.get(CHAT_ADMIN_CACHE_KEY))
 
-# Create your tests here.
+        for callback in callbacks:
+            callback()
+        self.assertEqual(cache.get(CHAT_ADMIN_CACHE_KEY), self.admin.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_chat_admin_id(), self.admin.id)
@@ -1,7 +1,7 @@
 from django.urls import path
 from .views import (
     MainPageSiteView, ServiceFeatureView, StaticPageView,
-    PaymentMethodView, ProductView, SubProductView, ConvenientFunctionalityView
+    PaymentMethodView, ProductView, SubProductView, ConvenientFunctionalityView, LandingBundleView
 )
 
 urlpatterns = [
@@ -12,4 +12,5 @@ urlpatterns = [
     path('products/', ProductView.as_view(), name='products'),
     path('sub-products/', SubProductView.as_view(), name='sub-products'),
     path('convenient-functionalities/', ConvenientFunctionalityView.as_view(), name='convenient-functionalities'),
+    path('bundle/', LandingBundleView.as_view(), name='landing-bundle'),
 ]
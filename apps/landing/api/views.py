@@ -3,14 +3,25 @@ from drf_spectacular.utils import extend_schema
 from apps.landing.models import (
     MainPageSite, ServiceFeature, StaticPage, PaymentMethod, Product, SubProduct, ConvenientFunctionality
 )
+from apps.services.response_cache import cached_json_response, LANDING_CACHE
 from .serializers import (
     MainPageSiteSerializer, ServiceFeatureSerializer, StaticPageSerializer,
     PaymentMethodSerializer, ProductSerializer, SubProductSerializer, ConvenientFunctionalitySerializer
 )
 
+
+class LandingCacheMixin:
+    """Ответ собирается один раз на версию контента и язык, дальше отдаётся из кэша с ETag."""
+
+    def get(self, request, *args, **kwargs):
+        return cached_json_response(request, LANDING_CACHE, lambda: super(LandingCacheMixin, self).get(
+            request, *args, **kwargs
+        ).data, type(self).__name__, *kwargs.values())
+
+
 # MainPageSite View
-class MainPageSiteView(generics.ListAPIView):
-    queryset = MainPageSite.objects.all()
+class MainPageSiteView(LandingCacheMixin, generics.ListAPIView):
+    queryset = MainPageSite.objects.prefetch_related('paymentmethod_set')
     serializer_class = MainPageSiteSerializer
 
     @extend_schema(summary="Retrieve Main Page Site Info")
@@ -19,8 +30,8 @@ class MainPageSiteView(generics.ListAPIView):
 
 
 # ServiceFeature View with nested ServiceFeatureSteps
-class ServiceFeatureView(generics.ListAPIView):
-    queryset = ServiceFeature.objects.all()
+class ServiceFeatureView(LandingCacheMixin, generics.ListAPIView):
+    queryset = ServiceFeature.objects.prefetch_related('servicefeaturestep_set')
     serializer_class = ServiceFeatureSerializer
 
     @extend_schema(summary="Retrieve Service Features with Steps")
@@ -29,7 +40,7 @@ class ServiceFeatureView(generics.ListAPIView):
 
 
 # StaticPage View with slug-based retrieval
-class StaticPageView(generics.RetrieveAPIView):
+class StaticPageView(LandingCacheMixin, generics.RetrieveAPIView):
     queryset = StaticPage.objects.all()
     serializer_class = StaticPageSerializer
     lookup_field = 'slug'
@@ -40,7 +51,7 @@ class StaticPageView(generics.RetrieveAPIView):
 
 
 # PaymentMethod View
-class PaymentMethodView(generics.ListAPIView):
+class PaymentMethodView(LandingCacheMixin, generics.ListAPIView):
     queryset = PaymentMethod.objects.all()
     serializer_class = PaymentMethodSerializer
 
@@ -50,8 +61,8 @@ class PaymentMethodView(generics.ListAPIView):
 
 
 # Product View
-class ProductView(generics.ListAPIView):
-    queryset = Product.objects.all()
+class ProductView(LandingCacheMixin, generics.ListAPIView):
+    queryset = Product.objects.prefetch_related('subproducts')
     serializer_class = ProductSerializer
 
     @extend_schema(summary="Retrieve Products")
@@ -60,7 +71,7 @@ class ProductView(generics.ListAPIView):
 
 
 # SubProduct View
-class SubProductView(generics.ListAPIView):
+class SubProductView(LandingCacheMixin, generics.ListAPIView):
     queryset = SubProduct.objects.all()
     serializer_class = SubProductSerializer
 
@@ -70,10 +81,37 @@ class SubProductView(generics.ListAPIView):
 
 
 # ConvenientFunctionality View with nested ConvenientFunctionalityChapters
-class ConvenientFunctionalityView(generics.ListAPIView):
-    queryset = ConvenientFunctionality.objects.all()
+class ConvenientFunctionalityView(LandingCacheMixin, generics.ListAPIView):
+    queryset = ConvenientFunctionality.objects.prefetch_related('convenientfunctionalitychapter_set')
     serializer_class = ConvenientFunctionalitySerializer
 
     @extend_schema(summary="Retrieve Convenient Functionalities with Chapters")
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
+
+
+# Разделы лендинга в общем ответе: ключ -> списочный view, из которого берутся queryset и сериализатор
+LANDING_BUNDLE_SECTIONS = {
+    'main_page_site': MainPageSiteView,
+    'service_features': ServiceFeatureView,
+    'static_pages': StaticPageView,
+    'payment_methods': PaymentMethodView,
+    'products': ProductView,
+    'sub_products': SubProductView,
+    'convenient_functionalities': ConvenientFunctionalityView,
+}
+
+
+# Весь лендинг одним запросом
+class LandingBundleView(generics.GenericAPIView):
+
+    @extend_schema(summary="Retrieve the whole landing payload")
+    def get(self, request, *args, **kwargs):
+        return cached_json_response(request, LANDING_CACHE, lambda: self.get_payload(request), 'bundle')
+
+    def get_payload(self, request):
+        context = {'request': request}
+        return {
+            key: view.serializer_class(view.queryset.all(), many=True, context=context).data
+            for key, view in LANDING_BUNDLE_SECTIONS.items()
+        }
@@ -0,0 +1,30 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import (
+    MainPageSite,
+    ServiceFeature,
+    ServiceFeatureStep,
+    StaticPage,
+    ConvenientFunctionality,
+    ConvenientFunctionalityChapter,
+    PaymentMethod,
+    Product,
+    SubProduct,
+)
+from apps.services.response_cache import bump_cache_version, LANDING_CACHE
+
+
+@receiver([post_save, post_delete], sender=MainPageSite)
+@receiver([post_save, post_delete], sender=ServiceFeature)
+@receiver([post_save, post_delete], sender=ServiceFeatureStep)
+@receiver([post_save, post_delete], sender=StaticPage)
+@receiver([post_save, post_delete], sender=ConvenientFunctionality)
+@receiver([post_save, post_delete], sender=ConvenientFunctionalityChapter)
+@receiver([post_save, post_delete], sender=PaymentMethod)
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=SubProduct)
+def invalidate_landing(sender, **kwargs):
+    # После коммита: иначе параллельный запрос закэширует старые данные под новой версией
+    transaction.on_commit(lambda: bump_cache_version(LANDING_CACHE))
@@ -1,3 +1,36 @@
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from apps.landing.models import Product, SubProduct, StaticPage
+
+
+class LandingBundleTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        product = Product.objects.create(name='Приложение', image='site_icon/app.png')
+        SubProduct.objects.create(product=product, image='site_icon/sub.png', price=100, discounted_price=90,
+                                  link='https://example.com')
+        StaticPage.objects.create(title='Политика', description='Текст', slug='policy')
+
+    def test_bundle_contains_every_section_and_is_cached(self):
+        data = self.client.get('/api/v1/landing/bundle/').json()
+
+        self.assertEqual(set(data), {'main_page_site', 'service_features', 'static_pages', 'payment_methods',
+                                     'products', 'sub_products', 'convenient_functionalities'})
+        self.assertEqual(len(data['products'][0]['subproducts']), 1)
+        self.assertEqual(data['static_pages'][0]['slug'], 'policy')
+
+        with self.assertNumQueries(0):
+            self.client.get('/api/v1/landing/bundle/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            StaticPage.objects.create(title='Условия', description='Текст', slug='terms')
+            # До коммита в кэше остаётся прежний бандл
+            self.assertEqual(len(self.client.get('/api/v1/landing/bundle/').json()['static_pages']), 1)
+        self.assertEqual(len(self.client.get('/api/v1/landing/bundle/').json()['static_pages']), 2)
+
+    def test_section_views_use_the_same_cache(self):
+        self.assertEqual(self.client.get('/api/v1/landing/static-pages/slug/policy/').json()['title'], 'Политика')
+        self.assertEqual(self.client.get('/api/v1/landing/static-pages/slug/missing/').status_code, 404)
+        with self.assertNumQueries(0):
+            self.client.get('/api/v1/landing/static-pages/slug/policy/')
@@ -1,12 +1,22 @@
+import os
 from urllib.parse import quote
 
-from django.db.models import Count, Q
+from django.db import transaction
+from django.db.models import Count, DecimalField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.contrib import admin
-from django.urls import reverse
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404, redirect
+from django.urls import path, reverse
 from django.utils.html import format_html
 from unfold.admin import ModelAdmin, TabularInline
+from unfold.contrib.filters.admin import TextFilter
+from unfold.decorators import action
+from import_export import resources
 from import_export.admin import ImportExportModelAdmin
-from unfold.contrib.import_export.forms import ExportForm, ImportForm, SelectableFieldsExportForm
+from import_export.instance_loaders import CachedInstanceLoader
+from unfold.contrib.import_export.forms import ImportForm
 
 
 from .models import (
@@ -17,8 +27,10 @@ from .models import (
     DistancePricing,
     TelegramBotToken,
     PercentCashback,
-    Report, WhatsAppChat, PromoCode
+    Report, WhatsAppChat, PromoCode,
+    OrderExportJob
 )
+from apps.services.admin_paginator import EstimatedCountPaginator
 from apps.services.generate_message import generate_order_message
 
 
@@ -52,33 +64,173 @@ class OrderItemInline(TabularInline):
     exclude = ('topping',)
 
 
+ORDER_IMPORT_NOTICE = (
+    'Новые заказы создаются пачками как исторические: без пересчёта промокода, начисления бонусов, '
+    'возврата остатков и уведомлений сборщикам и курьерам. Изменения существующих заказов сохраняются '
+    'по одному со всеми этими действиями.'
+)
+
+
+class OrderResource(resources.ModelResource):
+    class Meta:
+        model = Order
+        # Новые строки — через bulk_create, существующие заказы подгружаются одним запросом на пачку
+        use_bulk = True
+        batch_size = 1000
+        chunk_size = 1000
+        instance_loader_class = CachedInstanceLoader
+        skip_diff = True
+
+    def save_instance(self, instance, is_create, row, **kwargs):
+        if is_create:
+            return super().save_instance(instance, is_create, row, **kwargs)
+        # bulk_update обошёл бы Order.save() и сигналы смены статуса (бонусы, остатки, уведомления)
+        self.before_save_instance(instance, row, **kwargs)
+        if self._is_using_transactions(kwargs) or not self._is_dry_run(kwargs):
+            self.do_instance_save(instance, is_create)
+        self.after_save_instance(instance, row, **kwargs)
+
+
+class OrderImportForm(ImportForm):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['import_file'].help_text = ORDER_IMPORT_NOTICE
+
+
+class StaffPhoneFilter(TextFilter):
+    """
+    Сотрудник по началу номера телефона вместо списка всех пользователей в фильтре.
+
+    Автокомплит-фильтра в unfold нет, поэтому текстовое поле; поиск по префиксу,
+    а не по подстроке, чтобы не сканировать пользователей на каждой странице.
+    """
+    field = None
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{f'{self.field}__phone_number__startswith': self.value().strip()})
+        return queryset
+
+
+class CourierPhoneFilter(StaffPhoneFilter):
+    title = 'Курьер'
+    parameter_name = 'courier_phone'
+    field = 'courier'
+
+
+class CollectorPhoneFilter(StaffPhoneFilter):
+    title = 'Сборщик'
+    parameter_name = 'collector_phone'
+    field = 'collector'
+
+
 @admin.register(Order)
 class OrderAdmin(ModelAdmin, ImportExportModelAdmin):
-    import_form_class = ImportForm
-    export_form_class = ExportForm
+    import_form_class = OrderImportForm
+    resource_classes = [OrderResource]
+    actions_list = ['start_export']
     list_display = (
-        'id', 'restaurant', 'delivery', 'order_time', 'total_amount', 'link_to_user', 'order_status', 'is_pickup',
-        'courier', 'collector'
+        'id', 'restaurant', 'delivery', 'order_time', 'items_total_display', 'link_to_user', 'order_status',
+        'is_pickup', 'courier', 'collector'
     )
+    list_select_related = ('restaurant', 'delivery__restaurant', 'delivery__user_address', 'user', 'courier',
+                           'collector')
     search_fields = ('user__phone_number', 'courier__phone_number', 'collector__phone_number')
-    list_filter = ('order_time', 'order_status', 'restaurant', 'is_pickup', 'courier', 'collector')
+    list_filter = ('order_time', 'order_status', 'restaurant', 'is_pickup', CourierPhoneFilter, CollectorPhoneFilter)
+    list_filter_submit = True
     list_display_links = ('id',)
     list_editable = ('order_status',)
     readonly_fields = ('user', 'delivery', 'order_source', 'id',)
+    autocomplete_fields = ('courier', 'collector')
     inlines = [OrderItemInline]
     exclude = ('promo_code', 'payment_id')
     list_per_page = 10
+    # Без фильтров таблица заказов не пересчитывается целиком: число строк берётся из статистики PostgreSQL
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
-    def total_amount(self, obj):
-        return obj.get_total_amount()
+    def get_queryset(self, request):
+        items_total = OrderItem.objects.filter(order=OuterRef('pk')).values('order').annotate(
+            total=Sum('total_amount')).values('total')
+        return super().get_queryset(request).annotate(
+            items_total=Coalesce(Subquery(items_total), Value(0), output_field=DecimalField()))
 
-    total_amount.short_description = 'Общая сумма'
+    # Не total_amount: поле модели с тем же именем admin показал бы вместо метода
+    def items_total_display(self, obj):
+        return obj.items_total
+
+    items_total_display.short_description = 'Общая сумма'
+    items_total_display.admin_order_field = 'items_total'
 
     def link_to_user(self, obj):
-        return format_html('<a href="{}">{}</a>', obj.user.get_admin_url() if obj.user else '', obj.user)
+        if obj.user_id is None:
+            return '-'
+        return format_html('<a href="{}">{}</a>', reverse('admin:authentication_user_change', args=[obj.user_id]),
+                           obj.user)
 
     link_to_user.short_description = 'Пользователь'
 
+    def has_export_permission(self, request):
+        # Синхронный экспорт import-export собирает весь queryset в памяти — выгрузка идёт через OrderExportJob
+        return False
+
+    @action(description='Экспорт заказов', url_path='start-export')
+    def start_export(self, request):
+        return redirect('admin:orders_orderexportjob_add')
+
+
+@admin.register(OrderExportJob)
+class OrderExportJobAdmin(ModelAdmin):
+    list_display = ('id', 'format', 'date_from', 'date_to', 'status', 'progress', 'download_link', 'created_by',
+                    'created_at')
+    list_filter = ('status', 'format')
+    fields = ('format', 'date_from', 'date_to', 'status', 'progress', 'download_link', 'error', 'created_by',
+              'created_at', 'finished_at')
+    readonly_fields = ('status', 'progress', 'download_link', 'error', 'created_by', 'created_at', 'finished_at')
+
+    def get_readonly_fields(self, request, obj=None):
+        if obj is not None:
+            return ('format', 'date_from', 'date_to') + self.readonly_fields
+        return self.readonly_fields
+
+    def get_urls(self):
+        return [
+            path('<path:object_id>/download/', self.admin_site.admin_view(self.download_view),
+                 name='orders_orderexportjob_download'),
+        ] + super().get_urls()
+
+    def download_view(self, request, object_id):
+        # Файл лежит в закрытом хранилище, отдаём его только тем, кто может смотреть выгрузки
+        job = get_object_or_404(OrderExportJob, pk=object_id)
+        if not self.has_view_permission(request, job):
+            raise PermissionDenied
+        if job.status != OrderExportJob.STATUS_DONE or not job.file:
+            raise Http404
+        return FileResponse(job.file.open('rb'), as_attachment=True, filename=os.path.basename(job.file.name))
+
+    def save_model(self, request, obj, form, change):
+        from apps.orders.celery import export_orders
+
+        if not change:
+            obj.created_by = request.user
+        super().save_model(request, obj, form, change)
+        if not change:
+            transaction.on_commit(lambda: export_orders.delay(obj.id))
+
+    def progress(self, obj):
+        if obj.total is None:
+            return '—'
+        return f"{obj.get_progress()}% ({obj.processed} из {obj.total})"
+
+    progress.short_description = 'Прогресс'
+
+    def download_link(self, obj):
+        if obj.status != OrderExportJob.STATUS_DONE or not obj.file:
+            return '—'
+        return format_html('<a href="{}">Скачать</a>', reverse('admin:orders_orderexportjob_download', args=[obj.pk]))
+
+    download_link.short_description = 'Файл'
+
 
 @admin.register(DistancePricing)
 class DistancePricingInline(ModelAdmin):
@@ -34,6 +34,7 @@ from apps.services.calculate_delivery_fee import calculate_delivery_fee
 from apps.services.calculate_distance import get_distance_between_locations
 from apps.services.generate_message import generate_order_message
 from apps.services.is_restaurant_open import is_restaurant_open
+from apps.services.rate_limit import ReportThrottle
 from apps.services.send_telegram_message import send_telegram_message
 from .serializers import (
     OrderSerializer,
@@ -347,6 +348,7 @@ class OrderPreviewView(generics.GenericAPIView):
 
 class ReportCreateView(generics.CreateAPIView):
     serializer_class = ReportSerializer
+    throttle_classes = [ReportThrottle]
 
     def create(self, request, *args, **kwargs):
         report, serializer = self.create_report(request)
@@ -376,36 +378,11 @@ class ReportCreateView(generics.CreateAPIView):
             print("Токен бота Telegram не настроен.")
             return
 
-        telegram_bot_token = bot_token_instance.bot_token
-        telegram_chat_ids = bot_token_instance.report_channels.split(',')
-
+        telegram_chat_ids = (bot_token_instance.report_channels or '').split(',')
         message = f"Новый репорт:\nОписание: {report.description}\nКонтактный номер: {report.contact_number}"
+        photos = [report.image.name] if report.image else None
 
-        self.send_report_to_chats(message, report, telegram_bot_token, telegram_chat_ids)
-
-    def send_report_to_chats(self, message, report, telegram_bot_token, telegram_chat_ids):
-        for chat_id in telegram_chat_ids:
-            chat_id = chat_id.strip()
-            message_url = f"https://api.telegram.org/bot{telegram_bot_token}/sendMessage"
-            photo_url = f"https://api.telegram.org/bot{telegram_bot_token}/sendPhoto"
-
-            message_payload = {
-                'chat_id': chat_id,
-                'text': message
-            }
-            response = requests.post(message_url, data=message_payload)
-            if response.status_code != 200:
-                print(f"Ошибка при отправке сообщения в чат {chat_id}: {response.text}")
-
-            if report.image:
-                with report.image.open('rb') as image_file:
-                    files = {'photo': image_file}
-                    photo_payload = {'chat_id': chat_id}
-                    response = requests.post(photo_url, data=photo_payload, files=files)
-                    if response.status_code == 200:
-                        print(f"Фотография отправлена в чат {chat_id}")
-                    else:
-                        print(f"Ошибка при отправке фотографии в чат {chat_id}: {response.text}")
+        send_telegram_message(bot_token_instance.bot_token, telegram_chat_ids, message, photos)
 
 
 class RestaurantListView(generics.ListAPIView):
@@ -1,7 +1,11 @@
 from celery import shared_task
-from .models import Order  # Предполагается, что ваша модель называется Order
+from django.utils import timezone
+
+from .models import Order, OrderExportJob  # Предполагается, что ваша модель называется Order
 from apps.orders.freedompay import check_freedompay_payment_status, cancel_freedompay_payment
 from .utils import deduct_bonuses_and_inventory
+from apps.services.order_export import run_order_export
+from apps.services.send_telegram_message import deliver_telegram_message
 
 from celery.exceptions import MaxRetriesExceededError
 
@@ -36,3 +40,21 @@ def check_order_payment_status(self, order_id):
             print(f"Ошибка при отмене платежа для заказа {order.id}.")
     except Exception as e:
         print(f"Произошла непредвиденная ошибка для заказа {order_id}: {e}")
+
+
+@shared_task(ignore_result=True)
+def send_telegram_messages(bot_token, chat_ids, message, photos=None):
+    deliver_telegram_message(bot_token, chat_ids, message, photos)
+
+
+@shared_task(ignore_result=True)
+def export_orders(job_id):
+    job = OrderExportJob.objects.filter(id=job_id, status=OrderExportJob.STATUS_PENDING).first()
+    if job is None:
+        return
+    try:
+        run_order_export(job)
+    except Exception as e:
+        OrderExportJob.objects.filter(id=job_id).update(status=OrderExportJob.STATUS_FAILED, error=str(e),
+                                                        finished_at=timezone.now())
+        raise
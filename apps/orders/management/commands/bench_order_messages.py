@@ -0,0 +1,55 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from apps.services.generate_message import render_order_message, ORDER_MESSAGE_TEMPLATES
+
+
+class Command(BaseCommand):
+    help = 'Замеряет скорость рендера текста заказа для Telegram на синтетических заказах'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=10000)
+        parser.add_argument('--items', type=int, default=5, help='Позиций в заказе')
+
+    def handle(self, *args, **options):
+        snapshots = [self.make_snapshot(order_id, options['items']) for order_id in range(1, options['orders'] + 1)]
+
+        for language in ORDER_MESSAGE_TEMPLATES:
+            started = time.perf_counter()
+            total_length = 0
+            for snapshot in snapshots:
+                total_length += len(render_order_message(snapshot, Decimal('2.5'), Decimal('150'), language))
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{language}: {len(snapshots)} заказов за {elapsed:.3f} c "
+                f"({elapsed / len(snapshots) * 1_000_000:.1f} мкс/заказ, {total_length} символов)"
+            )
+
+    def make_snapshot(self, order_id, items_count):
+        is_pickup = order_id % 4 == 0
+        return {
+            'id': order_id,
+            'user_name': 'Асан Усенов' if order_id % 3 else None,
+            'user_phone': '+996700123456',
+            'restaurant': 'Склад №1',
+            'is_pickup': is_pickup,
+            'payment_method': random.choice(['card', 'cash', 'online']),
+            'change': 5000,
+            'total_amount': Decimal('1250.00'),
+            'comment': 'Позвонить за 10 минут' if order_id % 2 else None,
+            'address': None if is_pickup else {
+                'city': 'Бишкек, Чуй 120', 'apartment_number': '15', 'entrance': '2',
+                'floor': '4', 'intercom': None, 'comment': 'Код 1234',
+            },
+            'items': [{
+                'name': f'Продукт {index}',
+                'size': '500.0 гр',
+                'quantity': index + 1,
+                'total_amount': Decimal('250.00'),
+                'is_bonus': index == 0,
+                'toppings': ['Сыр', 'Соус'] if index % 2 else [],
+            } for index in range(items_count)],
+        }
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.7 on 2026-10-19 19:20
+
+import apps.orders.models
+import apps.services.private_storage
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0026_alter_order_payment_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('format', models.CharField(choices=[('csv', 'CSV'), ('xlsx', 'XLSX')], default='csv', max_length=4, verbose_name='Формат')),
+                ('date_from', models.DateField(blank=True, null=True, verbose_name='С даты')),
+                ('date_to', models.DateField(blank=True, null=True, verbose_name='По дату')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('running', 'Выполняется'), ('done', 'Готово'), ('failed', 'Ошибка')], default='pending', max_length=10, verbose_name='Статус')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='Выгружено заказов')),
+                ('total', models.PositiveIntegerField(blank=True, null=True, verbose_name='Всего заказов')),
+                ('file', models.FileField(blank=True, storage=apps.services.private_storage.PrivateFileSystemStorage(), upload_to=apps.orders.models.order_export_upload_to, verbose_name='Файл')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата завершения')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='order_export_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+            ],
+            options={
+                'verbose_name': 'Выгрузка заказов',
+                'verbose_name_plural': 'Выгрузки заказов',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.7 on 2026-10-19 21:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0027_orderexportjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', '-order_time', '-id'], name='orders_order_user_time_idx'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 import random
+import secrets
 import string
 
 from decimal import Decimal
@@ -12,6 +13,7 @@ from django.core.validators import MinLengthValidator
 from apps.authentication.models import UserAddress, User
 from apps.pages.models import SingletonModel
 from apps.product.models import ProductSize, Topping  # Set,Ingredient
+from apps.services.private_storage import private_storage
 
 
 class WhatsAppChat(SingletonModel):
@@ -165,6 +167,10 @@ class Order(models.Model):
     class Meta:
         verbose_name = _("Заказ")
         verbose_name_plural = _("Заказы")
+        indexes = [
+            # История заказов пользователя в админке листается от новых к старым
+            models.Index(fields=['user', '-order_time', '-id'], name='orders_order_user_time_idx'),
+        ]
 
     def __str__(self):
         return f"Заказ #{self.id}"
@@ -316,3 +322,56 @@ class PromoCode(models.Model):
     class Meta:
         verbose_name = _("Промо Код")
         verbose_name_plural = _("Промо Коды")
+
+
+def order_export_upload_to(instance, filename):
+    # Случайный каталог: путь к выгрузке нельзя подобрать по номеру задачи
+    return f'exports/orders/{secrets.token_urlsafe(16)}/{filename}'
+
+
+class OrderExportJob(models.Model):
+    FORMAT_CSV = 'csv'
+    FORMAT_XLSX = 'xlsx'
+    FORMAT_CHOICES = [
+        (FORMAT_CSV, 'CSV'),
+        (FORMAT_XLSX, 'XLSX'),
+    ]
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, _('В очереди')),
+        (STATUS_RUNNING, _('Выполняется')),
+        (STATUS_DONE, _('Готово')),
+        (STATUS_FAILED, _('Ошибка')),
+    ]
+
+    format = models.CharField(max_length=4, choices=FORMAT_CHOICES, default=FORMAT_CSV, verbose_name=_('Формат'))
+    date_from = models.DateField(null=True, blank=True, verbose_name=_('С даты'))
+    date_to = models.DateField(null=True, blank=True, verbose_name=_('По дату'))
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING, verbose_name=_('Статус'))
+    processed = models.PositiveIntegerField(default=0, verbose_name=_('Выгружено заказов'))
+    total = models.PositiveIntegerField(null=True, blank=True, verbose_name=_('Всего заказов'))
+    file = models.FileField(upload_to=order_export_upload_to, storage=private_storage, blank=True,
+                            verbose_name=_('Файл'))
+    error = models.TextField(blank=True, verbose_name=_('Ошибка'))
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name='order_export_jobs', verbose_name=_('Автор'))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Дата создания'))
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Дата завершения'))
+
+    class Meta:
+        verbose_name = _("Выгрузка заказов")
+        verbose_name_plural = _("Выгрузки заказов")
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Выгрузка заказов № {self.id}"
+
+    def get_progress(self):
+        if self.status == self.STATUS_DONE:
+            return 100
+        if not self.total:
+            return 0
+        return min(100, self.processed * 100 // self.total)
@@ -1,3 +1,248 @@
-from django.test import TestCase
+import csv
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from tablib import Dataset
+
+from apps.authentication.models import User
+from apps.orders.admin import ORDER_IMPORT_NOTICE, OrderResource
+from apps.orders.models import Delivery, Order, OrderExportJob, OrderItem, Restaurant
+from apps.product.models import Category, Product, ProductSize, Topping
+from apps.services.generate_message import build_order_snapshot, render_order_message
+from apps.services.order_export import run_order_export
+from apps.services.send_telegram_message import CHAT_SEND_INTERVAL, TelegramDispatcher
+
+
+class OrderExportJobTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media_override = override_settings(PRIVATE_MEDIA_ROOT=self.media_root)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+        self.user = User.objects.create_user('+996700000080', full_name='Клиент')
+        restaurant = Restaurant.objects.create(name='Склад', address='Бишкек', latitude=42.87, longitude=74.59)
+        product = Product.objects.create(name='Пицца', category=Category.objects.create(name='export'))
+        size = ProductSize.objects.create(product=product, size='30 см', price=500, quantity=10)
+
+        self.orders = []
+        for items in (2, 0):
+            order = Order(restaurant=restaurant, user=self.user, total_amount=0)
+            order.save()
+            for _ in range(items):
+                OrderItem(order=order, product_size=size, quantity=1, total_amount=0).save()
+            self.orders.append(order)
+
+    def test_export_writes_order_items_to_file_with_progress(self):
+        job = OrderExportJob.objects.create(format=OrderExportJob.FORMAT_CSV)
+        run_order_export(job, progress_every=1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, OrderExportJob.STATUS_DONE)
+        self.assertEqual((job.processed, job.total, job.get_progress()), (2, 2, 100))
+        with job.file.open('rb') as export_file:
+            rows = list(csv.reader(export_file.read().decode('utf-8-sig').splitlines()))
+        self.assertEqual(rows[0][:2], ['ID заказа', 'Время заказа'])
+        self.assertEqual([row[0] for row in rows[1:]], [str(self.orders[0].id)] * 2 + [str(self.orders[1].id)])
+        self.assertEqual([row[14] for row in rows[1:]], ['Пицца', 'Пицца', ''])
+
+    def test_export_file_is_private_and_served_only_to_staff(self):
+        job = OrderExportJob.objects.create(format=OrderExportJob.FORMAT_CSV)
+        run_order_export(job)
+        job.refresh_from_db()
+
+        self.assertTrue(job.file.path.startswith(self.media_root))
+        self.assertNotEqual(job.file.name, f'exports/orders/orders_{job.pk}.csv')
+        with self.assertRaises(ValueError):
+            job.file.url
+
+        url = reverse('admin:orders_orderexportjob_download', args=[job.pk])
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.client.force_login(User.objects.create_superuser('+996700000081', password='admin', full_name='Админ'))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(f'orders_{job.pk}.csv', response['Content-Disposition'])
+        self.assertTrue(b''.join(response.streaming_content).decode('utf-8-sig').startswith('ID заказа'))
+
+
+class OrderImportTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('+996700000082', password='admin', full_name='Админ')
+        restaurant = Restaurant.objects.create(name='Склад', address='Бишкек', latitude=42.87, longitude=74.59)
+        self.order = Order(restaurant=restaurant, user=self.admin, total_amount=100)
+        self.order.save()
+
+    def test_new_rows_are_bulk_created_and_updates_go_through_save(self):
+        restaurant, user = self.order.restaurant_id, self.order.user_id
+        dataset = Dataset(headers=['id', 'restaurant', 'user', 'total_amount', 'order_status'])
+        dataset.append([self.order.pk, restaurant, user, '100', 'cancelled'])
+        dataset.append([self.order.pk + 1, restaurant, user, '250', 'completed'])
+
+        saved = mock.Mock()
+        post_save.connect(saved, sender=Order, weak=False)
+        self.addCleanup(post_save.disconnect, saved, sender=Order)
+        result = OrderResource().import_data(dataset, raise_errors=True)
+
+        self.assertFalse(result.has_errors())
+        self.assertEqual(Order.objects.count(), 2)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.order_status, 'cancelled')
+        # Сигналы получил только изменённый заказ, новая историческая строка создана пачкой
+        self.assertEqual([(call.kwargs['instance'].pk, call.kwargs['created']) for call in saved.call_args_list],
+                         [(self.order.pk, False)])
+
+    def test_import_form_warns_about_skipped_side_effects(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('admin:orders_order_import'))
+        self.assertContains(response, ORDER_IMPORT_NOTICE)
+
+
+class OrderAdminChangelistTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('+996700000090', password='secret', full_name='Админ')
+        self.client.force_login(self.admin)
+        self.restaurant = Restaurant.objects.create(name='Склад', address='Бишкек', latitude=42.87, longitude=74.59)
+        self.courier = User.objects.create_user('+996700000091', full_name='Курьер', role='delivery')
+        product = Product.objects.create(name='Пицца', category=Category.objects.create(name='admin'))
+        self.size = ProductSize.objects.create(product=product, size='30 см', price=500, quantity=10)
+        self.url = reverse('admin:orders_order_changelist')
+
+    def create_orders(self, count):
+        for index in range(count):
+            user = User.objects.create_user(f'+99670100{User.objects.count():04d}', full_name='Клиент')
+            delivery = Delivery.objects.create(restaurant=self.restaurant)
+            order = Order(restaurant=self.restaurant, delivery=delivery, user=user, courier=self.courier,
+                          collector=self.courier, total_amount=0)
+            order.save()
+            OrderItem(order=order, product_size=self.size, quantity=1, total_amount=0).save()
+            OrderItem(order=order, product_size=self.size, quantity=1, total_amount=0).save()
+
+    def count_queries(self, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        self.create_orders(2)
+        small, _ = self.count_queries()
+        self.create_orders(8)
+        large, response = self.count_queries()
+
+        self.assertEqual(large, small)
+        orders = response.context['cl'].result_list
+        self.assertEqual([order.items_total for order in orders], [order.get_total_amount() for order in orders])
+        self.assertEqual(orders[0].items_total, 1000)
+
+    def test_total_column_shows_items_sum_not_stored_total(self):
+        self.create_orders(1)
+        Order.objects.update(total_amount=1)
+        _, response = self.count_queries()
+
+        self.assertRegex(response.content.decode(), r'class="field-items_total_display[^"]*"[^>]*>1000</td>')
+
+    def test_courier_filter_matches_phone_prefix(self):
+        self.create_orders(2)
+        _, response = self.count_queries({'courier_phone': '+99670000009'})
+        self.assertEqual(response.context['cl'].result_count, 2)
+        # Подстрока из середины номера не ищется: только префикс, который может использовать индекс
+        _, response = self.count_queries({'courier_phone': '0000091'})
+        self.assertEqual(response.context['cl'].result_count, 0)
+
+
+class TelegramDispatcherTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=self.media_root)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+        self.photo = default_storage.save('orders/photo.jpg', ContentFile(b'photo-bytes'))
+
+        bot_patch = mock.patch('apps.services.send_telegram_message.Bot')
+        self.bot = bot_patch.start().return_value
+        self.addCleanup(bot_patch.stop)
+        self.bot.initialize = mock.AsyncMock()
+        self.bot.send_message = mock.AsyncMock()
+        uploaded = mock.Mock(photo=[mock.Mock(file_id='small'), mock.Mock(file_id='uploaded-file-id')])
+        self.bot.send_media_group = mock.AsyncMock(return_value=[uploaded])
+
+        sleep_patch = mock.patch('apps.services.send_telegram_message.asyncio.sleep', new_callable=mock.AsyncMock)
+        self.sleep = sleep_patch.start()
+        self.addCleanup(sleep_patch.stop)
+
+    def test_photos_are_uploaded_once_and_reused_by_file_id(self):
+        dispatcher = TelegramDispatcher()
+        dispatcher.deliver('token', ['1', '2', '3'], 'Новый заказ', [self.photo])
+        dispatcher._loop.close()
+
+        calls = self.bot.send_media_group.call_args_list
+        self.assertEqual([call.kwargs['chat_id'] for call in calls], ['1', '2', '3'])
+        self.assertNotIsInstance(calls[0].kwargs['media'][0].media, str)
+        self.assertEqual([call.kwargs['media'][0].media for call in calls[1:]], ['uploaded-file-id'] * 2)
+        self.assertEqual({call.kwargs['media'][0].caption for call in calls}, {'Новый заказ'})
+        self.bot.initialize.assert_awaited_once()
+
+    def test_messages_to_the_same_chat_are_spaced_out(self):
+        dispatcher = TelegramDispatcher()
+        dispatcher.deliver('token', ['1', '2'], 'Первое')
+        self.sleep.assert_not_awaited()
+
+        dispatcher.deliver('token', ['1'], 'Второе')
+        self.assertEqual(self.bot.send_message.await_count, 3)
+        dispatcher._loop.close()
+        self.sleep.assert_awaited_once()
+        self.assertAlmostEqual(self.sleep.await_args.args[0], CHAT_SEND_INTERVAL, delta=0.5)
+
+
+class OrderMessageTest(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('+996700000095', full_name='Айбек')
+        restaurant = Restaurant.objects.create(name='Склад', address='Бишкек', latitude=42.87, longitude=74.59)
+        category = Category.objects.create(name='message')
+        cheese = Topping.objects.create(name='Сыр', price=50)
+        self.order = Order(restaurant=restaurant, user=user, is_pickup=True, payment_method='cash', change=2000,
+                           total_amount=0, comment='Без лука')
+        self.order.save()
+        for name in ('Пицца', 'Бургер'):
+            size = ProductSize.objects.create(product=Product.objects.create(name=name, category=category),
+                                              price=500, quantity=10)
+            item = OrderItem(order=self.order, product_size=size, quantity=1, total_amount=0)
+            item.save()
+            item.topping.add(cheese)
+
+    def test_snapshot_query_count_and_rendering_in_all_languages(self):
+        order = Order.objects.get(pk=self.order.pk)
+        # Пользователь, склад, позиции, размеры, продукты и добавки — по запросу на связь, а не на позицию
+        with self.assertNumQueries(6):
+            snapshot = build_order_snapshot(order)
+
+        with self.assertNumQueries(0):
+            messages = {language: render_order_message(snapshot, language=language)
+                        for language in ('ru', 'ky', 'en')}
+
+        self.assertIn(f'Новый заказ #{order.id}', messages['ru'])
+        self.assertIn(f'Жаңы буйрутма #{order.id}', messages['ky'])
+        self.assertIn(f'New order #{order.id}', messages['en'])
+        for message in messages.values():
+            self.assertIn(': Пицца (', message)
+            self.assertIn(': Бургер (', message)
+            self.assertEqual(message.count(' - Сыр'), 2)
+        self.assertIn('Способ оплаты: Наличные', messages['ru'])
+        self.assertIn('Сдача: 1000.00 сом', messages['ru'])
+        self.assertIn('Payment method: Cash', messages['en'])
+        self.assertIn('Комментарий: Без лука', messages['ru'])
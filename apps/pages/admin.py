@@ -19,8 +19,8 @@ from apps.pages.models import (
     Stories,
     Story,
     PaymentSettings,
-    SMSSettings
-
+    SMSSettings,
+    SMSMessage,
 )
 
 
@@ -126,6 +126,16 @@ class PaymentSettingsAdmin(ModelAdmin):
 class SMSSettingsAdmin(ModelAdmin):
     list_display = ['login', 'sender']
 
+
+@admin.register(SMSMessage)
+class SMSMessageAdmin(ModelAdmin):
+    list_display = ['transaction_id', 'kind', 'status', 'provider_status', 'attempts', 'created_at', 'sent_at']
+    list_filter = ['status', 'kind']
+    search_fields = ['transaction_id']
+    # Текст с кодами подтверждения в админке не показываем
+    exclude = ['text']
+    readonly_fields = [field.name for field in SMSMessage._meta.fields if field.name != 'text']
+
 # class StoryInline(TabularInline):
 #     extra = 0
 #     model = Story
@@ -3,6 +3,7 @@ from rest_framework import serializers
 from apps.orders.api.views import payment_settings
 from apps.product.models import Category
 from apps.orders.models import PercentCashback
+from apps.services.image_variants import image_srcset
 from apps.pages.models import (
     Banner,
     OrderTypes,
@@ -28,10 +29,19 @@ class CategorySerializer(serializers.ModelSerializer):
 
 class BannerSerializer(serializers.ModelSerializer):
     link = serializers.SerializerMethodField()
+    image_desktop_srcset = serializers.SerializerMethodField()
+    image_mobile_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = Banner
-        fields = ['title', 'type', 'image_desktop', 'image_mobile', 'link', 'is_active', 'created_at']
+        fields = ['title', 'type', 'image_desktop', 'image_desktop_srcset', 'image_mobile', 'image_mobile_srcset',
+                  'link', 'is_active', 'created_at']
+
+    def get_image_desktop_srcset(self, obj):
+        return image_srcset(obj, 'image_desktop', self.context.get('request'))
+
+    def get_image_mobile_srcset(self, obj):
+        return image_srcset(obj, 'image_mobile', self.context.get('request'))
 
     def get_link(self, obj):
         if obj.type == 'category':
@@ -180,10 +190,14 @@ class LayOutSerializer(serializers.ModelSerializer):
 class StorySerializer(serializers.ModelSerializer):
 
     link = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = Story
-        fields = ['image', 'type', 'link', 'created_at',]
+        fields = ['image', 'image_srcset', 'type', 'link', 'created_at',]
+
+    def get_image_srcset(self, obj):
+        return image_srcset(obj, 'image', self.context.get('request'))
 
     def get_link(self, obj):
         if obj.type == 'category':
@@ -211,13 +225,20 @@ class StorySerializer(serializers.ModelSerializer):
 class StoriesSerializer(serializers.ModelSerializer):
     stories = StorySerializer(many=True, read_only=True)
     viewed = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = Stories
-        fields = '__all__'
+        fields = ['id', 'stories', 'viewed', 'title', 'image', 'image_srcset', 'is_active']
+
+    def get_image_srcset(self, obj):
+        return image_srcset(obj, 'image', self.context.get('request'))
 
     def get_viewed(self, obj):
         if self.context['request'].user.is_authenticated:
+            viewed_stories_ids = self.context.get('viewed_stories_ids')
+            if viewed_stories_ids is not None:
+                return obj.id in viewed_stories_ids
             return StoriesUserCheck.objects.filter(stories=obj, user=self.context['request'].user).exists()
         else:
             return False
@@ -1,5 +1,7 @@
 from django import forms
+from django.db.models import Prefetch
 from django.forms import Form
+from django.shortcuts import get_object_or_404
 from rest_framework import generics, status
 from rest_framework.generics import ListAPIView, CreateAPIView
 from rest_framework.response import Response
@@ -11,8 +13,10 @@ from apps.pages.models import (
     Contacts,
     StaticPage,
     Stories,
+    Story,
     StoriesUserCheck
 )
+from apps.services.response_cache import cached_json_response, PAGES_CACHE
 from apps.pages.api.serializers import (
     HomePageSerializer,
     ContactsSerializer,
@@ -29,12 +33,15 @@ class HomePageView(generics.GenericAPIView):
     serializer_class = HomePageSerializer
 
     def get(self, request, *args, **kwargs):
+        return cached_json_response(request, PAGES_CACHE, self.get_payload, 'home')
+
+    def get_payload(self):
         categories = Category.objects.all()
-        banners = Banner.objects.filter(is_active=True)
-        main_page = MainPage.objects.first()
+        banners = Banner.objects.filter(is_active=True).select_related('product', 'category')
+        main_page = MainPage.objects.prefetch_related('order_types', 'delivery_conditions', 'methods_of_payment').first()
 
         serializer = self.get_serializer({'categories': categories, 'banners': banners, 'main_page': main_page})
-        return Response(serializer.data)
+        return serializer.data
 
 
 class MetaDataView(generics.GenericAPIView):
@@ -51,9 +58,14 @@ class ContactsView(generics.GenericAPIView):
     serializer_class = ContactsSerializer
 
     def get(self, request, *args, **kwargs):
-        contacts = Contacts.objects.first()
+        return cached_json_response(request, PAGES_CACHE, self.get_payload, 'contacts')
+
+    def get_payload(self):
+        contacts = Contacts.objects.prefetch_related(
+            'phone_set', 'email_set', 'sociallink_set', 'address_set', 'paymentmethod_set'
+        ).first()
         serializer = self.get_serializer(contacts)
-        return Response(serializer.data)
+        return serializer.data
 
 
 class StaticPageDetailView(generics.RetrieveAPIView):
@@ -64,42 +76,11 @@ class StaticPageDetailView(generics.RetrieveAPIView):
     def get_serializer(self, *args, **kwargs):
         return StaticPageSerializer(*args, **kwargs, context={'request': self.request})
 
-    def get_object(self):
-        slug = self.kwargs['slug']
-        instance = None
-
-        try:
-            instance = StaticPage.objects.get(slug=slug)
-        except StaticPage.DoesNotExist:
-            if slug == 'about-us':
-                instance = StaticPage.objects.create(
-                    title='О нас',
-                    title_ru='О нас',
-                    title_ky='Биз жөнүндө',
-
-                    description='О нас',
-                    description_ru='О нас',
-                    description_ky='Биз жөнүндө',
-                    slug="about-us"
-                )
-            elif slug == 'delivery':
-                instance = StaticPage.objects.create(
-                    title='Доставка',
-                    title_ru='Доставка',
-                    title_ky='Доставка',
-
-                    description='Доставка',
-                    description_ru='Доставка',
-                    description_ky='Доставка',
-                    slug="delivery"
-                )
-
-        return instance
-
     def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        # Страницы по умолчанию создаются миграцией pages.0008; отсутствие страницы тоже кэшируется
+        slug = self.kwargs['slug']
+        return cached_json_response(request, PAGES_CACHE, lambda: self.get_serializer(self.get_object()).data,
+                                    'static-page', slug)
 
 
 class LayOutView(generics.ListAPIView):
@@ -115,10 +96,20 @@ class BannersView(ListAPIView):
 
 
 class StoriesView(ListAPIView):
-    queryset = Stories.objects.filter(is_active=True)
+    queryset = Stories.objects.filter(is_active=True).prefetch_related(
+        Prefetch('stories', queryset=Story.objects.filter(is_active=True).select_related('product', 'category')
+                 .order_by('created_at'))
+    )
 
     def get_serializer(self, *args, **kwargs):
-        return StoriesSerializer(*args, **kwargs, context={'request': self.request})
+        context = {'request': self.request}
+        if args and self.request.user.is_authenticated:
+            # Просмотренные группы одним запросом вместо exists() на каждую
+            stories_ids = [stories.id for stories in args[0]]
+            context['viewed_stories_ids'] = set(StoriesUserCheck.objects.filter(
+                user=self.request.user, stories_id__in=stories_ids
+            ).values_list('stories_id', flat=True))
+        return StoriesSerializer(*args, **kwargs, context=context)
 
 
 class StoriesViewedView(CreateAPIView):
@@ -127,9 +118,11 @@ class StoriesViewedView(CreateAPIView):
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-            stories = Stories.objects.get(id=serializer.validated_data['stories'])
+            stories = get_object_or_404(Stories, id=serializer.validated_data['stories'])
             user = request.user
-            StoriesUserCheck.objects.create(stories=stories, user=user)
-            return Response({"message": "Story checked successfully"}, status=status.HTTP_201_CREATED)
+            # Повторный просмотр не создаёт новую строку
+            _, created = StoriesUserCheck.objects.get_or_create(stories=stories, user=user)
+            return Response({"message": "Story checked successfully"},
+                            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,61 @@
+import logging
+
+from celery import shared_task
+from django.utils import timezone
+
+from apps.pages.models import SMSMessage
+from apps.services.sms_gateway import get_sms_gateway, SmsGatewayError, SMS_ACCEPTED
+
+logger = logging.getLogger(__name__)
+
+# Отчёт о доставке запрашиваем не сразу: операторам нужно время
+SMS_REPORT_DELAY = 60
+
+
+def mark_sms_failed(sms):
+    sms.status = SMSMessage.STATUS_FAILED
+    sms.text = ''
+    sms.save(update_fields=['status', 'attempts', 'text'])
+
+
+@shared_task(bind=True, max_retries=5, ignore_result=True)
+def send_sms_message(self, sms_id):
+    sms = SMSMessage.objects.filter(id=sms_id, status=SMSMessage.STATUS_QUEUED).first()
+    if sms is None:
+        return
+
+    sms.attempts += 1
+    try:
+        provider_status = get_sms_gateway().send(sms.transaction_id, sms.phones, sms.text)
+    except SmsGatewayError as e:
+        if self.request.retries >= self.max_retries:
+            mark_sms_failed(sms)
+            logger.error(f"SMS {sms.transaction_id} не отправлено: {e}")
+            return
+        sms.save(update_fields=['attempts'])
+        raise self.retry(exc=e, countdown=2 ** self.request.retries)
+    except Exception:
+        # Нет настроек SMS или ошибка в коде — повтор не поможет, а запись не должна навсегда остаться в очереди
+        mark_sms_failed(sms)
+        logger.exception(f"SMS {sms.transaction_id} не отправлено")
+        return
+
+    sms.provider_status = provider_status
+    sms.status = SMSMessage.STATUS_SENT if provider_status == SMS_ACCEPTED else SMSMessage.STATUS_FAILED
+    sms.sent_at = timezone.now()
+    sms.text = ''
+    sms.save(update_fields=['provider_status', 'status', 'sent_at', 'attempts', 'text'])
+    if sms.status == SMSMessage.STATUS_SENT:
+        check_sms_delivery.apply_async((sms.id,), countdown=SMS_REPORT_DELAY)
+
+
+@shared_task(bind=True, max_retries=3, ignore_result=True)
+def check_sms_delivery(self, sms_id):
+    sms = SMSMessage.objects.filter(id=sms_id).first()
+    if sms is None:
+        return
+    try:
+        sms.reports = get_sms_gateway().delivery_reports(sms.transaction_id)
+    except SmsGatewayError as e:
+        raise self.retry(exc=e, countdown=SMS_REPORT_DELAY)
+    sms.save(update_fields=['reports'])
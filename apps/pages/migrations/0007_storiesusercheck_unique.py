@@ -0,0 +1,28 @@
+# Generated by Django 5.0.7 on 2026-10-19 15:12
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_duplicate_checks(apps, schema_editor):
+    # Оставляем самую раннюю отметку просмотра для каждой пары пользователь/группа
+    StoriesUserCheck = apps.get_model('pages', 'StoriesUserCheck')
+    first_checks = StoriesUserCheck.objects.values('user', 'stories').annotate(first_id=Min('id')).values('first_id')
+    StoriesUserCheck.objects.exclude(id__in=first_checks).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0006_image_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_checks, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='storiesusercheck',
+            constraint=models.UniqueConstraint(fields=('user', 'stories'), name='unique_stories_user_check'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.7 on 2026-10-19 15:40
+
+from django.db import migrations
+
+DEFAULT_STATIC_PAGES = (
+    {'slug': 'about-us', 'title_ru': 'О нас', 'title_ky': 'Биз жөнүндө'},
+    {'slug': 'delivery', 'title_ru': 'Доставка', 'title_ky': 'Доставка'},
+)
+
+
+def create_default_static_pages(apps, schema_editor):
+    # Раньше эти страницы создавались прямо в GET-запросе StaticPageDetailView
+    StaticPage = apps.get_model('pages', 'StaticPage')
+    for page in DEFAULT_STATIC_PAGES:
+        StaticPage.objects.get_or_create(slug=page['slug'], defaults={
+            'title': page['title_ru'],
+            'title_ru': page['title_ru'],
+            'title_ky': page['title_ky'],
+            'description': page['title_ru'],
+            'description_ru': page['title_ru'],
+            'description_ky': page['title_ky'],
+        })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0007_storiesusercheck_unique'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_default_static_pages, migrations.RunPython.noop),
+    ]
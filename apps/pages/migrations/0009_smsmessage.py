@@ -0,0 +1,34 @@
+# Generated by Django 5.0.7 on 2026-10-19 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0008_seed_static_pages'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SMSMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_id', models.CharField(max_length=36, unique=True, verbose_name='ID транзакции')),
+                ('kind', models.CharField(default='otp', max_length=20, verbose_name='Тип')),
+                ('text', models.TextField(blank=True, verbose_name='Текст')),
+                ('phones', models.JSONField(default=list, verbose_name='Номера')),
+                ('status', models.CharField(choices=[('queued', 'В очереди'), ('sent', 'Принято шлюзом'), ('failed', 'Ошибка')], default='queued', max_length=10, verbose_name='Статус')),
+                ('provider_status', models.IntegerField(blank=True, null=True, verbose_name='Код ответа шлюза')),
+                ('reports', models.JSONField(blank=True, default=dict, verbose_name='Отчёты о доставке')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Попытки')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата отправки')),
+            ],
+            options={
+                'verbose_name': 'SMS-сообщение',
+                'verbose_name_plural': 'SMS-сообщения',
+                'indexes': [models.Index(fields=['status', 'created_at'], name='pages_sms_status_idx')],
+            },
+        ),
+    ]
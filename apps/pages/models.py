@@ -8,6 +8,7 @@ from ckeditor.fields import RichTextField
 
 from apps.authentication.models import User
 from apps.product.models import Product, Category
+from apps.services.image_variants import ImageVariantsMixin, DESKTOP_WIDTHS, MOBILE_WIDTHS, THUMBNAIL_WIDTHS
 
 
 class SingletonModel(models.Model):
@@ -118,7 +119,7 @@ class StaticPage(models.Model):
         super().save(*args, **kwargs)
 
 
-class Banner(models.Model):
+class Banner(ImageVariantsMixin, models.Model):
     TYPE_CHOICES = (
         ('category', 'Категория'),
         ('product', 'Продукт'),
@@ -133,6 +134,10 @@ class Banner(models.Model):
     image_mobile = models.ImageField(verbose_name="Картинка моб", upload_to="images/banners/mobile/%Y/%m/")
     is_active = models.BooleanField(verbose_name="Активный", default=True)
     created_at = models.DateTimeField(verbose_name="Дата создания", auto_now_add=True, blank=True, null=True)
+    image_desktop_variants = models.JSONField(default=dict, blank=True, editable=False)
+    image_mobile_variants = models.JSONField(default=dict, blank=True, editable=False)
+
+    IMAGE_VARIANTS = {'image_desktop': DESKTOP_WIDTHS, 'image_mobile': MOBILE_WIDTHS}
 
     class Meta:
         verbose_name = "Баннер"
@@ -248,10 +253,13 @@ class PaymentMethod(models.Model):
         verbose_name_plural = 'Ссылки для оплаты'
 
 
-class Stories(models.Model):
+class Stories(ImageVariantsMixin, models.Model):
     title = models.CharField(verbose_name="Заголовок", max_length=123, blank=True, null=True)
     image = models.ImageField(verbose_name="Изображение", upload_to="images/stories", blank=True, null=True)
     is_active = models.BooleanField(verbose_name="Активный", default=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+
+    IMAGE_VARIANTS = {'image': THUMBNAIL_WIDTHS}
 
     def __str__(self):
         return self.title
@@ -261,7 +269,7 @@ class Stories(models.Model):
         verbose_name_plural = "Группы историй"
 
 
-class Story(models.Model):
+class Story(ImageVariantsMixin, models.Model):
     stories = models.ForeignKey(Stories, on_delete=models.CASCADE, related_name='stories')
     image = models.ImageField(verbose_name="Изображение", upload_to="images/stories", blank=True, null=True)
     TYPE_CHOICES = (
@@ -276,6 +284,9 @@ class Story(models.Model):
 
     is_active = models.BooleanField(verbose_name="Активный", default=True)
     created_at = models.DateTimeField(verbose_name="Дата создания", auto_now_add=True, blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+
+    IMAGE_VARIANTS = {'image': MOBILE_WIDTHS}
 
     def clean(self):
         if self.type == 'category':
@@ -308,6 +319,11 @@ class StoriesUserCheck(models.Model):
     stories = models.ForeignKey(Stories, on_delete=models.CASCADE, related_name='stories_user_check')
     created_at = models.DateTimeField(verbose_name="Дата создания", auto_now_add=True, blank=True, null=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'stories'], name='unique_stories_user_check'),
+        ]
+
 
 class PaymentSettings(SingletonModel):
     paybox_url = models.URLField(verbose_name=_("FreedomPay Ссылка"))
@@ -334,3 +350,36 @@ class SMSSettings(SingletonModel):
 
     def __str__(self):
         return self.sender
+
+
+class SMSMessage(models.Model):
+    STATUS_QUEUED = 'queued'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, _('В очереди')),
+        (STATUS_SENT, _('Принято шлюзом')),
+        (STATUS_FAILED, _('Ошибка')),
+    ]
+
+    transaction_id = models.CharField(max_length=36, unique=True, verbose_name=_("ID транзакции"))
+    kind = models.CharField(max_length=20, default='otp', verbose_name=_("Тип"))
+    # В тексте бывают коды подтверждения: он хранится только до отправки и затирается воркером
+    text = models.TextField(blank=True, verbose_name=_("Текст"))
+    phones = models.JSONField(default=list, verbose_name=_("Номера"))
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED, verbose_name=_("Статус"))
+    provider_status = models.IntegerField(null=True, blank=True, verbose_name=_("Код ответа шлюза"))
+    reports = models.JSONField(default=dict, blank=True, verbose_name=_("Отчёты о доставке"))
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name=_("Попытки"))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Дата создания"))
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name=_("Дата отправки"))
+
+    class Meta:
+        verbose_name = _("SMS-сообщение")
+        verbose_name_plural = _("SMS-сообщения")
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='pages_sms_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"SMS {self.transaction_id} ({self.get_status_display()})"
@@ -0,0 +1,51 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from mptt.signals import node_moved
+
+from .models import (
+    Banner,
+    MainPage,
+    OrderTypes,
+    DeliveryConditions,
+    MethodsOfPayment,
+    Contacts,
+    Phone,
+    Email,
+    SocialLink,
+    Address,
+    PaymentMethod,
+    StaticPage,
+    SMSSettings,
+)
+from apps.orders.models import PercentCashback
+from apps.product.models import Category, Product
+from apps.services.response_cache import bump_cache_version, PAGES_CACHE
+from apps.services.sms_gateway import reset_sms_settings
+
+
+# Всё, что читают HomePageView и ContactsView; Product — из-за названий в ссылках баннеров
+@receiver([post_save, post_delete], sender=Banner)
+@receiver([post_save, post_delete], sender=MainPage)
+@receiver([post_save, post_delete], sender=OrderTypes)
+@receiver([post_save, post_delete], sender=DeliveryConditions)
+@receiver([post_save, post_delete], sender=MethodsOfPayment)
+@receiver([post_save, post_delete], sender=Contacts)
+@receiver([post_save, post_delete], sender=Phone)
+@receiver([post_save, post_delete], sender=Email)
+@receiver([post_save, post_delete], sender=SocialLink)
+@receiver([post_save, post_delete], sender=Address)
+@receiver([post_save, post_delete], sender=PaymentMethod)
+@receiver([post_save, post_delete], sender=StaticPage)
+@receiver([post_save, post_delete], sender=PercentCashback)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Product)
+@receiver(node_moved, sender=Category)
+def invalidate_pages(sender, **kwargs):
+    # После коммита: иначе параллельный запрос закэширует старые данные под новой версией
+    transaction.on_commit(lambda: bump_cache_version(PAGES_CACHE))
+
+
+@receiver([post_save, post_delete], sender=SMSSettings)
+def invalidate_sms_settings(sender, **kwargs):
+    reset_sms_settings()
@@ -1,3 +1,221 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+from xml.etree import ElementTree as ET
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APIClient
+
+from apps.authentication.models import User
+from apps.orders.models import PercentCashback
+from apps.pages.celery import check_sms_delivery, send_sms_message
+from apps.pages.models import Banner, Contacts, Phone, SMSMessage, SMSSettings, StaticPage, Stories, Story, StoriesUserCheck
+from apps.product.celery import generate_image_variants
+from apps.product.models import Category
+from apps.services.image_variants import build_image_variants, file_hash, image_srcset
+from apps.services.sms_gateway import FakeSmsGateway, NikitaSmsGateway, send_sms, SMS_BATCH_SIZE
+
+
+class StoriesViewTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('+996700000001', full_name='Тест')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_stories(self, count):
+        groups = []
+        for index in range(count):
+            stories = Stories.objects.create(title=f'Группа {index}')
+            Story.objects.create(stories=stories, type='link', link='https://example.com/2')
+            Story.objects.create(stories=stories, type='link', link='https://example.com/1', is_active=False)
+            groups.append(stories)
+        return groups
+
+    def fetch(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/pages/stories/')
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(queries)
+
+    def test_viewed_flags_are_resolved_in_one_query(self):
+        groups = self.create_stories(2)
+        StoriesUserCheck.objects.create(user=self.user, stories=groups[0])
+        data, small = self.fetch()
+        self.assertEqual({item['title']: item['viewed'] for item in data}, {'Группа 0': True, 'Группа 1': False})
+        self.assertEqual([len(item['stories']) for item in data], [1, 1])
+
+        self.create_stories(5)
+        _, large = self.fetch()
+        self.assertEqual(small, large)
+
+    def test_viewed_is_idempotent(self):
+        stories = self.create_stories(1)[0]
+
+        first = self.client.post('/api/v1/pages/stories/viewed/', {'stories': stories.id})
+        second = self.client.post('/api/v1/pages/stories/viewed/', {'stories': stories.id})
+
+        self.assertEqual((first.status_code, second.status_code), (201, 200))
+        self.assertEqual(StoriesUserCheck.objects.filter(user=self.user, stories=stories).count(), 1)
+        self.assertEqual(self.client.post('/api/v1/pages/stories/viewed/', {'stories': 0}).status_code, 404)
+
+
+class PagesCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        PercentCashback.objects.create(mobile_percent=5, web_percent=3, min_order_price=1000, bonus_to_use=50)
+        self.contacts = Contacts.objects.create()
+        Phone.objects.create(contacts=self.contacts, phone='+996700000000')
+
+    def test_contacts_are_served_from_cache_until_changed(self):
+        first = self.client.get('/api/v1/pages/contacts/')
+        self.assertEqual(first.json()['phones'], [{'phone': '+996700000000'}])
+
+        with self.assertNumQueries(0):
+            cached = self.client.get('/api/v1/pages/contacts/')
+        self.assertEqual(cached.content, first.content)
+
+        not_modified = self.client.get('/api/v1/pages/contacts/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Phone.objects.create(contacts=self.contacts, phone='+996555000000')
+            # До коммита версия прежняя, отдаётся старый снимок
+            self.assertEqual(self.client.get('/api/v1/pages/contacts/', HTTP_IF_NONE_MATCH=first['ETag']).status_code,
+                             304)
+        updated = self.client.get('/api/v1/pages/contacts/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(updated.status_code, 200)
+        self.assertEqual(len(updated.json()['phones']), 2)
+
+    def test_home_is_cached_per_language(self):
+        Category.objects.create(name_ru='Пицца', name_ky='Пицца ky', name_en='Pizza')
+
+        russian = self.client.get('/api/v1/pages/home/', HTTP_ACCEPT_LANGUAGE='ru').json()
+        english = self.client.get('/api/v1/pages/home/', HTTP_ACCEPT_LANGUAGE='en').json()
+
+        self.assertEqual(russian['categories'][0]['name'], 'Пицца')
+        self.assertEqual(english['categories'][0]['name'], 'Pizza')
+
+
+class StaticPageDetailTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_default_pages_are_seeded_and_get_does_not_write(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/pages/static-pages/about-us/')
+        self.assertEqual(response.json()['title'], 'О нас')
+        self.assertFalse([query for query in queries if not query['sql'].startswith('SELECT')])
+
+    def test_unknown_slug_is_cached_until_page_is_created(self):
+        self.assertEqual(self.client.get('/api/v1/pages/static-pages/unknown/').status_code, 404)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/v1/pages/static-pages/unknown/').status_code, 404)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            StaticPage.objects.create(title='Unknown', description='Текст', slug='unknown')
+        self.assertEqual(self.client.get('/api/v1/pages/static-pages/unknown/').status_code, 200)
+
+
+@override_settings(SMS_GATEWAY='apps.services.sms_gateway.FakeSmsGateway')
+class SmsDispatchTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        FakeSmsGateway.outbox.clear()
+        self.addCleanup(FakeSmsGateway.outbox.clear)
+        SMSSettings.objects.create(login='login', password='secret', sender='Koleso')
+
+    def test_broadcast_is_batched_and_sent_from_worker(self):
+        phones = [f'+996700{index:06d}' for index in range(SMS_BATCH_SIZE + 5)]
+        with mock.patch.object(send_sms_message, 'delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                messages = send_sms(phones, 'Акция', kind='broadcast')
+        self.assertEqual([len(sms.phones) for sms in messages], [SMS_BATCH_SIZE, 5])
+        self.assertEqual(FakeSmsGateway.outbox, [])
+        # В брокер уходит только id записи, текст ждёт воркер в базе
+        self.assertEqual([call.args for call in delay.call_args_list], [(sms.id,) for sms in messages])
+
+        with mock.patch.object(check_sms_delivery, 'apply_async') as apply_async:
+            for call in delay.call_args_list:
+                send_sms_message(*call.args)
+        self.assertEqual(apply_async.call_count, 2)
+        self.assertEqual([message['phones'] for message in FakeSmsGateway.outbox],
+                         [phones[:SMS_BATCH_SIZE], phones[SMS_BATCH_SIZE:]])
+        self.assertEqual({message['text'] for message in FakeSmsGateway.outbox}, {'Акция'})
+        self.assertFalse(SMSMessage.objects.exclude(text='').exists())
+
+        check_sms_delivery(messages[1].id)
+        sms = SMSMessage.objects.get(id=messages[1].id)
+        self.assertEqual(sms.status, SMSMessage.STATUS_SENT)
+        self.assertEqual(sms.reports, {phone: 'delivered' for phone in phones[SMS_BATCH_SIZE:]})
+
+    def test_unexpected_error_marks_message_failed(self):
+        with mock.patch.object(send_sms_message, 'delay'):
+            with self.captureOnCommitCallbacks(execute=True):
+                [sms] = send_sms(['+996700000001'], 'Код 1234')
+
+        # Так get_sms_gateway ведёт себя, когда настройки SMS не заполнены
+        with mock.patch('apps.pages.celery.get_sms_gateway', side_effect=ValueError('Нет настроек SMS')):
+            with self.assertLogs('apps.pages.celery', 'ERROR'):
+                send_sms_message(sms.id)
+        sms.refresh_from_db()
+        self.assertEqual((sms.status, sms.attempts, sms.text), (SMSMessage.STATUS_FAILED, 1, ''))
+
+    def test_gateway_sends_numbers_as_given_and_picks_up_rotated_credentials(self):
+        gateway = NikitaSmsGateway()
+        response = mock.Mock(status_code=200, content=b'<response><status>0</status></response>')
+        with mock.patch.object(gateway.session, 'post', return_value=response) as post:
+            gateway.send('first', ['+996700000001'], 'Текст')
+            sms_settings = SMSSettings.objects.get()
+            sms_settings.password = 'rotated'
+            sms_settings.save()
+            gateway.send('second', ['+996700000001'], 'Текст')
+
+        bodies = [ET.fromstring(call.kwargs['data']) for call in post.call_args_list]
+        self.assertEqual([body.findtext('phones/phone') for body in bodies], ['+996700000001'] * 2)
+        self.assertEqual([body.findtext('pwd') for body in bodies], ['secret', 'rotated'])
+
+
+class BannerImageVariantsTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=self.media_root)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+    def make_image(self, name):
+        buffer = BytesIO()
+        Image.new('RGB', (2000, 800), 'blue').save(buffer, format='JPEG')
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+    def test_variants_are_scheduled_per_changed_image_and_exposed_as_srcset(self):
+        with mock.patch.object(generate_image_variants, 'delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                banner = Banner.objects.create(type='link', link='https://example.com', title='Акция',
+                                               image_desktop=self.make_image('desktop.jpg'),
+                                               image_mobile=self.make_image('mobile.jpg'))
+        self.assertEqual(sorted(call.args[2] for call in delay.call_args_list), ['image_desktop', 'image_mobile'])
+        self.assertEqual(image_srcset(banner, 'image_mobile'), {})
+
+        build_image_variants(banner, 'image_mobile', file_hash(banner.image_mobile))
+        build_image_variants(banner, 'image_desktop', file_hash(banner.image_desktop))
+        # Картинки не менялись — повторно ничего не ставится в очередь
+        banner.title = 'Новая акция'
+        with mock.patch.object(generate_image_variants, 'delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                banner.save()
+        delay.assert_not_called()
+
+        srcset = image_srcset(banner, 'image_mobile')
+        self.assertEqual([candidate.rsplit(' ', 1)[1] for candidate in srcset['webp'].split(', ')],
+                         ['360w', '720w', '1080w'])
+
+        data = self.client.get('/api/v1/pages/banners/').json()
+        self.assertTrue(data[0]['image_mobile_srcset']['webp'].startswith('http://testserver/'))
+        self.assertIn('1920w', data[0]['image_desktop_srcset']['webp'])
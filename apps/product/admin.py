@@ -1,5 +1,6 @@
 from adminsortable2.admin import SortableAdminMixin
 from django.contrib import admin
+from django.db import transaction
 from django.utils.html import format_html
 from modeltranslation.admin import TranslationAdmin
 from unfold.admin import ModelAdmin, TabularInline
@@ -8,6 +9,7 @@ from modeltranslation.admin import TabbedTranslationAdmin
 from .models import Size, Category, Product, ProductSize, Topping, Tag, Article  # Set, Ingredient
 from .forms import ProductSizeForm, ProductAdminForm
 from mptt.admin import DraggableMPTTAdmin
+from apps.services.response_cache import bump_cache_version, CATALOG_CACHE
 
 
 class ExcludeBaseFieldsMixin:
@@ -74,6 +76,12 @@ class ProductAdmin(SortableAdminMixin, ExcludeBaseFieldsMixin, ModelAdmin, Tabbe
         }),
     )
 
+    def update_order(self, request):
+        # Сортировка перетаскиванием сохраняется через bulk_update, без сигналов post_save
+        response = super().update_order(request)
+        transaction.on_commit(lambda: bump_cache_version(CATALOG_CACHE))
+        return response
+
 
 # @admin.register(Article)
 # class ArticleAdmin(ExcludeBaseFieldsMixin, ModelAdmin, TabbedTranslationAdmin):
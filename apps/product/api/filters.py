@@ -1,12 +1,17 @@
 import django_filters
 
 from apps.product.models import Product
+from apps.services.product_search import search_products
 
 
 class ProductFilter(django_filters.FilterSet):
     id = django_filters.CharFilter(field_name='id')
-    name = django_filters.CharFilter(field_name='name', lookup_expr='icontains')
+    # Полнотекстовый поиск с префиксами и опечатками, результаты отсортированы по релевантности
+    name = django_filters.CharFilter(method='filter_name')
 
     class Meta:
         model = Product
         fields = ['id', 'name']
+
+    def filter_name(self, queryset, name, value):
+        return search_products(queryset, value)
@@ -8,6 +8,8 @@ from apps.product.models import (
 )  # Set, Ingredient
 from decimal import Decimal
 
+from apps.services.image_variants import image_variant_urls
+
 
 # class IngredientSerializer(serializers.ModelSerializer):
 #     class Meta:
@@ -49,6 +51,12 @@ class ProductSizeSerializer(serializers.ModelSerializer):
         return representation
 
 
+class ProductAutocompleteSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Product
+        fields = ['id', 'name']
+
+
 class ProductSerializer(serializers.ModelSerializer):
     # ingredients = IngredientSerializer(many=True)
     toppings = ToppingSerializer(many=True)
@@ -56,26 +64,29 @@ class ProductSerializer(serializers.ModelSerializer):
     product_sizes = ProductSizeSerializer(many=True)
     min_price = serializers.SerializerMethodField()
     bonus_price = serializers.SerializerMethodField()
+    in_stock = serializers.SerializerMethodField()
+    photo_variants = serializers.SerializerMethodField()
     category_slug = serializers.SerializerMethodField()
     category_name = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
-        fields = ['id', 'name', 'description', 'quantity', 'unit', 'photo', 'kkal', 'proteins', 'fats', 'carbohydrates',
-                  'composition', 'shelf_life', 'storage_conditions', 'manufacturer', 'tags', 'toppings',
-                  'min_price', 'bonus_price', 'bonuses', 'product_sizes', 'category_slug', 'category_name']
+        fields = ['id', 'name', 'description', 'quantity', 'unit', 'photo', 'photo_variants', 'kkal', 'proteins',
+                  'fats', 'carbohydrates', 'composition', 'shelf_life', 'storage_conditions', 'manufacturer', 'tags', 'toppings',
+                  'min_price', 'bonus_price', 'in_stock', 'bonuses', 'product_sizes', 'category_slug', 'category_name']
 
     def get_min_price(self, obj):
         return obj.get_min_price()
 
     def get_bonus_price(self, obj):
-        # Логика для вычисления bonus_price
-        # Предположим, что bonus_price - это минимальная бонусная цена среди всех размеров продукта
-        min_bonus_price = None
-        for size in obj.product_sizes.all():
-            if min_bonus_price is None or size.bonus_price < min_bonus_price:
-                min_bonus_price = size.bonus_price
-        return min_bonus_price
+        # Минимальная бонусная цена среди всех размеров продукта
+        return obj.get_min_bonus_price()
+
+    def get_in_stock(self, obj):
+        return obj.get_in_stock()
+
+    def get_photo_variants(self, obj):
+        return image_variant_urls(obj, 'photo', self.context.get('request'))
 
     def get_category_slug(self, obj):
         if obj.category:
@@ -152,8 +163,10 @@ class CategoryProductSerializer(serializers.ModelSerializer):
         model = Category
         fields = ['id', 'name', 'description', 'slug', 'image', 'products', 'children']  # 'sets']
     def get_children(self, obj):
-        if obj.children.exists():
-            return CategoryProductSerializer(obj.children.all(), many=True, context=self.context).data
+        # Для дерева из cache_tree_children дети уже в памяти и запроса не будет
+        children = obj.get_children()
+        if children:
+            return CategoryProductSerializer(children, many=True, context=self.context).data
         return []
 
 
@@ -165,8 +178,9 @@ class CategoryOnlySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'description', 'slug', 'image', 'children']
 
     def get_children(self, obj):
-        if obj.children.exists():
-            return CategoryOnlySerializer(obj.children.all(), many=True).data
+        children = obj.get_children()
+        if children:
+            return CategoryOnlySerializer(children, many=True, context=self.context).data
         return []
 
 class ProductSizeWithBonusSerializer(serializers.ModelSerializer):
@@ -200,12 +214,15 @@ class ProductDetailSerializer(serializers.ModelSerializer):
     product_sizes = serializers.SerializerMethodField()
     min_price = serializers.SerializerMethodField()
     bonus_price = serializers.SerializerMethodField()
+    in_stock = serializers.SerializerMethodField()
+    photo_variants = serializers.SerializerMethodField()
     category_slug = serializers.SerializerMethodField()
     category_name = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
-        fields = ['id', 'name', 'description', 'photo', 'tags', 'toppings', 'min_price', 'bonus_price', 'bonuses',
+        fields = ['id', 'name', 'description', 'photo', 'photo_variants', 'tags', 'toppings', 'min_price',
+                  'bonus_price', 'in_stock', 'bonuses',
                   'product_sizes', 'category_slug', 'category_name', 'kkal', 'proteins', 'fats', 'carbohydrates',
                   'composition', 'shelf_life', 'storage_conditions', 'manufacturer']  # добавлены новые поля
 
@@ -213,11 +230,13 @@ class ProductDetailSerializer(serializers.ModelSerializer):
         return obj.get_min_price()
 
     def get_bonus_price(self, obj):
-        min_bonus_price = None
-        for size in obj.product_sizes.all():
-            if min_bonus_price is None or size.bonus_price < min_bonus_price:
-                min_bonus_price = size.bonus_price
-        return min_bonus_price
+        return obj.get_min_bonus_price()
+
+    def get_in_stock(self, obj):
+        return obj.get_in_stock()
+
+    def get_photo_variants(self, obj):
+        return image_variant_urls(obj, 'photo', self.context.get('request'))
 
     def get_category_slug(self, obj):
         if obj.category:
@@ -230,6 +249,8 @@ class ProductDetailSerializer(serializers.ModelSerializer):
         return None
 
     def get_product_sizes(self, obj):
-        # Фильтруем product_sizes с количеством больше 0
-        product_sizes = obj.product_sizes.filter(quantity__gt=0)
+        # Фильтруем product_sizes с количеством больше 0; ProductDetailView загружает их заранее
+        product_sizes = getattr(obj, 'available_sizes', None)
+        if product_sizes is None:
+            product_sizes = obj.product_sizes.filter(quantity__gt=0)
         return ProductSizeSerializer(product_sizes, many=True).data
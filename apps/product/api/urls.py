@@ -6,6 +6,7 @@ from apps.product.api.views import (
     ProductListByCategorySlugView,
     CategoryListView,
     ProductSearchView,
+    ProductAutocompleteView,
     ProductBonusView,
     CategoryOnlyListView,
     PopularProducts,
@@ -15,6 +16,7 @@ from apps.product.api.views import (
 
 urlpatterns = [
           path('product/search/', ProductSearchView.as_view(), name='product-search'),
+          path('product/autocomplete/', ProductAutocompleteView.as_view(), name='product-autocomplete'),
           path('bonus/', ProductBonusView.as_view(), name='bonus-list'),
           path('category/<slug:slug>/', ProductListByCategorySlugView.as_view(), name='category'),
           path('categories/', CategoryListView.as_view(), name='category-list'),
@@ -1,12 +1,17 @@
+from django.db.models import Prefetch
 from django_filters.rest_framework import DjangoFilterBackend
+from mptt.utils import get_cached_trees
 from rest_framework import generics
 from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 
 from apps.product.api.filters import ProductFilter
 from apps.product.api.serializers import ProductSerializer, CategoryProductSerializer, \
-    CategoryOnlySerializer, ProductSizeWithBonusSerializer, ArticleSerializer, ProductDetailSerializer
+    CategoryOnlySerializer, ProductSizeWithBonusSerializer, ArticleSerializer, ProductDetailSerializer, \
+    ProductAutocompleteSerializer
 from apps.product.models import Category, Product, ProductSize, Article  # Set
+from apps.services.product_search import available_products, autocomplete_products
+from apps.services.response_cache import cached_json_response, CATALOG_CACHE
 
 
 class ProductSearchView(generics.ListAPIView):
@@ -17,8 +22,16 @@ class ProductSearchView(generics.ListAPIView):
 
     def get_queryset(self):
         # Получаем все продукты, у которых есть хотя бы один product_size с количеством больше 0
-        queryset = Product.objects.filter(is_active=True, product_sizes__quantity__gt=0).distinct()
-        return queryset
+        return (available_products().with_prices().select_related('category')
+                .prefetch_related('product_sizes', 'toppings', 'tags'))
+
+
+class ProductAutocompleteView(generics.ListAPIView):
+    serializer_class = ProductAutocompleteSerializer
+    pagination_class = None
+
+    def get_queryset(self):
+        return autocomplete_products(self.request.query_params.get('q', ''))
 
 
 class ProductBonusView(generics.ListAPIView):
@@ -32,6 +45,9 @@ class ProductBonusView(generics.ListAPIView):
 class ProductListByCategorySlugView(generics.ListAPIView):
     def get(self, request, *args, **kwargs):
         slug = self.kwargs['slug']
+        return cached_json_response(request, CATALOG_CACHE, lambda: self.get_payload(request, slug), 'category', slug)
+
+    def get_payload(self, request, slug):
         try:
             category = Category.objects.get(slug=slug)
         except Category.DoesNotExist:
@@ -41,16 +57,17 @@ class ProductListByCategorySlugView(generics.ListAPIView):
         if category.get_children().exists():
             raise NotFound("Продукты могут быть привязаны только к конечным категориям")
 
-        products = Product.objects.filter(category=category, product_sizes__isnull=False).distinct().order_by('order')
+        products = (Product.objects.with_prices().filter(category=category, min_price__isnull=False)
+                    .prefetch_related('product_sizes', 'toppings', 'tags').order_by('order'))
         # sets = Set.objects.filter(category=category)
 
         product_serializer = ProductSerializer(products, many=True, context={'request': request})
         # set_serializer = SetSerializer(sets, many=True, context={'request': request})
 
-        return Response({
+        return {
             'products': product_serializer.data,
             # 'sets': set_serializer.data
-        })
+        }
 
 
 # class SetListView(generics.ListAPIView):
@@ -64,20 +81,31 @@ class ProductListByCategorySlugView(generics.ListAPIView):
 #         )
 
 
+def get_category_forest(queryset=None):
+    """Загружает все деревья категорий одним запросом в порядке обхода и собирает их в памяти."""
+    if queryset is None:
+        queryset = Category.objects.all()
+    return get_cached_trees(queryset.order_by('tree_id', 'lft'))
+
+
 class CategoryListView(generics.ListAPIView):
     serializer_class = CategoryProductSerializer
 
     def get(self, request, *args, **kwargs):
-        categories = Category.objects.prefetch_related('products').filter(parent=None)
+        return cached_json_response(request, CATALOG_CACHE, lambda: self.get_payload(request), 'categories')
+
+    def get_payload(self, request):
+        products = Product.objects.with_prices().prefetch_related('product_sizes', 'toppings', 'tags')
+        categories = get_category_forest(Category.objects.prefetch_related(Prefetch('products', queryset=products)))
         serializer = CategoryProductSerializer(categories, many=True, context={'request': request})
-        return Response(serializer.data)
+        return serializer.data
 
 
 class CategoryOnlyListView(generics.ListAPIView):
     serializer_class = CategoryOnlySerializer
 
     def get(self, request, *args, **kwargs):
-        categories = Category.objects.filter(parent=None)
+        categories = get_category_forest()
         serializer = CategoryOnlySerializer(categories, many=True, context={'request': request})
         return Response(serializer.data)
 
@@ -86,7 +114,8 @@ class PopularProducts(generics.ListAPIView):
     serializer_class = ProductSerializer
 
     def get_queryset(self):
-        return Product.objects.filter(is_popular=True)
+        return (Product.objects.with_prices().filter(is_popular=True).select_related('category')
+                .prefetch_related('product_sizes', 'toppings', 'tags'))
 
 
 class ArticleListView(generics.ListAPIView):
@@ -99,6 +128,9 @@ class ArticleListView(generics.ListAPIView):
 
 
 class ProductDetailView(generics.RetrieveAPIView):
-    queryset = Product.objects.all()
+    queryset = Product.objects.with_prices().select_related('category').prefetch_related(
+        'toppings', 'tags',
+        Prefetch('product_sizes', queryset=ProductSize.objects.filter(quantity__gt=0), to_attr='available_sizes'),
+    )
     serializer_class = ProductDetailSerializer
     lookup_field = 'id'
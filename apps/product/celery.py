@@ -0,0 +1,13 @@
+from celery import shared_task
+from django.apps import apps
+
+from apps.services.image_variants import build_image_variants
+
+
+@shared_task(ignore_result=True)
+def generate_image_variants(model_label, pk, field_name, source_hash):
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        return
+    build_image_variants(instance, field_name, source_hash)
@@ -0,0 +1,80 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.product.models import Category, Product, ProductSize
+from apps.services.product_search import available_products, search_products, autocomplete_products
+
+BENCH_CATEGORY = 'bench-search'
+WORDS_RU = ['Пицца', 'Маргарита', 'Пепперони', 'Бургер', 'Шаурма', 'Лагман', 'Плов', 'Манты', 'Самса', 'Салат',
+            'Цезарь', 'Суп', 'Борщ', 'Чизкейк', 'Лимонад', 'Куриный', 'Острый', 'Сырный', 'Двойной', 'Большой']
+WORDS_KY = ['Пицца', 'Бургер', 'Шорпо', 'Лагман', 'Палоо', 'Манты', 'Самса', 'Салат', 'Тоок', 'Ачуу']
+WORDS_EN = ['Pizza', 'Margherita', 'Pepperoni', 'Burger', 'Shawarma', 'Soup', 'Salad', 'Chicken', 'Spicy', 'Cheese']
+COMPOSITION = ['сыр', 'томаты', 'курица', 'говядина', 'лук', 'тесто', 'соус', 'зелень', 'перец', 'грибы']
+TERMS = ['пицца', 'марг', 'пеперони', 'бургр', 'cheese', 'тоок', 'сыр']
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает старый поиск (icontains) с полнотекстовым на синтетическом каталоге (только PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help='Сколько продуктов создать перед замером')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--cleanup', action='store_true', help='Удалить синтетический каталог и выйти')
+
+    def handle(self, *args, **options):
+        if options['cleanup']:
+            Category.objects.filter(slug=BENCH_CATEGORY).delete()
+            self.stdout.write('Синтетический каталог удалён')
+            return
+        if options['seed']:
+            self.seed(options['seed'])
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE product_product')
+
+        for term in TERMS:
+            old = self.measure(lambda: list(
+                available_products().filter(name__icontains=term).values_list('id', flat=True)
+            ), options['repeat'])
+            new = self.measure(lambda: list(
+                search_products(available_products(), term).values_list('id', flat=True)
+            ), options['repeat'])
+            suggest = self.measure(lambda: list(
+                autocomplete_products(term).values_list('id', flat=True)
+            ), options['repeat'])
+            self.stdout.write(
+                f"{term!r}: icontains {old[0]:.2f} мс ({old[1]} шт.), "
+                f"поиск {new[0]:.2f} мс ({new[1]} шт.), подсказки {suggest[0]:.2f} мс"
+            )
+
+    def measure(self, run, repeat):
+        run()
+        started = time.perf_counter()
+        for _ in range(repeat):
+            found = run()
+        return (time.perf_counter() - started) / repeat * 1000, len(found)
+
+    def seed(self, count, batch_size=5000):
+        category, _ = Category.objects.get_or_create(slug=BENCH_CATEGORY, defaults={'name': BENCH_CATEGORY})
+        order = Product.objects.count()
+        for start in range(0, count, batch_size):
+            products = Product.objects.bulk_create([
+                Product(
+                    category=category,
+                    order=order + index,
+                    name_ru=' '.join(random.sample(WORDS_RU, 3)),
+                    name_ky=' '.join(random.sample(WORDS_KY, 2)),
+                    name_en=' '.join(random.sample(WORDS_EN, 2)),
+                    composition_ru=', '.join(random.sample(COMPOSITION, 4)),
+                    description_ru=' '.join(random.sample(WORDS_RU + COMPOSITION, 8)),
+                )
+                for index in range(start, min(start + batch_size, count))
+            ])
+            ProductSize.objects.bulk_create([
+                ProductSize(product=product, price=random.randint(100, 900), quantity=random.randint(0, 5))
+                for product in products
+            ])
+            self.stdout.write(f"Создано {start + len(products)} из {count}")
@@ -0,0 +1,61 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from apps.services.image_variants import build_image_variants, file_hash, variants_field_name
+
+
+def regenerate(model_label, pk, field_name, force):
+    """Выполняется в дочернем процессе: перечитывает запись и строит варианты, если они устарели."""
+    instance = apps.get_model(model_label).objects.filter(pk=pk).first()
+    if instance is None or not getattr(instance, field_name):
+        return 'skipped'
+    source_hash = file_hash(getattr(instance, field_name))
+    variants = getattr(instance, variants_field_name(field_name)) or {}
+    if not force and variants.get('hash') == source_hash and variants.get('sizes'):
+        return 'skipped'
+    if build_image_variants(instance, field_name, source_hash, overwrite=force) is None:
+        return 'failed'
+    return 'built'
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает адаптивные варианты картинок для всех моделей с IMAGE_VARIANTS в пуле процессов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('models', nargs='*', help='Например pages.Banner product.Product; по умолчанию все')
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+        parser.add_argument('--force', action='store_true', help='Перекодировать даже актуальные варианты')
+
+    def handle(self, *args, **options):
+        models = [model for model in apps.get_models() if hasattr(model, 'IMAGE_VARIANTS')]
+        if options['models']:
+            labels = {label.lower() for label in options['models']}
+            models = [model for model in models if model._meta.label_lower in labels]
+            if not models:
+                raise CommandError('Нет моделей с IMAGE_VARIANTS среди ' + ', '.join(options['models']))
+
+        jobs = []
+        for model in models:
+            for field_name in model.IMAGE_VARIANTS:
+                pks = model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+                jobs += [(model._meta.label, pk, field_name, options['force'])
+                         for pk in pks.values_list('pk', flat=True)]
+        self.stdout.write(f"Картинок к проверке: {len(jobs)}")
+
+        # Соединения не должны наследоваться дочерними процессами
+        connections.close_all()
+        results = {'built': 0, 'skipped': 0, 'failed': 0}
+        with ProcessPoolExecutor(max_workers=options['workers']) as executor:
+            futures = [executor.submit(regenerate, *job) for job in jobs]
+            for done, future in enumerate(as_completed(futures), 1):
+                results[future.result()] += 1
+                if done % 100 == 0:
+                    self.stdout.write(f"Обработано {done} из {len(jobs)}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Готово: построено {results['built']}, актуальных {results['skipped']}, ошибок {results['failed']}"
+        ))
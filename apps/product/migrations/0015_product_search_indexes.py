@@ -0,0 +1,33 @@
+# Generated by Django 5.0.7 on 2026-10-19 15:05
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0014_alter_product_quantity_alter_productsize_quantity'),
+    ]
+
+    operations = [
+        django.contrib.postgres.operations.TrigramExtension(),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('name_ru', 'name_ky', 'name_en', config='simple', weight='A'), '||', django.contrib.postgres.search.SearchVector('composition_ru', 'composition_ky', 'composition_en', config='simple', weight='B'), django.contrib.postgres.search.SearchConfig('simple')), '||', django.contrib.postgres.search.SearchVector('description_ru', 'description_ky', 'description_en', config='simple', weight='C'), django.contrib.postgres.search.SearchConfig('simple')), name='product_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name_ru'], name='product_name_ru_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name_ky'], name='product_name_ky_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name_en'], name='product_name_en_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
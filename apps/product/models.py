@@ -1,14 +1,17 @@
-from io import BytesIO
-from PIL import Image
 from colorfield.fields import ColorField
-from django.core.files.base import ContentFile
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
 from django.db import models
+from django.db.models import Exists, Min, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, NullIf
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import ValidationError
 from unidecode import unidecode
 from mptt.models import MPTTModel, TreeForeignKey
 
+from apps.services.image_variants import ImageVariantsMixin
+
 
 class Size(models.Model):
     name = models.CharField(max_length=50, verbose_name=_('Название'))
@@ -129,7 +132,36 @@ class ProductSize(models.Model):
         return unit_mapping.get(self.unit, self.unit)
 
 
-class Product(models.Model):
+# Полнотекстовый вектор по всем языковым колонкам modeltranslation. Конфигурация 'simple' —
+# для кыргызского словаря нет, а поиск по префиксу нужен для всех языков одинаково.
+# Выражение совпадает с индексом product_search_vector_idx, поэтому запросы по нему идут через GIN.
+PRODUCT_SEARCH_VECTOR = (
+    SearchVector('name_ru', 'name_ky', 'name_en', config='simple', weight='A')
+    + SearchVector('composition_ru', 'composition_ky', 'composition_en', config='simple', weight='B')
+    + SearchVector('description_ru', 'description_ky', 'description_en', config='simple', weight='C')
+)
+
+
+class ProductQuerySet(models.QuerySet):
+    def with_prices(self):
+        """
+        Минимальная цена, минимальная бонусная цена и наличие считаются в SQL.
+
+        Коррелированные подзапросы вместо JOIN + GROUP BY, поэтому аннотации
+        сочетаются с поиском, prefetch и фильтрами без дублей строк.
+        """
+        sizes = ProductSize.objects.filter(product=OuterRef('pk')).order_by().values('product')
+        return self.annotate(
+            # Скидка 0 считается "без скидки", как в get_min_price
+            min_price=Subquery(sizes.annotate(
+                value=Min(Coalesce(NullIf('discounted_price', Value(0, output_field=models.DecimalField())), 'price'))
+            ).values('value')),
+            min_bonus_price=Subquery(sizes.annotate(value=Min('bonus_price')).values('value')),
+            in_stock=Exists(ProductSize.objects.filter(product=OuterRef('pk'), quantity__gt=0)),
+        )
+
+
+class Product(ImageVariantsMixin, models.Model):
     is_popular = models.BooleanField(default=False, verbose_name=_('Популярный'))
     is_new = models.BooleanField(default=False, verbose_name=_('Новинка'))
     category = models.ForeignKey(Category, on_delete=models.CASCADE, verbose_name=_('Категория'),
@@ -154,10 +186,22 @@ class Product(models.Model):
     unit = models.CharField(max_length=5, choices=ProductSize.UNIT_CHOICES, verbose_name=_('Единица измерения'),
                             default='pcs')
 
+    photo_variants = models.JSONField(default=dict, blank=True, editable=False)
+
+    objects = ProductQuerySet.as_manager()
+
+    IMAGE_VARIANTS = {'photo': {'thumb': 160, 'list': 480, 'detail': 1080}}
+
     class Meta:
         verbose_name = "Продукт"
         verbose_name_plural = "Продукты"
         ordering = ['order']
+        indexes = [
+            GinIndex(PRODUCT_SEARCH_VECTOR, name='product_search_vector_idx'),
+            GinIndex(fields=['name_ru'], opclasses=['gin_trgm_ops'], name='product_name_ru_trgm_idx'),
+            GinIndex(fields=['name_ky'], opclasses=['gin_trgm_ops'], name='product_name_ky_trgm_idx'),
+            GinIndex(fields=['name_en'], opclasses=['gin_trgm_ops'], name='product_name_en_trgm_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -166,44 +210,22 @@ class Product(models.Model):
         return f"/admin/product/product/{self.id}/change/"
 
     def get_min_price(self):
+        # Для выборок через Product.objects.with_prices() значение уже посчитано в SQL
+        if 'min_price' in self.__dict__:
+            return self.min_price
         prices = [size.discounted_price if size.discounted_price else size.price for size in self.product_sizes.all()]
         return min(prices) if prices else None
 
-    def save(self, *args, **kwargs):
-        # Проверка на привязку к конечной категории
-        if self.category and self.category.get_children().exists():
-            raise ValueError(_('Продукты могут быть привязаны только к конечным категориям без подкатегорий'))
-
-        print(f"Saving Product: {self.name}, Quantity: {self.quantity}")
-
-        super().save(*args, **kwargs)
-
-    def save(self, *args, **kwargs):
-        if self.photo:
-            try:
-                image = Image.open(self.photo)
-
-                max_width = 800
-                max_height = 800
-
-                original_width, original_height = image.size
-                ratio = min(max_width / original_width, max_height / original_height)
-                new_width = int(original_width * ratio)
-                new_height = int(original_height * ratio)
-
-                resized_image = image.resize((new_width, new_height), Image.LANCZOS)
-
-                image_io = BytesIO()
-                # Устанавливаем имя файла без добавления дополнительных путей
-                new_filename = f"{slugify(self.name)}_{self.pk}.webp"
-                resized_image.save(image_io, format='WEBP', quality=85)
-
-                # Сохраняем файл с корректным именем и без лишних путей
-                self.photo.save(new_filename, ContentFile(image_io.getvalue()), save=False)
-            except:
-                print("Except")
+    def get_min_bonus_price(self):
+        if 'min_bonus_price' in self.__dict__:
+            return self.min_bonus_price
+        prices = [size.bonus_price for size in self.product_sizes.all()]
+        return min(prices) if prices else None
 
-        super().save(*args, **kwargs)
+    def get_in_stock(self):
+        if 'in_stock' in self.__dict__:
+            return self.in_stock
+        return any(size.quantity > 0 for size in self.product_sizes.all())
 
 
 class Topping(models.Model):
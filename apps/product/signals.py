@@ -0,0 +1,21 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from mptt.signals import node_moved
+
+from .models import Product, ProductSize, Category, Tag, Topping
+from apps.services.response_cache import bump_cache_version, CATALOG_CACHE
+
+
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=ProductSize)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Tag)
+@receiver([post_save, post_delete], sender=Topping)
+@receiver(m2m_changed, sender=Product.toppings.through)
+@receiver(m2m_changed, sender=Product.tags.through)
+@receiver(node_moved, sender=Category)
+def invalidate_catalog(sender, **kwargs):
+    # Каталог пересобирается при следующем запросе под новой версией; до коммита
+    # параллельный запрос сохранил бы под ней старые строки
+    transaction.on_commit(lambda: bump_cache_version(CATALOG_CACHE))
@@ -1,3 +1,203 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from PIL import Image
+
+from apps.product.celery import generate_image_variants
+from apps.product.models import Category, Product, ProductSize, Tag, Topping
+from apps.services.image_variants import build_image_variants, file_hash
+from apps.services.product_search import build_prefix_query
+from apps.services.response_cache import CATALOG_CACHE, bump_cache_version, get_cache_version
+
+
+class CategoryTreeQueryCountTest(TestCase):
+    def build_tree(self, prefix, roots, children, products):
+        tag = Tag.objects.create(name=f'{prefix}-tag')
+        topping = Topping.objects.create(name=f'{prefix}-topping', price=10)
+        for root_index in range(roots):
+            root = Category.objects.create(name=f'{prefix}-{root_index}')
+            for child_index in range(children):
+                child = Category.objects.create(name=f'{prefix}-{root_index}-{child_index}', parent=root)
+                leaf = Category.objects.create(name=f'{prefix}-{root_index}-{child_index}-leaf', parent=child)
+                for product_index in range(products):
+                    product = Product.objects.create(name=f'{leaf.name}-{product_index}', category=leaf)
+                    ProductSize.objects.create(product=product, price=100, quantity=1)
+                    product.tags.add(tag)
+                    product.toppings.add(topping)
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_category_tree_query_count_does_not_depend_on_tree_size(self):
+        self.build_tree('small', roots=1, children=1, products=1)
+        small_tree = self.count_queries('/api/v1/products/categories/')
+        small_only = self.count_queries('/api/v1/products/categories/only/')
+
+        self.build_tree('large', roots=4, children=3, products=3)
+        self.assertEqual(self.count_queries('/api/v1/products/categories/'), small_tree)
+        self.assertEqual(self.count_queries('/api/v1/products/categories/only/'), small_only)
+        self.assertEqual(small_only, 1)
+
+    def test_category_tree_keeps_nesting(self):
+        self.build_tree('tree', roots=2, children=2, products=1)
+        cache.clear()
+        data = self.client.get('/api/v1/products/categories/').json()
+
+        self.assertEqual([root['name'] for root in data], ['tree-0', 'tree-1'])
+        leaf = data[0]['children'][0]['children'][0]
+        self.assertEqual(leaf['name'], 'tree-0-0-leaf')
+        self.assertEqual(leaf['children'], [])
+        self.assertEqual([product['name'] for product in leaf['products']], ['tree-0-0-leaf-0'])
+        self.assertEqual(leaf['products'][0]['category_slug'], leaf['slug'])
+
+
+class ProductPriceAnnotationTest(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='prices')
+        self.product = Product.objects.create(name='Пицца', category=self.category)
+        ProductSize.objects.create(product=self.product, price=500, discounted_price=0, bonus_price=40, quantity=0)
+        ProductSize.objects.create(product=self.product, price=700, discounted_price=450, bonus_price=60, quantity=1)
+        ProductSize.objects.create(product=self.product, price=900, bonus_price=30, quantity=0)
+
+    def test_annotations_match_python_calculation(self):
+        annotated = Product.objects.with_prices().get(pk=self.product.pk)
+        plain = Product.objects.get(pk=self.product.pk)
+
+        self.assertEqual(annotated.min_price, plain.get_min_price())
+        self.assertEqual(annotated.min_price, 450)
+        self.assertEqual(annotated.get_min_bonus_price(), plain.get_min_bonus_price())
+        self.assertEqual(annotated.get_min_bonus_price(), 30)
+        self.assertTrue(annotated.in_stock)
+
+    def test_product_detail_uses_annotations(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(f'/api/v1/products/product/{self.product.pk}/').json()
+
+        self.assertEqual(len(queries), 4)
+        self.assertEqual(data['min_price'], 450)
+        self.assertEqual(data['bonus_price'], 30)
+        self.assertTrue(data['in_stock'])
+        self.assertEqual([size['price'] for size in data['product_sizes']], [700.0])
+
+
+class CatalogResponseCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Напитки')
+        self.product = Product.objects.create(name='Чай', category=self.category)
+        ProductSize.objects.create(product=self.product, price=100, quantity=1)
+        self.url = f'/api/v1/products/category/{self.category.slug}/'
+
+    def test_etag_and_last_modified_answer_not_modified(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+
+        with self.assertNumQueries(0):
+            by_etag = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(by_etag.status_code, 304)
+        self.assertEqual(by_etag.content, b'')
+        by_date = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(by_date.status_code, 304)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_missing_category_is_cached_until_catalog_changes(self):
+        url = '/api/v1/products/category/unknown/'
+        self.assertEqual(self.client.get(url).status_code, 404)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()['detail'], 'Категория не найдена')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name='Unknown', slug='unknown')
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_saving_a_product_bumps_the_version_and_rebuilds_the_response(self):
+        first = self.client.get(self.url)
+        version = get_cache_version(CATALOG_CACHE)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = 'Зелёный чай'
+            self.product.save()
+            # До коммита версия прежняя: иначе под ней закэшировались бы старые строки
+            self.assertEqual(get_cache_version(CATALOG_CACHE), version)
+
+        self.assertEqual(get_cache_version(CATALOG_CACHE), version + 1)
+        updated = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(updated.status_code, 200)
+        self.assertNotEqual(updated['ETag'], first['ETag'])
+        self.assertEqual([product['name'] for product in updated.json()['products']], ['Зелёный чай'])
+
+    def test_bumps_in_the_same_millisecond_get_distinct_versions(self):
+        version = get_cache_version(CATALOG_CACHE)
+        with mock.patch('apps.services.response_cache.time.time', return_value=1700000000.0):
+            bump_cache_version(CATALOG_CACHE)
+            bump_cache_version(CATALOG_CACHE)
+        self.assertEqual(get_cache_version(CATALOG_CACHE), version + 2)
+
+
+class ProductPhotoVariantsTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=self.media_root)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+        self.category = Category.objects.create(name='photos')
+
+    def make_photo(self, color='red'):
+        buffer = BytesIO()
+        Image.new('RGB', (2000, 1000), color).save(buffer, format='JPEG')
+        return SimpleUploadedFile('photo.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_variants_are_built_in_background_and_only_for_changed_photo(self):
+        with mock.patch.object(generate_image_variants, 'delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                product = Product.objects.create(name='Бургер', category=self.category, photo=self.make_photo())
+        self.assertEqual([call.args[2:] for call in delay.call_args_list], [('photo', file_hash(product.photo))])
+        self.assertEqual(product.photo_variants, {})
+
+        variants = build_image_variants(product, 'photo', file_hash(product.photo))
+        self.assertEqual({name: size['width'] for name, size in variants['sizes'].items()},
+                         {'thumb': 160, 'list': 480, 'detail': 1080})
+        for size in variants['sizes'].values():
+            self.assertTrue(product.photo.storage.exists(size['files']['webp']))
+
+        product.refresh_from_db()
+        with mock.patch.object(generate_image_variants, 'delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                product.name = 'Чизбургер'
+                product.save()
+        delay.assert_not_called()
+
+        data = self.client.get(f'/api/v1/products/product/{product.pk}/').json()
+        self.assertTrue(data['photo_variants']['thumb']['webp'].endswith('/160w.webp'))
+
+
+class ProductSearchQueryTest(TestCase):
+    hostile_term = "пиц&ца | !марг:*() 'o''brien"
+
+    def raw_query(self, term):
+        return build_prefix_query(term).get_source_expressions()[-1].value
+
+    def test_tsquery_operators_are_dropped_from_user_input(self):
+        self.assertEqual(self.raw_query(self.hostile_term), 'пиц:* & ца:* & марг:* & o:* & brien:*')
+        self.assertIsNone(build_prefix_query("&|!:*()'"))
+
+    @skipUnless(connection.vendor == 'postgresql', 'to_tsquery есть только в PostgreSQL')
+    def test_prefix_query_is_valid_tsquery(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_tsquery('simple', %s)::text", [self.raw_query(self.hostile_term)])
+            self.assertEqual(cursor.fetchone()[0], "'пиц':* & 'ца':* & 'марг':* & 'o':* & 'brien':*")
@@ -0,0 +1,39 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+# Ниже этого числа строк точный COUNT(*) дешёвый, оценке не доверяем
+EXACT_COUNT_THRESHOLD = 10000
+
+
+def estimated_table_count(queryset):
+    """
+    Оценка числа строк по статистике PostgreSQL (pg_class.reltuples).
+
+    Годится только для queryset без фильтров — иначе возвращает None,
+    как и для других СУБД или таблицы, по которой ещё не было ANALYZE.
+    """
+    if not isinstance(queryset, QuerySet) or queryset.query.where:
+        return None
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                       [connection.ops.quote_name(queryset.model._meta.db_table)])
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор админки: на больших таблицах без фильтров не делает COUNT(*) по всей таблице."""
+
+    @cached_property
+    def count(self):
+        estimate = estimated_table_count(self.object_list)
+        if estimate is None or estimate < EXACT_COUNT_THRESHOLD:
+            return super().count
+        return estimate
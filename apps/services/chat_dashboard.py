@@ -0,0 +1,26 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, OuterRef, Q, Subquery
+
+from apps.chat.models import Chat
+
+CHAT_USERS_PER_PAGE = 50
+
+
+def chat_users_with_unread(admin=None, search=None):
+    """
+    Пользователи для списка чатов админки одним запросом.
+
+    unread_count — непрочитанные сообщения от самого пользователя во всех его чатах,
+    chat_id — чат с админом, чтобы страница не запрашивала его отдельно для каждого пользователя.
+    Сначала идут пользователи с непрочитанными.
+    """
+    users = get_user_model().objects.filter(is_superuser=False)
+    if search:
+        users = users.filter(Q(full_name__icontains=search) | Q(phone_number__icontains=search))
+    return users.annotate(
+        unread_count=Count(
+            'chats__messages',
+            filter=Q(chats__messages__is_read=False, chats__messages__sender=F('pk')),
+        ),
+        chat_id=Subquery(Chat.objects.filter(user=OuterRef('pk'), admin=admin).order_by('id').values('id')[:1]),
+    ).order_by('-unread_count', '-id')
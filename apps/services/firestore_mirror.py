@@ -0,0 +1,130 @@
+import logging
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from firebase_admin import firestore
+
+logger = logging.getLogger(__name__)
+
+CHAT_ADMIN_CACHE_KEY = 'chat:admin_id'
+CHAT_ADMIN_CACHE_TIMEOUT = 60 * 60
+# Последние отправленные в Firestore данные пользователя; пока они не изменились, документ не перезаписываем
+FIRESTORE_USER_CACHE_KEY = 'firestore:user:{}'
+# Счётчики синхронизаций пользователя: сколько сохранений User обошлись без Firestore и сколько дошли до него
+USER_SYNC_METRIC_KEY = 'firestore:user_sync:{}'
+USER_SYNC_SKIPPED = 'skipped'
+USER_SYNC_PERFORMED = 'performed'
+
+
+def get_chat_admin_id():
+    """
+    id администратора, с которым создаются чаты (первый суперпользователь), из кэша.
+
+    В кэш id попадает только после коммита: значение, прочитанное в откатившейся
+    транзакции, могло бы ссылаться на несуществующего пользователя.
+    """
+    admin_id = cache.get(CHAT_ADMIN_CACHE_KEY)
+    if admin_id is None:
+        admin_id = get_user_model().objects.filter(is_superuser=True).values_list('id', flat=True).first()
+        if admin_id is not None:
+            transaction.on_commit(lambda: cache.set(CHAT_ADMIN_CACHE_KEY, admin_id, CHAT_ADMIN_CACHE_TIMEOUT))
+    return admin_id
+
+
+def reset_chat_admin_id():
+    # Второй сброс после коммита убирает id, который другой процесс успел закэшировать до него
+    cache.delete(CHAT_ADMIN_CACHE_KEY)
+    transaction.on_commit(lambda: cache.delete(CHAT_ADMIN_CACHE_KEY))
+
+
+def user_firestore_data(user):
+    return {
+        'full_name': user.full_name,
+        'phone_number': user.phone_number,
+    }
+
+
+def user_sync_fields_changed(user, created=False, update_fields=None):
+    """
+    Вызывается из post_save: нужна ли синхронизация пользователя с Firestore.
+
+    Сравнивает с данными, снятыми в post_init, так что вход в систему, бонусы
+    и смена last_order не доходят до Firestore.
+    """
+    if created:
+        return True
+    if update_fields is not None and not {'full_name', 'phone_number'} & set(update_fields):
+        return False
+    return getattr(user, '_firestore_data', None) != user_firestore_data(user)
+
+
+def record_user_sync(outcome):
+    key = USER_SYNC_METRIC_KEY.format(outcome)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def user_sync_stats():
+    keys = {USER_SYNC_METRIC_KEY.format(outcome): outcome for outcome in (USER_SYNC_SKIPPED, USER_SYNC_PERFORMED)}
+    values = cache.get_many(keys)
+    return {outcome: values.get(key, 0) for key, outcome in keys.items()}
+
+
+def add_user_upsert(batch, db, user):
+    """Добавляет в batch запись документа пользователя, только если имя или телефон изменились."""
+    user_data = user_firestore_data(user)
+    if cache.get(FIRESTORE_USER_CACHE_KEY.format(user.id)) == user_data:
+        return None
+    batch.set(db.collection('users').document(str(user.id)), user_data, merge=True)
+    return user_data
+
+
+def remember_user_upserts(users_data):
+    cache.set_many({FIRESTORE_USER_CACHE_KEY.format(user_id): data for user_id, data in users_data.items()}, None)
+
+
+def mirror_message(message):
+    """Сообщение и при необходимости документы отправителя/получателя уходят в Firestore одним WriteBatch."""
+    db = firestore.client()
+    batch = db.batch()
+
+    sender, recipient = message.sender, message.recipient
+    batch.set(db.collection('chats').document(str(message.chat_id)).collection('messages').document(), {
+        'sender_full_name': sender.full_name if sender.full_name else sender.phone_number,
+        'recipient_full_name': recipient.full_name if recipient.full_name else recipient.phone_number,
+        'sender_id': sender.id,
+        'recipient_id': recipient.id,
+        'content': message.content,
+        'image_url': message.image.url if message.image else None,
+        'timestamp': message.timestamp,
+    })
+
+    upserted = {}
+    for user in {sender.id: sender, recipient.id: recipient}.values():
+        user_data = add_user_upsert(batch, db, user)
+        if user_data is not None:
+            upserted[user.id] = user_data
+
+    batch.commit()
+    remember_user_upserts(upserted)
+
+
+def sync_user(user, chat=None):
+    """Документ пользователя и, для нового пользователя, документ его чата одним WriteBatch."""
+    db = firestore.client()
+    batch = db.batch()
+    user_data = user_firestore_data(user)
+    batch.set(db.collection('users').document(str(user.id)), user_data, merge=True)
+    if chat is not None:
+        batch.set(db.collection('chats').document(str(chat.id)), {
+            'user_id': chat.user_id,
+            'admin_id': chat.admin_id,
+            'created_at': chat.created_at,
+        }, merge=True)
+    batch.commit()
+    remember_user_upserts({user.id: user_data})
+    record_user_sync(USER_SYNC_PERFORMED)
@@ -1,97 +1,197 @@
-def generate_order_message(order, delivery_distance_km, delivery_fee):
-    if delivery_distance_km is None:
-        delivery_distance_km = 0
-    if order.is_pickup:
-        delivery_info = "Самовывоз"
-        delivery_fee_info = ""
-    else:
-        delivery_info = (
-            f"Расстояние доставки: {delivery_distance_km} км\n"
-            f"Стоимость доставки: {delivery_fee} сом\n"
-        )
-        delivery_fee_info = f"Стоимость доставки: {delivery_fee} сом\n"
-
-    payment_info = (
-        f"Способ оплаты: {order.get_payment_method_display()}\n"
-    )
-    if order.payment_method == 'cash':
-        payment_info += f"Сумма наличными: {order.change if order.change else 0} сом\n"
-        payment_info += f"Сдача: {order.change - order.total_amount if order.change else 0} сом\n"
-
-    message = (
-        f"Новый заказ #{order.id}\n"
-        f"Пользователь: {order.user.full_name if order.user and order.user.full_name else 'Имя не указано'}\n"
-        f"Номер: {order.user.phone_number if order.user and order.user.phone_number else 'Номер не указан'}\n"
-
-        f"Ресторан: {order.restaurant.name}\n"
-
-        "ЗАКАЗ:\n"
-        "===============\n"
-    )
-    message += "-----------------\n"
-
+from django.db.models import prefetch_related_objects
+
+# Связи, которые нужны для текста заказа. prefetch_related_objects пропускает уже загруженные,
+# поэтому заказ из queryset с этими select_related/prefetch_related не делает лишних запросов.
+ORDER_MESSAGE_RELATED = (
+    'user',
+    'restaurant',
+    'delivery__user_address',
+    'order_items__product_size__product',
+    'order_items__topping',
+)
+
+ORDER_MESSAGE_TEMPLATES = {
+    'ru': {
+        'header': "Новый заказ #{id}\nПользователь: {user_name}\nНомер: {user_phone}\nРесторан: {restaurant}\n"
+                  "ЗАКАЗ:\n===============\n-----------------\n",
+        'item': "Продукт: {name} ({size})\nКоличество: {quantity}\n",
+        'item_amount': "Сумма: {amount}\n",
+        'item_bonus': "БОНУСНЫЙ ПРОДУКТ\n",
+        'toppings': "Топинги:\n",
+        'topping': " - {name}\n",
+        'item_end': "-----------------\n",
+        'items_end': "===============\n",
+        'address': "Адрес: {value}\n",
+        'apartment': "Квартира: {value}\n",
+        'entrance': "Подъезд: {value}\n",
+        'floor': "Этаж: {value}\n",
+        'intercom': "Домофон: {value}\n",
+        'address_comment': "Комментарий: {value}\n",
+        'delivery': "Расстояние доставки: {distance} км\nСтоимость доставки: {fee} сом\n",
+        'payment': "Способ оплаты: {method}\n",
+        'cash': "Сумма наличными: {cash} сом\nСдача: {change} сом\n",
+        'footer': "Адрес доставки:\n{address}\n{delivery}\n{payment}\nОбщая сумма: {total}\n",
+        'comment': "Комментарий: {value}\n",
+        'pickup': "Самовывоз",
+        'no_name': "Имя не указано",
+        'no_phone': "Номер не указан",
+        'payment_methods': {'card': 'Карта', 'cash': 'Наличные', 'online': 'Онлайн'},
+    },
+    'ky': {
+        'header': "Жаңы буйрутма #{id}\nКолдонуучу: {user_name}\nНомер: {user_phone}\nРесторан: {restaurant}\n"
+                  "БУЙРУТМА:\n===============\n-----------------\n",
+        'item': "Продукт: {name} ({size})\nСаны: {quantity}\n",
+        'item_amount': "Суммасы: {amount}\n",
+        'item_bonus': "БОНУСТУК ПРОДУКТ\n",
+        'toppings': "Кошумчалар:\n",
+        'topping': " - {name}\n",
+        'item_end': "-----------------\n",
+        'items_end': "===============\n",
+        'address': "Дарек: {value}\n",
+        'apartment': "Батир: {value}\n",
+        'entrance': "Подъезд: {value}\n",
+        'floor': "Кабат: {value}\n",
+        'intercom': "Домофон: {value}\n",
+        'address_comment': "Комментарий: {value}\n",
+        'delivery': "Жеткирүү аралыгы: {distance} км\nЖеткирүү баасы: {fee} сом\n",
+        'payment': "Төлөм ыкмасы: {method}\n",
+        'cash': "Накталай сумма: {cash} сом\nКайтарым: {change} сом\n",
+        'footer': "Жеткирүү дареги:\n{address}\n{delivery}\n{payment}\nЖалпы сумма: {total}\n",
+        'comment': "Комментарий: {value}\n",
+        'pickup': "Өзү алып кетүү",
+        'no_name': "Аты көрсөтүлгөн эмес",
+        'no_phone': "Номер көрсөтүлгөн эмес",
+        'payment_methods': {'card': 'Карта', 'cash': 'Накталай', 'online': 'Онлайн'},
+    },
+    'en': {
+        'header': "New order #{id}\nCustomer: {user_name}\nPhone: {user_phone}\nRestaurant: {restaurant}\n"
+                  "ORDER:\n===============\n-----------------\n",
+        'item': "Product: {name} ({size})\nQuantity: {quantity}\n",
+        'item_amount': "Amount: {amount}\n",
+        'item_bonus': "BONUS PRODUCT\n",
+        'toppings': "Toppings:\n",
+        'topping': " - {name}\n",
+        'item_end': "-----------------\n",
+        'items_end': "===============\n",
+        'address': "Address: {value}\n",
+        'apartment': "Apartment: {value}\n",
+        'entrance': "Entrance: {value}\n",
+        'floor': "Floor: {value}\n",
+        'intercom': "Intercom: {value}\n",
+        'address_comment': "Comment: {value}\n",
+        'delivery': "Delivery distance: {distance} km\nDelivery fee: {fee} som\n",
+        'payment': "Payment method: {method}\n",
+        'cash': "Cash amount: {cash} som\nChange: {change} som\n",
+        'footer': "Delivery address:\n{address}\n{delivery}\n{payment}\nTotal: {total}\n",
+        'comment': "Comment: {value}\n",
+        'pickup': "Pickup",
+        'no_name': "Name not specified",
+        'no_phone': "Phone not specified",
+        'payment_methods': {'card': 'Card', 'cash': 'Cash', 'online': 'Online'},
+    },
+}
+
+# Строки шаблонов заменяются на связанные str.format, чтобы не искать метод при каждом рендере
+COMPILED_ORDER_MESSAGE_TEMPLATES = {
+    language: {key: value.format if isinstance(value, str) and '{' in value else value
+               for key, value in templates.items()}
+    for language, templates in ORDER_MESSAGE_TEMPLATES.items()
+}
+
+ADDRESS_FIELDS = ('apartment_number', 'entrance', 'floor', 'intercom', 'comment')
+ADDRESS_TEMPLATE_KEYS = ('apartment', 'entrance', 'floor', 'intercom', 'address_comment')
+
+
+def build_order_snapshot(order):
+    """Собирает из заказа всё, что нужно для сообщения, без обращений к базе при рендере."""
+    prefetch_related_objects([order], *ORDER_MESSAGE_RELATED)
+
+    user = order.user
+    user_address = order.delivery.user_address if order.delivery else None
+
+    items = []
     for item in order.order_items.all():
-        if item.product_size:
-            item_details = f"Продукт: {item.product_size.product.name} ({item.product_size.size})\n"
-        # else:
-            # item_details = f"Сет: {item.set.name}\n"
-
-        item_details += f"Количество: {item.quantity}\n"
-
-        if not item.is_bonus:
-            item_details += f"Сумма: {item.total_amount}\n"
+        product_size = item.product_size
+        items.append({
+            'name': product_size.product.name if product_size else '',
+            'size': product_size.size if product_size else '',
+            'quantity': item.quantity,
+            'total_amount': item.total_amount,
+            'is_bonus': item.is_bonus,
+            'toppings': [topping.name for topping in item.topping.all()],
+        })
+
+    return {
+        'id': order.id,
+        'user_name': user.full_name if user else None,
+        'user_phone': user.phone_number if user else None,
+        'restaurant': order.restaurant.name,
+        'is_pickup': order.is_pickup,
+        'payment_method': order.payment_method,
+        'change': order.change,
+        'total_amount': order.total_amount,
+        'comment': order.comment,
+        'address': {
+            'city': user_address.city,
+            **{field: getattr(user_address, field) for field in ADDRESS_FIELDS},
+        } if user_address else None,
+        'items': items,
+    }
+
+
+def render_order_message(snapshot, delivery_distance_km=None, delivery_fee=None, language='ru'):
+    templates = COMPILED_ORDER_MESSAGE_TEMPLATES.get(language) or COMPILED_ORDER_MESSAGE_TEMPLATES['ru']
+    parts = [templates['header'](
+        id=snapshot['id'],
+        user_name=snapshot['user_name'] or templates['no_name'],
+        user_phone=snapshot['user_phone'] or templates['no_phone'],
+        restaurant=snapshot['restaurant'],
+    )]
+    append = parts.append
+
+    for item in snapshot['items']:
+        append(templates['item'](name=item['name'], size=item['size'], quantity=item['quantity']))
+        if item['is_bonus']:
+            append(templates['item_bonus'])
         else:
-            item_details += f"БОНУСНЫЙ ПРОДУКТ\n"
-
-        if item.topping.exists():
-            item_details += "Топинги:\n"
-            for topping in item.topping.all():
-                item_details += f" - {topping.name}\n"
-
-        # if item.excluded_ingredient.exists():
-        #     item_details += "Исключенные ингредиенты:\n"
-        #     for ingredient in item.excluded_ingredient.all():
-        #         item_details += f" - {ingredient.name}\n"
-
-        message += item_details + "-----------------\n"
-    message += "===============\n"
-
-    user_address = order.delivery.user_address
-
-    address = (
-        f"Адрес: {user_address.city if user_address else 'Самовывоз'}\n"
-        # f"Адрес: {user_address.street} {user_address.house_number}\n"
-    )
-
-    if user_address and user_address.apartment_number:
-        address += f"Квартира: {user_address.apartment_number}\n"
-
-    if user_address and user_address and user_address.entrance:
-        address += f"Подъезд: {user_address.entrance}\n"
-
-    if user_address and user_address.floor:
-        address += f"Этаж: {user_address.floor}\n"
-
-    if user_address and user_address.intercom:
-        address += f"Домофон: {user_address.intercom}\n"
-
-    if user_address and user_address.comment:
-        address += f"Комментарий: {user_address.comment}\n"
+            append(templates['item_amount'](amount=item['total_amount']))
+        if item['toppings']:
+            append(templates['toppings'])
+            for topping in item['toppings']:
+                append(templates['topping'](name=topping))
+        append(templates['item_end'])
+    append(templates['items_end'])
+
+    address = ''
+    if not snapshot['is_pickup']:
+        user_address = snapshot['address']
+        address_parts = [templates['address'](value=user_address['city'] if user_address else templates['pickup'])]
+        if user_address:
+            for field, key in zip(ADDRESS_FIELDS, ADDRESS_TEMPLATE_KEYS):
+                if user_address[field]:
+                    address_parts.append(templates[key](value=user_address[field]))
+        address = ''.join(address_parts)
+
+    if snapshot['is_pickup']:
+        delivery = templates['pickup']
+    else:
+        delivery = templates['delivery'](distance=delivery_distance_km or 0, fee=delivery_fee)
 
+    payment_method = snapshot['payment_method']
+    payment = templates['payment'](method=templates['payment_methods'].get(payment_method, payment_method))
+    if payment_method == 'cash':
+        change = snapshot['change']
+        payment += templates['cash'](cash=change or 0, change=change - snapshot['total_amount'] if change else 0)
 
-    message += (
-        f"Адрес доставки:\n{address if not order.is_pickup else ''}\n"
-        # f"Статус: {order.get_order_status_display()}\n \n"
-        f"{delivery_info}\n"
-        f"{payment_info}\n"
-        f"Общая сумма: {order.total_amount}\n"
+    append(templates['footer'](address=address, delivery=delivery, payment=payment, total=snapshot['total_amount']))
+    if snapshot['comment']:
+        append(templates['comment'](value=snapshot['comment']))
 
-    )
-    if order.comment:
-        message += f"Комментарий: {order.comment}\n"
+    return ''.join(parts)
 
-    return message
 
+def generate_order_message(order, delivery_distance_km, delivery_fee, language='ru'):
+    return render_order_message(build_order_snapshot(order), delivery_distance_km, delivery_fee, language)
 
 
 def format_order_status_change_message(order_date, order_id, order_status):
@@ -0,0 +1,182 @@
+import hashlib
+import logging
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps
+
+try:
+    import pillow_avif  # noqa: F401 — регистрирует AVIF в Pillow, без плагина отдаём только WEBP
+except ImportError:
+    pillow_avif = None
+
+logger = logging.getLogger(__name__)
+
+# Производные складываются по хэшу содержимого: повторная загрузка того же файла ничего не пересчитывает
+VARIANTS_ROOT = 'variants'
+VARIANT_FORMATS = (
+    ('webp', 'WEBP', {'quality': 82, 'method': 6}),
+    ('avif', 'AVIF', {'quality': 60}),
+)
+
+
+def width_buckets(*widths):
+    """Набор ширин для адаптивных картинок: {'360w': 360, ...}, ключи совпадают с дескрипторами srcset."""
+    return {f'{width}w': width for width in widths}
+
+
+# Ширины для баннеров и историй — под типичные экраны телефонов и десктопа с плотностью 1x–3x
+MOBILE_WIDTHS = width_buckets(360, 720, 1080)
+DESKTOP_WIDTHS = width_buckets(640, 1280, 1920)
+THUMBNAIL_WIDTHS = width_buckets(160, 320)
+
+
+def variants_field_name(field_name):
+    return f'{field_name}_variants'
+
+
+def get_variant_formats():
+    Image.init()
+    return [variant_format for variant_format in VARIANT_FORMATS if variant_format[1] in Image.SAVE]
+
+
+def file_hash(field_file):
+    digest = hashlib.sha256()
+    for chunk in field_file.chunks():
+        digest.update(chunk)
+    field_file.seek(0)
+    return digest.hexdigest()
+
+
+def changed_image_fields(instance, update_fields=None):
+    """
+    Вызывается в save() до записи: возвращает {поле: хэш} для изменившихся картинок.
+
+    Неизменённый файл не читается — сравнивается только имя с тем, из которого строились производные.
+    """
+    changed = {}
+    for field_name in instance.IMAGE_VARIANTS:
+        if update_fields is not None and field_name not in update_fields:
+            continue
+        field_file = getattr(instance, field_name)
+        variants_field = variants_field_name(field_name)
+        variants = getattr(instance, variants_field) or {}
+        if not field_file:
+            if variants:
+                setattr(instance, variants_field, {})
+            continue
+        if field_file._committed and variants.get('source') == field_file.name:
+            continue
+        changed[field_name] = file_hash(field_file)
+    return changed
+
+
+def schedule_image_variants(instance, changed):
+    """Вызывается в save() после записи: ставит генерацию производных в очередь после коммита."""
+    from apps.product.celery import generate_image_variants
+
+    model_label = instance._meta.label
+    for field_name, source_hash in changed.items():
+        variants_field = variants_field_name(field_name)
+        variants = getattr(instance, variants_field) or {}
+        if variants.get('hash') == source_hash:
+            # То же содержимое под новым именем — производные уже есть
+            variants = {**variants, 'source': getattr(instance, field_name).name}
+            setattr(instance, variants_field, variants)
+            type(instance).objects.filter(pk=instance.pk).update(**{variants_field: variants})
+            continue
+        transaction.on_commit(lambda field_name=field_name, source_hash=source_hash: generate_image_variants.delay(
+            model_label, instance.pk, field_name, source_hash
+        ))
+
+
+class ImageVariantsMixin:
+    """
+    Для моделей с IMAGE_VARIANTS = {поле: ширины} и JSON-полями <поле>_variants.
+
+    Адаптивные варианты картинок строятся в Celery после коммита и только если файл изменился.
+    """
+
+    def save(self, *args, **kwargs):
+        changed = changed_image_fields(self, kwargs.get('update_fields'))
+        super().save(*args, **kwargs)
+        schedule_image_variants(self, changed)
+
+
+def build_image_variants(instance, field_name, source_hash, overwrite=False):
+    """
+    Генерирует производные нужных ширин в WEBP (и AVIF, если доступен) и сохраняет их описание в модель.
+
+    Уже существующие файлы для того же хэша не перекодируются, если не передан overwrite.
+    """
+    field_file = getattr(instance, field_name)
+    if not field_file:
+        return None
+
+    with field_file.open('rb'):
+        content = field_file.read()
+    if hashlib.sha256(content).hexdigest() != source_hash:
+        # Картинку успели заменить, её обработает следующая задача
+        return None
+
+    widths = instance.IMAGE_VARIANTS[field_name]
+    try:
+        image = Image.open(BytesIO(content))
+        # Для JPEG декодируем сразу в уменьшенном масштабе, если исходник намного больше самой крупной производной
+        image.draft('RGB', (max(widths.values()), max(widths.values())))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if image.mode in ('LA', 'P', 'PA') else 'RGB')
+    except (OSError, Image.DecompressionBombError) as e:
+        logger.warning(f"Не удалось открыть {field_file.name} ({instance._meta.label} #{instance.pk}): {e}")
+        return None
+
+    storage = field_file.storage
+    formats = get_variant_formats()
+    sizes = {}
+    for name, width in widths.items():
+        resized = image
+        if image.width > width:
+            resized = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        files = {}
+        for extension, pillow_format, options in formats:
+            path = f'{VARIANTS_ROOT}/{source_hash[:2]}/{source_hash}/{resized.width}w.{extension}'
+            if overwrite and storage.exists(path):
+                storage.delete(path)
+            if not storage.exists(path):
+                buffer = BytesIO()
+                resized.save(buffer, format=pillow_format, **options)
+                path = storage.save(path, ContentFile(buffer.getvalue()))
+            files[extension] = path
+        sizes[name] = {'width': resized.width, 'files': files}
+
+    variants = {'hash': source_hash, 'source': field_file.name, 'sizes': sizes}
+    variants_field = variants_field_name(field_name)
+    setattr(instance, variants_field, variants)
+    # Обычный save, чтобы сработали сигналы сброса кэша
+    instance.save(update_fields=[variants_field])
+    return variants
+
+
+def image_variant_urls(instance, field_name, request=None):
+    """{'thumb': {'width': 160, 'webp': url, 'avif': url}, ...}; пусто, пока производные не готовы."""
+    variants = getattr(instance, variants_field_name(field_name)) or {}
+    storage = getattr(instance, field_name).storage
+    urls = {}
+    for name, entry in variants.get('sizes', {}).items():
+        urls[name] = {'width': entry['width']}
+        for extension, path in entry['files'].items():
+            url = storage.url(path)
+            urls[name][extension] = request.build_absolute_uri(url) if request else url
+    return urls
+
+
+def image_srcset(instance, field_name, request=None):
+    """{'webp': 'url 360w, url 720w', 'avif': ...} для <picture>/srcset; пусто, пока производные не готовы."""
+    srcset = {}
+    for entry in image_variant_urls(instance, field_name, request).values():
+        for extension, url in entry.items():
+            if extension != 'width':
+                srcset.setdefault(extension, []).append(f"{url} {entry['width']}w")
+    return {extension: ', '.join(candidates) for extension, candidates in srcset.items()}
@@ -0,0 +1,130 @@
+import csv
+import os
+import tempfile
+from datetime import datetime, time, timedelta
+
+from django.core.files import File
+from django.utils import timezone
+
+EXPORT_CHUNK_SIZE = 2000
+
+# Заголовок и путь поля: одна строка на позицию заказа, заказ без позиций — одной строкой
+ORDER_EXPORT_COLUMNS = (
+    ('ID заказа', 'id'),
+    ('Время заказа', 'order_time'),
+    ('Склад', 'restaurant__name'),
+    ('Телефон клиента', 'user__phone_number'),
+    ('Статус', 'order_status'),
+    ('Оплата', 'payment_method'),
+    ('Статус оплаты', 'payment_status'),
+    ('Источник', 'order_source'),
+    ('Самовывоз', 'is_pickup'),
+    ('Сумма заказа', 'total_amount'),
+    ('Оплачено бонусами', 'partial_bonus_amount'),
+    ('Курьер', 'courier__phone_number'),
+    ('Сборщик', 'collector__phone_number'),
+    ('ID позиции', 'order_items__id'),
+    ('Продукт', 'order_items__product_size__product__name'),
+    ('Размер', 'order_items__product_size__size'),
+    ('Количество', 'order_items__quantity'),
+    ('Сумма позиции', 'order_items__total_amount'),
+    ('Бонусная позиция', 'order_items__is_bonus'),
+)
+
+
+def export_queryset(job):
+    from apps.orders.models import Order
+
+    orders = Order.objects.all()
+    if job.date_from:
+        orders = orders.filter(order_time__gte=timezone.make_aware(datetime.combine(job.date_from, time.min)))
+    if job.date_to:
+        orders = orders.filter(order_time__lt=timezone.make_aware(datetime.combine(job.date_to, time.min))
+                               + timedelta(days=1))
+    return orders
+
+
+def export_rows(orders):
+    """Строки выгрузки одним запросом с LEFT JOIN на позиции, читаются серверным курсором порциями."""
+    rows = orders.order_by('id', 'order_items__id').values_list(*(path for _, path in ORDER_EXPORT_COLUMNS))
+    for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [timezone.localtime(value).replace(tzinfo=None) if isinstance(value, datetime) else value
+               for value in row]
+
+
+class CsvExportWriter:
+    extension = 'csv'
+
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='', encoding='utf-8-sig')
+        self.writer = csv.writer(self.file)
+
+    def writerow(self, row):
+        self.writer.writerow(row)
+
+    def close(self):
+        self.file.close()
+
+
+class XlsxExportWriter:
+    extension = 'xlsx'
+
+    def __init__(self, path):
+        from openpyxl import Workbook
+
+        self.path = path
+        # write_only: строки сбрасываются на диск, книга не держится в памяти целиком
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet('Заказы')
+
+    def writerow(self, row):
+        self.sheet.append(row)
+
+    def close(self):
+        self.workbook.save(self.path)
+
+
+EXPORT_WRITERS = {
+    'csv': CsvExportWriter,
+    'xlsx': XlsxExportWriter,
+}
+
+
+def run_order_export(job, progress_every=EXPORT_CHUNK_SIZE):
+    """
+    Пишет выгрузку во временный файл на диске и сохраняет его в job.file.
+
+    Прогресс (число выгруженных заказов) обновляется отдельным UPDATE не чаще
+    раза в progress_every строк, чтобы его было видно из админки во время работы.
+    """
+    from apps.orders.models import OrderExportJob
+
+    orders = export_queryset(job)
+    jobs = OrderExportJob.objects.filter(pk=job.pk)
+    job.total = orders.count()
+    jobs.update(status=OrderExportJob.STATUS_RUNNING, total=job.total, processed=0)
+
+    writer_class = EXPORT_WRITERS[job.format]
+    fd, path = tempfile.mkstemp(suffix=f'.{writer_class.extension}')
+    os.close(fd)
+    try:
+        writer = writer_class(path)
+        writer.writerow([header for header, _ in ORDER_EXPORT_COLUMNS])
+        processed, last_order_id = 0, None
+        for index, row in enumerate(export_rows(orders), start=1):
+            writer.writerow(row)
+            if row[0] != last_order_id:
+                processed, last_order_id = processed + 1, row[0]
+            if index % progress_every == 0:
+                jobs.update(processed=processed)
+        writer.close()
+
+        with open(path, 'rb') as export_file:
+            job.file.save(f'orders_{job.pk}.{writer_class.extension}', File(export_file), save=False)
+    finally:
+        os.remove(path)
+
+    job.processed = processed
+    job.status = OrderExportJob.STATUS_DONE
+    job.finished_at = timezone.now()
+    job.save(update_fields=['file', 'processed', 'total', 'status', 'finished_at'])
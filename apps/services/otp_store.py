@@ -0,0 +1,68 @@
+import hashlib
+import hmac
+import secrets
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+
+OTP_LENGTH = 4
+OTP_TTL = 60 * 5
+OTP_MAX_ATTEMPTS = 5
+OTP_CACHE_KEY = 'otp:{}'
+OTP_ATTEMPTS_CACHE_KEY = 'otp:{}:attempts'
+
+OTP_VALID = 'valid'
+OTP_INVALID = 'invalid'
+OTP_EXPIRED = 'expired'
+OTP_TOO_MANY_ATTEMPTS = 'too_many_attempts'
+
+
+def generate_code():
+    return ''.join(secrets.choice('0123456789') for _ in range(OTP_LENGTH))
+
+
+def hash_code(phone_number, code):
+    # Код привязан к номеру: одинаковые коды разных пользователей дают разные хэши
+    message = f'{phone_number}:{code}'.encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+
+def issue_code(phone_number, code=None):
+    """Сохраняет хэш нового кода для номера на OTP_TTL секунд и сбрасывает счётчик попыток."""
+    code = code or generate_code()
+    cache.set_many({
+        OTP_CACHE_KEY.format(phone_number): hash_code(phone_number, code),
+        OTP_ATTEMPTS_CACHE_KEY.format(phone_number): 0,
+    }, OTP_TTL)
+    return code
+
+
+def verify_code(phone_number, code):
+    """
+    Проверяет код по ключу номера телефона.
+
+    Каждая проверка расходует попытку; после OTP_MAX_ATTEMPTS код сгорает,
+    успешно использованный код удаляется.
+    """
+    key = OTP_CACHE_KEY.format(phone_number)
+    attempts_key = OTP_ATTEMPTS_CACHE_KEY.format(phone_number)
+    code_hash = cache.get(key)
+    if code_hash is None:
+        return OTP_EXPIRED
+
+    try:
+        attempts = cache.incr(attempts_key)
+    except ValueError:
+        # Счётчик истёк раньше кода — считаем попытку первой
+        cache.set(attempts_key, 1, OTP_TTL)
+        attempts = 1
+    if attempts > OTP_MAX_ATTEMPTS:
+        cache.delete_many([key, attempts_key])
+        return OTP_TOO_MANY_ATTEMPTS
+
+    if not constant_time_compare(code_hash, hash_code(phone_number, code)):
+        return OTP_INVALID
+
+    cache.delete_many([key, attempts_key])
+    return OTP_VALID
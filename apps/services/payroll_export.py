@@ -0,0 +1,97 @@
+import csv
+import heapq
+from itertools import groupby
+
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+
+EXPORT_CHUNK_SIZE = 2000
+STAFF_ROLES = ('delivery', 'collector')
+# В зарплату идут только доведённые до конца заказы — отменённые и незавершённые не считаются
+HANDLED_ORDER_STATUSES = ('completed',)
+
+PAYROLL_HEADER = (
+    'Дата', 'ID', 'Имя', 'Телефон', 'Роль', 'Смен', 'Начало первой смены', 'Конец последней смены',
+    'Часов', 'Завершённых заказов',
+)
+
+
+class Echo:
+    """Псевдо-файл для csv.writer: строка сразу отдаётся в ответ, а не копится в памяти."""
+
+    def write(self, value):
+        return value
+
+
+def _summary_stream(date_from, date_to):
+    from apps.authentication.models import DailyWorkSummary
+
+    rows = DailyWorkSummary.objects.filter(date__range=(date_from, date_to), user__role__in=STAFF_ROLES).order_by(
+        'user_id', 'date').values_list('user_id', 'date', 'start_time', 'end_time', 'total_duration')
+    for user_id, date, start_time, end_time, total_duration in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield (user_id, date), {'start_time': start_time, 'end_time': end_time, 'total_duration': total_duration}
+
+
+def _shift_count_stream(date_from, date_to):
+    from apps.authentication.models import WorkShift
+
+    rows = WorkShift.objects.filter(end_time__isnull=False, user__role__in=STAFF_ROLES).annotate(
+        day=TruncDate('start_time')).filter(day__range=(date_from, date_to)).values('user_id', 'day').annotate(
+        shifts=Count('id')).order_by('user_id', 'day').values_list('user_id', 'day', 'shifts')
+    for user_id, day, shifts in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield (user_id, day), {'shifts': shifts}
+
+
+def _order_count_stream(date_from, date_to, field):
+    from apps.orders.models import Order
+
+    handled = Order.objects.filter(**{f'{field}__role__in': STAFF_ROLES}, order_status__in=HANDLED_ORDER_STATUSES)
+    rows = handled.annotate(
+        staff=F(field), day=TruncDate('order_time')).filter(day__range=(date_from, date_to)).values(
+        'staff', 'day').annotate(orders=Count('id')).order_by('staff', 'day').values_list('staff', 'day', 'orders')
+    for user_id, day, orders in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield (user_id, day), {'orders': orders}
+
+
+def payroll_rows(date_from, date_to):
+    """
+    Строки выгрузки по сотруднику и дню.
+
+    Сводки, смены и заказы читаются отдельными запросами, отсортированными по
+    (сотрудник, день), и сливаются на лету — в памяти держится только текущая строка
+    и справочник сотрудников.
+    """
+    from apps.authentication.models import User
+
+    staff = {user_id: (full_name, phone_number, role) for user_id, full_name, phone_number, role in
+             User.objects.filter(role__in=STAFF_ROLES).values_list('id', 'full_name', 'phone_number', 'role')}
+    streams = [
+        _summary_stream(date_from, date_to),
+        _shift_count_stream(date_from, date_to),
+        _order_count_stream(date_from, date_to, 'courier'),
+        _order_count_stream(date_from, date_to, 'collector'),
+    ]
+    merged = heapq.merge(*streams, key=lambda item: item[0])
+    for (user_id, date), parts in groupby(merged, key=lambda item: item[0]):
+        row = {'shifts': 0, 'orders': 0, 'start_time': None, 'end_time': None, 'total_duration': None}
+        for _, values in parts:
+            # Заказы курьера и сборщика складываются, если человек был в обеих ролях
+            row['orders'] += values.pop('orders', 0)
+            row.update(values)
+        full_name, phone_number, role = staff.get(user_id, ('', '', ''))
+        total_duration = row['total_duration']
+        yield (
+            date.isoformat(), user_id, full_name, phone_number, role, row['shifts'],
+            row['start_time'].isoformat() if row['start_time'] else '',
+            row['end_time'].isoformat() if row['end_time'] else '',
+            f"{total_duration.total_seconds() / 3600:.2f}" if total_duration else '0.00',
+            row['orders'],
+        )
+
+
+def stream_payroll_csv(date_from, date_to):
+    writer = csv.writer(Echo())
+    # BOM — чтобы Excel открыл кириллицу без выбора кодировки
+    yield '\ufeff' + writer.writerow(PAYROLL_HEADER)
+    for row in payroll_rows(date_from, date_to):
+        yield writer.writerow(row)
@@ -0,0 +1,67 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.functions import Greatest
+
+from apps.product.models import Product, ProductSize, PRODUCT_SEARCH_VECTOR
+
+# Колонки названий с trigram-индексами — через них ловим опечатки ("пица", "маргарита")
+TRIGRAM_NAME_FIELDS = ('name_ru', 'name_ky', 'name_en')
+AUTOCOMPLETE_LIMIT = 10
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def available_products():
+    """Активные продукты, у которых есть хотя бы один размер в наличии — без JOIN и DISTINCT."""
+    in_stock = ProductSize.objects.filter(product=OuterRef('pk'), quantity__gt=0)
+    return Product.objects.filter(Exists(in_stock), is_active=True)
+
+
+def build_prefix_query(term):
+    """'марг пиц' -> to_tsquery('simple', 'марг:* & пиц:*'); пустая строка, если слов нет."""
+    words = WORD_RE.findall(term.lower())
+    if not words:
+        return None
+    return SearchQuery(' & '.join(f'{word}:*' for word in words), config='simple', search_type='raw')
+
+
+def search_products(queryset, term):
+    """
+    Фильтрует и сортирует продукты по релевантности.
+
+    Совпадение по полнотекстовому вектору (с префиксами) или похожее по триграммам название.
+    Оба условия идут через GIN-индексы из миграции product.0015.
+    """
+    term = term.strip()
+    query = build_prefix_query(term)
+    if query is None:
+        return queryset.none()
+
+    similarity = Greatest(*(TrigramWordSimilarity(term, field) for field in TRIGRAM_NAME_FIELDS))
+    typo_match = Q()
+    for field in TRIGRAM_NAME_FIELDS:
+        typo_match |= Q(**{f'{field}__trigram_word_similar': term})
+
+    return (
+        queryset
+        .alias(search=PRODUCT_SEARCH_VECTOR)
+        .filter(Q(search=query) | typo_match)
+        .annotate(rank=SearchRank(PRODUCT_SEARCH_VECTOR, query) + similarity)
+        .order_by('-rank', 'order')
+    )
+
+
+def autocomplete_products(term, limit=AUTOCOMPLETE_LIMIT):
+    """Подсказки при вводе: только префиксный поиск, без триграмм, чтобы отвечать на каждое нажатие."""
+    query = build_prefix_query(term)
+    if query is None:
+        return Product.objects.none()
+    return (
+        available_products()
+        .alias(search=PRODUCT_SEARCH_VECTOR)
+        .filter(search=query)
+        .annotate(rank=SearchRank(PRODUCT_SEARCH_VECTOR, query))
+        .order_by('-rank', 'order')[:limit]
+    )
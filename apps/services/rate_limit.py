@@ -0,0 +1,163 @@
+import logging
+import math
+import threading
+import time
+
+import redis
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from redis.exceptions import RedisError
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+# Пополнение и списание за один EVAL: корзина атомарна при любом числе воркеров
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= requested then
+    tokens = tokens - requested
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+
+class TokenBucket:
+    """
+    Корзина токенов: capacity запросов сразу, дальше capacity за period секунд.
+
+    В Redis работает одним скриптом; если кэш не Redis (тесты, локальная
+    разработка) — через обычный кэш, если Redis недоступен — в памяти процесса.
+    """
+    _script = None
+    _client = None
+    _local = {}
+    _local_lock = threading.Lock()
+
+    def __init__(self, scope, capacity, period):
+        self.scope = scope
+        self.capacity = capacity
+        self.rate = capacity / period
+
+    def key(self, ident):
+        return f'ratelimit:{self.scope}:{ident}'
+
+    def consume(self, ident, tokens=1):
+        """Возвращает (разрешено, через сколько секунд появится нужное число токенов)."""
+        key = self.key(ident)
+        backend = caches['default']
+        if isinstance(backend, RedisCache):
+            try:
+                allowed, left = self._consume_redis(backend, key, tokens)
+            except RedisError as e:
+                logger.warning(f"Redis недоступен для ограничения запросов, считаем в памяти: {e}")
+                allowed, left = self._consume_local(key, tokens)
+        else:
+            allowed, left = self._consume_cache(backend, key, tokens)
+        return allowed, 0 if allowed else (tokens - left) / self.rate
+
+    @classmethod
+    def get_redis_client(cls):
+        # Отдельный клиент к тому же Redis, что и кэш: у RedisCache нет публичного доступа к соединению
+        if cls._client is None:
+            location = settings.CACHES['default']['LOCATION']
+            if isinstance(location, str):
+                location = location.split(',')
+            cls._client = redis.Redis.from_url(location[0])
+        return cls._client
+
+    def _consume_redis(self, backend, key, tokens):
+        client = self.get_redis_client()
+        if TokenBucket._script is None:
+            TokenBucket._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+        allowed, left = TokenBucket._script(keys=[backend.make_key(key)], args=[self.capacity, self.rate, tokens],
+                                            client=client)
+        return bool(allowed), float(left)
+
+    def _refill(self, state, now, tokens):
+        left, ts = state or (self.capacity, now)
+        left = min(self.capacity, left + max(0, now - ts) * self.rate)
+        if left >= tokens:
+            return True, left - tokens
+        return False, left
+
+    def _consume_cache(self, backend, key, tokens):
+        now = time.time()
+        allowed, left = self._refill(backend.get(key), now, tokens)
+        backend.set(key, (left, now), math.ceil(self.capacity / self.rate) + 1)
+        return allowed, left
+
+    def _consume_local(self, key, tokens):
+        now = time.monotonic()
+        with self._local_lock:
+            allowed, left = self._refill(self._local.get(key), now, tokens)
+            self._local[key] = (left, now)
+        return allowed, left
+
+
+_buckets = {}
+
+
+def client_ip(request):
+    """
+    IP клиента так же, как его определяет троттлинг DRF: из X-Forwarded-For берётся
+    адрес, добавленный нашим прокси (NUM_PROXIES), а не первый — его задаёт сам клиент.
+    """
+    return BaseThrottle().get_ident(request)
+
+
+def get_bucket(scope):
+    bucket = _buckets.get(scope)
+    if bucket is None:
+        capacity, period = settings.RATE_LIMITS[scope]
+        bucket = _buckets[scope] = TokenBucket(scope, capacity, period)
+    return bucket
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Троттлинг DRF поверх TokenBucket; подклассы задают scope и то, по чему считать запросы."""
+    scope = None
+
+    def get_ident_key(self, request, view):
+        return self.get_ident(request)
+
+    def allow_request(self, request, view):
+        ident = self.get_ident_key(request, view)
+        if ident is None:
+            return True
+        allowed, self.retry_after = get_bucket(self.scope).consume(ident)
+        return allowed
+
+    def wait(self):
+        return self.retry_after
+
+
+class OtpPhoneThrottle(TokenBucketThrottle):
+    scope = 'otp-phone'
+
+    def get_ident_key(self, request, view):
+        return request.data.get('phone_number') or None
+
+
+class ReportThrottle(TokenBucketThrottle):
+    scope = 'report'
+
+
+class ChatMessageThrottle(TokenBucketThrottle):
+    scope = 'chat-message'
+
+    def get_ident_key(self, request, view):
+        return request.user.pk if request.user.is_authenticated else self.get_ident(request)
@@ -0,0 +1,90 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from modeltranslation.utils import get_language
+from rest_framework.exceptions import NotFound
+from rest_framework.renderers import JSONRenderer
+
+# Пространства имён кэша; версия пространства меняется сигналами после коммита изменений
+CATALOG_CACHE = 'catalog'
+PAGES_CACHE = 'pages'
+LANDING_CACHE = 'landing'
+
+RESPONSE_CACHE_TIMEOUT = 60 * 60 * 24
+# Промахи (несуществующие slug и т.п.) живут недолго, чтобы случайные адреса не копились в кэше
+NOT_FOUND_CACHE_TIMEOUT = 60 * 5
+
+
+def get_cache_state(namespace):
+    """
+    Версия пространства и время его последнего изменения (секунды, для Last-Modified).
+
+    Версия — счётчик, который растёт через cache.incr и не зависит от часов
+    воркеров. Начальное значение берётся из текущего времени в миллисекундах,
+    чтобы после вытеснения ключа версия не совпала со старыми снимками.
+    """
+    keys = [f'{namespace}:version', f'{namespace}:modified']
+    state = cache.get_many(keys)
+    if len(state) < len(keys):
+        now = time.time()
+        cache.add(keys[1], int(now), None)
+        cache.add(keys[0], int(now * 1000), None)
+        state = cache.get_many(keys)
+    return state[keys[0]], state[keys[1]]
+
+
+def get_cache_version(namespace):
+    return get_cache_state(namespace)[0]
+
+
+def bump_cache_version(namespace):
+    """
+    Сбрасывает закэшированные ответы пространства.
+
+    Вызывать только после коммита (transaction.on_commit): иначе параллельный
+    запрос успеет прочитать старые строки и сохранить их под новой версией.
+    """
+    cache.set(f'{namespace}:modified', int(time.time()), None)
+    try:
+        cache.incr(f'{namespace}:version')
+    except ValueError:
+        # Ключ вытеснен из кэша — get_cache_state заведёт новую версию
+        get_cache_state(namespace)
+
+
+def cached_json_response(request, namespace, build, *key_parts, timeout=RESPONSE_CACHE_TIMEOUT):
+    """
+    Отдаёт заранее отрендеренный JSON из кэша с поддержкой ETag/Last-Modified.
+
+    build вызывается только при промахе, ключ учитывает версию пространства, язык
+    и адрес сайта (сериализаторы строят абсолютные ссылки на файлы). Если build
+    бросает NotFound/Http404, это тоже запоминается до смены версии.
+    """
+    version, last_modified = get_cache_state(namespace)
+    key = ':'.join([namespace, str(version), get_language(), request.build_absolute_uri('/'),
+                    *map(str, key_parts)])
+    entry = cache.get(key)
+    if entry is None:
+        try:
+            body = JSONRenderer().render(build())
+        except (NotFound, Http404) as e:
+            detail = e.detail if isinstance(e, NotFound) else NotFound.default_detail
+            cache.set(key, (None, detail), min(timeout, NOT_FOUND_CACHE_TIMEOUT))
+            raise NotFound(detail)
+        entry = (body, quote_etag(hashlib.md5(body).hexdigest()))
+        cache.set(key, entry, timeout)
+
+    body, etag = entry
+    if body is None:
+        raise NotFound(etag)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_vary_headers(response, ('Accept-Language',))
+    return response
@@ -1,15 +1,128 @@
 import asyncio
+import logging
+import time
 
-from telegram import Bot
+from django.core.files.storage import default_storage
+from telegram import Bot, InputMediaPhoto
+from telegram.error import RetryAfter, TelegramError
 
+logger = logging.getLogger(__name__)
 
-async def async_send_message(bot_token, chat_id, message):
-    bot = Bot(token=bot_token)
-    await bot.send_message(chat_id=chat_id, text=message)
+# Telegram пропускает не больше одного сообщения в секунду в один чат
+CHAT_SEND_INTERVAL = 1.0
+# Общий лимит бота — около 30 запросов в секунду, оставляем запас
+MAX_CONCURRENT_REQUESTS = 25
+MAX_CAPTION_LENGTH = 1024
+MAX_MEDIA_GROUP_SIZE = 10
 
 
-def send_telegram_message(bot_token, chat_id, message):
-    try:
-        asyncio.run(async_send_message(bot_token, chat_id, message))
-    except Exception as e:
-        print(f"Error sending message to Telegram: {e}")
+class TelegramDispatcher:
+    """
+    Рассылка сообщений в Telegram из воркера Celery.
+
+    Event loop и клиенты ботов живут всё время жизни процесса, поэтому
+    HTTP-сессия не пересоздаётся на каждое сообщение.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._bots = {}
+        self._chat_locks = {}
+        self._last_sent = {}
+        self._semaphore = None
+
+    def deliver(self, bot_token, chat_ids, message, photos=None):
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+            self._bots = {}
+            self._chat_locks = {}
+            self._semaphore = None
+        self._loop.run_until_complete(self._dispatch(bot_token, chat_ids, message, photos or []))
+
+    async def _get_bot(self, bot_token):
+        bot = self._bots.get(bot_token)
+        if bot is None:
+            bot = Bot(token=bot_token)
+            await bot.initialize()
+            self._bots[bot_token] = bot
+        return bot
+
+    async def _throttle(self, chat_id):
+        lock = self._chat_locks.setdefault(chat_id, asyncio.Lock())
+        async with lock:
+            wait = self._last_sent.get(chat_id, 0) + CHAT_SEND_INTERVAL - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._last_sent[chat_id] = time.monotonic()
+
+    async def _call(self, chat_id, method, **kwargs):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        await self._throttle(chat_id)
+        async with self._semaphore:
+            try:
+                return await method(chat_id=chat_id, **kwargs)
+            except RetryAfter as e:
+                await asyncio.sleep(e.retry_after)
+                return await method(chat_id=chat_id, **kwargs)
+
+    async def _send_to_chat(self, bot, chat_id, message, media):
+        """Отправляет сообщение в чат и возвращает file_id загруженных фотографий."""
+        try:
+            if not media:
+                await self._call(chat_id, bot.send_message, text=message)
+                return None
+
+            caption = message
+            if len(message) > MAX_CAPTION_LENGTH:
+                await self._call(chat_id, bot.send_message, text=message)
+                caption = None
+
+            group = [InputMediaPhoto(media=item, caption=caption if index == 0 else None)
+                     for index, item in enumerate(media)]
+            sent = await self._call(chat_id, bot.send_media_group, media=group)
+            return [msg.photo[-1].file_id for msg in sent if msg.photo]
+        except TelegramError as e:
+            logger.error(f"Ошибка при отправке сообщения в чат {chat_id}: {e}")
+            return None
+
+    async def _dispatch(self, bot_token, chat_ids, message, photos):
+        bot = await self._get_bot(bot_token)
+        media = []
+        for name in photos[:MAX_MEDIA_GROUP_SIZE]:
+            with default_storage.open(name, 'rb') as image_file:
+                media.append(image_file.read())
+
+        if media and len(chat_ids) > 1:
+            # Файлы загружаем один раз, остальные чаты получают уже сохранённые в Telegram file_id
+            file_ids = await self._send_to_chat(bot, chat_ids[0], message, media)
+            if file_ids and len(file_ids) == len(media):
+                media = file_ids
+            chat_ids = chat_ids[1:]
+
+        await asyncio.gather(*(self._send_to_chat(bot, chat_id, message, media) for chat_id in chat_ids))
+
+
+dispatcher = TelegramDispatcher()
+
+
+def deliver_telegram_message(bot_token, chat_ids, message, photos=None):
+    """Фактическая отправка — вызывается только из задачи Celery."""
+    dispatcher.deliver(bot_token, chat_ids, message, photos)
+
+
+def send_telegram_message(bot_token, chat_ids, message, photos=None):
+    """
+    Ставит сообщение в очередь на отправку.
+
+    chat_ids — один чат или список, например Restaurant.get_telegram_chat_ids();
+    photos — имена файлов в хранилище, отправляются одной медиагруппой.
+    """
+    from apps.orders.celery import send_telegram_messages
+
+    if isinstance(chat_ids, (str, int)):
+        chat_ids = [chat_ids]
+    chat_ids = [str(chat_id).strip() for chat_id in chat_ids if str(chat_id).strip()]
+    if not bot_token or not chat_ids:
+        return
+    send_telegram_messages.delay(bot_token, chat_ids, message, list(photos or []))
@@ -0,0 +1,148 @@
+import logging
+import uuid
+from xml.etree import ElementTree as ET
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+SMS_API_URL = 'https://smspro.nikita.kg/api/message'
+SMS_REPORT_URL = 'https://smspro.nikita.kg/api/dr'
+# (подключение, чтение) — шлюз не должен держать воркер дольше этого
+SMS_TIMEOUT = (3, 10)
+# Сколько номеров уходит одним запросом в элементе <phones>
+SMS_BATCH_SIZE = 50
+SMS_SETTINGS_CACHE_KEY = 'sms:settings'
+# Сигнал сбрасывает кэш при сохранении настроек; TTL — на случай правки в обход модели
+SMS_SETTINGS_CACHE_TIMEOUT = 60 * 5
+DEFAULT_SMS_GATEWAY = 'apps.services.sms_gateway.NikitaSmsGateway'
+# Код ответа шлюза «сообщение принято»
+SMS_ACCEPTED = 0
+
+
+class SmsGatewayError(Exception):
+    """Временная ошибка шлюза: задача повторит отправку."""
+
+
+def get_sms_settings():
+    """Логин, пароль и отправитель из SMSSettings, закэшированные на SMS_SETTINGS_CACHE_TIMEOUT."""
+    sms_settings = cache.get(SMS_SETTINGS_CACHE_KEY)
+    if sms_settings is None:
+        from apps.pages.models import SMSSettings
+
+        sms_settings = SMSSettings.objects.values('login', 'password', 'sender').first()
+        if not sms_settings:
+            raise ValueError("SMS settings are not configured.")
+        cache.set(SMS_SETTINGS_CACHE_KEY, sms_settings, SMS_SETTINGS_CACHE_TIMEOUT)
+    return sms_settings
+
+
+def reset_sms_settings():
+    cache.delete(SMS_SETTINGS_CACHE_KEY)
+
+
+class NikitaSmsGateway:
+    """
+    Клиент smspro.nikita.kg.
+
+    Живёт всё время жизни воркера: requests.Session держит пул соединений,
+    поэтому TLS-рукопожатие не повторяется на каждое сообщение.
+    """
+
+    def __init__(self):
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=10))
+        self.session.headers['Content-Type'] = 'application/xml'
+
+    def _post(self, url, body):
+        try:
+            response = self.session.post(url, data=ET.tostring(body, encoding='UTF-8', method='xml'),
+                                         timeout=SMS_TIMEOUT)
+        except requests.RequestException as e:
+            raise SmsGatewayError(str(e)) from e
+        if response.status_code >= 500:
+            raise SmsGatewayError(f'HTTP {response.status_code}')
+        try:
+            return ET.fromstring(response.content)
+        except ET.ParseError as e:
+            raise SmsGatewayError(f'Некорректный ответ шлюза: {response.content[:200]!r}') from e
+
+    def _credentials(self, root_tag):
+        sms_settings = get_sms_settings()
+        body = ET.Element(root_tag)
+        ET.SubElement(body, 'login').text = sms_settings['login']
+        ET.SubElement(body, 'pwd').text = sms_settings['password']
+        return body, sms_settings
+
+    def send(self, transaction_id, phones, text):
+        """Отправляет один текст на несколько номеров одним запросом, возвращает код ответа шлюза."""
+        body, sms_settings = self._credentials('message')
+        ET.SubElement(body, 'id').text = transaction_id
+        ET.SubElement(body, 'sender').text = sms_settings['sender']
+        ET.SubElement(body, 'text').text = text
+        phones_element = ET.SubElement(body, 'phones')
+        for phone in phones:
+            ET.SubElement(phones_element, 'phone').text = phone
+        if settings.DEBUG:
+            ET.SubElement(body, 'test').text = '0'
+        return int(self._post(SMS_API_URL, body).findtext('status', '-1'))
+
+    def delivery_reports(self, transaction_id):
+        """Отчёты о доставке по номерам: {номер: код отчёта шлюза}."""
+        body, _ = self._credentials('dr')
+        ET.SubElement(body, 'id').text = transaction_id
+        response = self._post(SMS_REPORT_URL, body)
+        return {phone.findtext('number'): phone.findtext('report') for phone in response.iter('phone')}
+
+
+class FakeSmsGateway:
+    """Шлюз для тестов и локальной разработки: ничего не отправляет, складывает сообщения в outbox."""
+    outbox = []
+
+    def send(self, transaction_id, phones, text):
+        self.outbox.append({'id': transaction_id, 'phones': list(phones), 'text': text})
+        return SMS_ACCEPTED
+
+    def delivery_reports(self, transaction_id):
+        return {phone: 'delivered' for message in self.outbox if message['id'] == transaction_id
+                for phone in message['phones']}
+
+
+_gateways = {}
+
+
+def get_sms_gateway():
+    path = getattr(settings, 'SMS_GATEWAY', DEFAULT_SMS_GATEWAY)
+    gateway = _gateways.get(path)
+    if gateway is None:
+        gateway = _gateways[path] = import_string(path)()
+    return gateway
+
+
+def send_sms(phones, text, kind='otp'):
+    """
+    Ставит SMS в очередь и сразу возвращает управление.
+
+    Номера разбиваются на пачки по SMS_BATCH_SIZE, каждая пачка — одна запись
+    SMSMessage и один запрос к шлюзу. В очередь уходит только id записи:
+    текст (в нём бывают коды подтверждения) не попадает в брокер.
+    """
+    from apps.pages.celery import send_sms_message
+    from apps.pages.models import SMSMessage
+
+    if isinstance(phones, str):
+        phones = [phones]
+    phones = list(dict.fromkeys(phone.strip() for phone in phones if phone and phone.strip()))
+
+    messages = []
+    for start in range(0, len(phones), SMS_BATCH_SIZE):
+        sms = SMSMessage.objects.create(transaction_id=str(uuid.uuid4()), kind=kind, text=text,
+                                        phones=phones[start:start + SMS_BATCH_SIZE])
+        transaction.on_commit(lambda sms_id=sms.id: send_sms_message.delay(sms_id))
+        messages.append(sms)
+    return messages
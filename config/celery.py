@@ -13,3 +13,5 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 
 # Автоматически обнаруживайте задачи в установленных приложениях
 app.autodiscover_tasks()
+# Задачи приложений лежат в модулях celery.py (например, apps/orders/celery.py)
+app.autodiscover_tasks(related_name='celery')
@@ -1,5 +1,11 @@
+import math
+
+from django.conf import settings
+from django.http import JsonResponse
 from django.utils import translation
 
+from apps.services.rate_limit import client_ip, get_bucket
+
 
 class LanguageMiddleware:
     def __init__(self, get_response):
@@ -15,3 +21,21 @@ class LanguageMiddleware:
         translation.deactivate()
 
         return response
+
+
+class RateLimitMiddleware:
+    """Ограничение POST-запросов по IP для путей из settings.RATE_LIMIT_PATHS — до DRF и аутентификации."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.paths = getattr(settings, 'RATE_LIMIT_PATHS', {})
+
+    def __call__(self, request):
+        scope = self.paths.get(request.path_info) if request.method == 'POST' else None
+        if scope:
+            allowed, retry_after = get_bucket(scope).consume(client_ip(request))
+            if not allowed:
+                response = JsonResponse({'detail': 'Request was throttled.'}, status=429)
+                response['Retry-After'] = str(math.ceil(retry_after))
+                return response
+        return self.get_response(request)
@@ -1,4 +1,5 @@
 import os
+import sys
 
 from datetime import timedelta
 from pathlib import Path
@@ -16,6 +17,20 @@ firebase_admin.initialize_app(cred)
 
 CELERY_BROKER_URL = 'redis://localhost:6379/0'
 
+# Для локальной разработки можно подставить apps.services.sms_gateway.FakeSmsGateway
+SMS_GATEWAY = config('SMS_GATEWAY', default='apps.services.sms_gateway.NikitaSmsGateway')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': config('REDIS_CACHE_URL', default='redis://localhost:6379/1'),
+    }
+}
+
+# Тесты не ходят в общий Redis: его содержимое переживает откат транзакции теста
+if 'test' in sys.argv:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
 SECRET_KEY = config('SECRET_KEY')
 
 DEBUG = True
@@ -37,6 +52,7 @@ PROJECT_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.humanize',
+    'django.contrib.postgres',
     'daphne',
     'django.contrib.staticfiles',
     'django.contrib.sites',
@@ -79,6 +95,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'config.middleware.LanguageMiddleware',
+    'config.middleware.RateLimitMiddleware',
 
 ]
 
@@ -175,6 +192,8 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Файлы без публичного URL (выгрузки с персональными данными), отдаются только из админки
+PRIVATE_MEDIA_ROOT = os.path.join(BASE_DIR, 'private_media')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -186,10 +205,24 @@ DEFAULT_PROFILE_PICTURE_URL = MEDIA_URL + 'profile_pictures/default-user.jpg'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.authentication.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    # Сколько своих прокси стоит перед приложением: IP клиента берётся из X-Forwarded-For с этого конца
+    'NUM_PROXIES': config('NUM_PROXIES', default=1, cast=int),
+}
+
+# scope: (запросов, за секунд) — корзины токенов apps.services.rate_limit
+RATE_LIMITS = {
+    'otp-phone': (3, 60 * 10),
+    'otp-ip': (10, 60 * 10),
+    'report': (5, 60 * 60),
+    'chat-message': (30, 60),
+}
+# Пути, которые ограничиваются по IP ещё в middleware
+RATE_LIMIT_PATHS = {
+    '/api/v1/users/login/': 'otp-ip',
 }
 
 SIMPLE_JWT = {